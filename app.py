@@ -1,27 +1,42 @@
 from flask import Flask, request, jsonify, render_template, send_from_directory
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
-import cv2
-import face_recognition
-import pytesseract
+from flask_sock import Sock
 import numpy as np
-from PIL import Image
 import os
 import json
-import base64
-import io
 import uuid
-from utils.currency_detector import INRCurrencyDetector
+import time
+import atexit
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from utils.object_detector import ObjectDetector
+from utils.object_tracker import ObjectTracker
+from utils.inference_scheduler import BatchScheduler
+from utils.chunked_upload import (PART_SUFFIX, ChecksumMismatchError, ChunkedUploads, UploadConflictError,
+                                  UploadNotFoundError, UploadTooLargeError)
+from utils.face_enrollment import find_outliers, read_archive, sample_quality, summarize_identity
+from utils.face_gallery import FaceGallery
+from utils.face_index import create_face_index
+from utils.face_store import FaceStore
+from utils.lazy_engine import EngineUnavailableError, LazyEngine
+from utils.image_decode import ImageTooLargeError, decode_image_bytes, decode_base64_image
+from utils.result_cache import ResultCache, parse_cache_settings
+from utils.stream_session import DetectionStream
+from utils.vision_tasks import load_task
+from utils.worker_pool import PoolBusyError, VisionWorkerPool, parse_worker_counts
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
 
 # Configure pytesseract path (update this path based on your system)
 # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
 UPLOAD_FOLDER = 'uploads'
 FACES_FOLDER = 'faces'
+FACE_STORE_FOLDER = 'face_store'
 AUDIOS_FOLDER = 'audios'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
@@ -30,32 +45,475 @@ if not os.path.exists(FACES_FOLDER):
 if not os.path.exists(AUDIOS_FOLDER):
     os.makedirs(AUDIOS_FOLDER)
 
-known_faces = {}
-known_face_encodings = []
-
-# Initialize currency detector
-currency_detector = INRCurrencyDetector()  
-# Initialize simple object detector
-try:
-    object_detector = ObjectDetector()
-    print("✅ Object detector initialized")
-except Exception as e:
-    print(f"⚠️ Object detector initialization warning: {e}")
-    object_detector = None
+# Uploads above this many pixels are rejected before they are decoded
+MAX_IMAGE_PIXELS = int(os.environ.get('BLINDGO_MAX_IMAGE_PIXELS', 40_000_000))
+# Upper bound on frames accepted by one /api/batch/<task> request
+MAX_BATCH_IMAGES = int(os.environ.get('BLINDGO_MAX_BATCH_IMAGES', 16))
+# Face enrollment takes up to this many photos per request (files or a zip archive)
+# and stores each person as a centroid plus ENROLL_EXEMPLARS sample encodings
+MAX_ENROLL_IMAGES = int(os.environ.get('BLINDGO_MAX_ENROLL_IMAGES', 50))
+ENROLL_EXEMPLARS = int(os.environ.get('BLINDGO_ENROLL_EXEMPLARS', 3))
+# Recordings can be sent in resumable chunks to a reserved filename, up to this size
+MAX_AUDIO_MB = int(os.environ.get('BLINDGO_MAX_AUDIO_MB', 200))
+audio_uploads = ChunkedUploads(AUDIOS_FOLDER, MAX_AUDIO_MB * 1024 * 1024)
+# Live object streams run full detection every N-th frame and track boxes in between
+TRACK_DETECT_EVERY = int(os.environ.get('BLINDGO_TRACK_DETECT_EVERY', 5))
+# Shared pool for decoding and per-frame work of batch requests
+batch_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
+# Vision subsystems listed in BLINDGO_DISABLE (e.g. "object,face") are switched
+# off: their routes answer 503 and their models and libraries are never imported
+SUBSYSTEMS = ('object', 'ocr', 'money', 'face')
+DISABLED = {name.strip() for name in os.environ.get('BLINDGO_DISABLE', '').split(',') if name.strip()}
+for name in DISABLED - set(SUBSYSTEMS):
+    print(f"⚠️ BLINDGO_DISABLE: unknown subsystem '{name}'")
+
+# All enrolled encodings live in one float32 matrix (see utils/face_gallery.py).
+# Set BLINDGO_FACE_INDEX=ivfpq to search very large galleries approximately.
+FACE_INDEX = os.environ.get('BLINDGO_FACE_INDEX', 'flat')
+# The gallery is thread-safe and writes every change through to an
+# append-only binary store (see utils/face_store.py). With face disabled the
+# gallery stays empty and the store is never opened.
+face_gallery = FaceGallery(index=create_face_index(FACE_INDEX),
+                           store=None if 'face' in DISABLED else FaceStore(FACE_STORE_FOLDER))
+
+# Results of recently seen frames are reused per endpoint (see utils/result_cache.py):
+# {task: (ttl seconds, max entries, perceptual-hash distance for near-duplicates)}.
+# Every default only reuses identical frames: nearby pages of text or notes that differ
+# mainly in colour can hash a few bits apart, and a near match would return the wrong
+# result. Opt in with e.g. BLINDGO_CACHE="ocr=120:256:6,object=0"; a ttl of 0 turns a cache off.
+# Face results are only reused while the gallery is unchanged.
+CACHE_DEFAULTS = {
+    'ocr': (60, 128, 0),
+    'money': (60, 128, 0),
+    'face': (30, 256, 0),
+    'object': (2, 64, 0),
+}
+result_caches = {
+    task: ResultCache(task, ttl, max_entries, near_distance)
+    for task, (ttl, max_entries, near_distance)
+    in parse_cache_settings(os.environ.get('BLINDGO_CACHE', ''), CACHE_DEFAULTS).items()
+    if task not in DISABLED
+}
+
+# Object detector inference backend: torch (default), onnx or openvino; the
+# exported models are cached in models/ (see utils/detector_backends.py)
+OBJECT_BACKEND = os.environ.get('BLINDGO_OBJECT_BACKEND', 'torch')
+OBJECT_INT8 = os.environ.get('BLINDGO_OBJECT_INT8', '0') == '1'
+OBJECT_THREADS = int(os.environ.get('BLINDGO_OBJECT_THREADS', 0)) or None
+
+# Concurrent object requests share YOLO forward passes: frames queue up and run
+# as micro-batches of up to OBJECT_MAX_BATCH frames, the oldest waiting at most
+# OBJECT_MAX_WAIT_MS for the batch to fill (see utils/inference_scheduler.py)
+OBJECT_MAX_BATCH = int(os.environ.get('BLINDGO_OBJECT_MAX_BATCH', 8))
+OBJECT_MAX_WAIT_MS = float(os.environ.get('BLINDGO_OBJECT_MAX_WAIT_MS', 15))
+
+def load_object_scheduler():
+    """Build the object detector and the scheduler that batches its requests"""
+    object_detector = ObjectDetector(backend=OBJECT_BACKEND, int8=OBJECT_INT8, threads=OBJECT_THREADS)
+    if not object_detector.model_loaded:
+        raise RuntimeError('YOLOv8 model could not be loaded')
+    return BatchScheduler(object_detector.detect_batch, OBJECT_MAX_BATCH, OBJECT_MAX_WAIT_MS, name='object')
+
+# CPU-bound engines (OCR, currency, face encoding) can run in worker processes,
+# e.g. BLINDGO_WORKERS="ocr=2,money=2,face=2"; unlisted tasks run in-process.
+# Requests beyond BLINDGO_WORKER_PENDING per worker are turned away with 503.
+WORKER_COUNTS = {task: count for task, count in parse_worker_counts(os.environ.get('BLINDGO_WORKERS', '')).items()
+                 if task not in DISABLED}
+worker_pool = None
+if WORKER_COUNTS:
+    worker_pool = VisionWorkerPool(
+        WORKER_COUNTS,
+        pending_per_worker=int(os.environ.get('BLINDGO_WORKER_PENDING', 4)),
+        max_jobs=int(os.environ.get('BLINDGO_WORKER_MAX_JOBS', 500)),
+    )
+
+# In-process engines, loaded on first use (or by the background warm-up).
+# Nothing heavy is imported until then, so a cold start stays cheap.
+engines = {}
+if 'object' not in DISABLED:
+    engines['object'] = LazyEngine('object', load_object_scheduler)
+for task in ('ocr', 'money', 'face'):
+    if task not in DISABLED and task not in WORKER_COUNTS:
+        engines[task] = LazyEngine(task, lambda task=task: load_task(task))
+
+def object_scheduler():
+    """The object detection BatchScheduler, loading the detector on first call"""
+    return engines['object'].get()
+
+def run_engine(task, image):
+    """Run a vision task (see utils/vision_tasks.py) in a worker process or in-process"""
+    if worker_pool is not None and task in worker_pool:
+        return worker_pool.run(task, image)
+    return engines[task].get()(image)
+
+def subsystem_disabled(subsystem):
+    """Response for a route whose subsystem is switched off by BLINDGO_DISABLE"""
+    return jsonify({'error': f'{subsystem} is disabled on this server', 'success': False}), 503
 
 def load_known_faces():
-    """Load known faces from the faces directory"""
-    global known_faces, known_face_encodings
-    
-    if os.path.exists('known_faces.json'):
-        with open('known_faces.json', 'r') as f:
-            known_faces = json.load(f)
-            known_face_encodings = list(known_faces.values())
-
-def save_known_faces():
-    """Save known faces to JSON file"""
-    with open('known_faces.json', 'w') as f:
-        json.dump(known_faces, f)
+    """Load known faces from the binary face store"""
+    # One-shot import of the legacy JSON gallery
+    migrated = face_gallery.store.migrate_json('known_faces.json')
+    if migrated:
+        print(f"✅ Migrated {migrated} face(s) from known_faces.json")
+
+    # Encodings from known_faces.json were computed from BGR frames; probes are
+    # RGB now, so those people match at larger distances until re-enrolled
+    legacy = face_gallery.store.legacy_people()
+    if legacy:
+        print(f"⚠️ {len(legacy)} face(s) were enrolled before colour handling was fixed and may not be "
+              f"recognised reliably; re-enroll them via /api/face/enroll: {', '.join(legacy)}")
+
+    face_gallery.load()
+
+# Load the gallery at import so WSGI servers (gunicorn.conf.py preloads the
+# app before forking) start with every enrolled face
+if 'face' not in DISABLED:
+    load_known_faces()
+
+# Blank frames pushed through every engine once, so the first real request
+# does not pay for model loading, graph optimisation or thread pool start-up.
+# With BLINDGO_WARM_UP=0 engines load on their first request instead.
+WARM_UP = os.environ.get('BLINDGO_WARM_UP', '1') == '1'
+WARM_UP_FRAMES = {
+    'object': lambda: np.zeros((480, 640, 3), dtype=np.uint8),
+    'ocr': lambda: np.full((480, 640), 255, dtype=np.uint8),
+    'money': lambda: np.zeros((480, 640, 3), dtype=np.uint8),
+    'face': lambda: [np.zeros((480, 640, 3), dtype=np.uint8)],
+}
+warmed_up = threading.Event()
+warm_up_status = {}
+warm_up_pid = None
+warm_up_lock = threading.Lock()
+
+def preload_engines():
+    """
+    Load the in-process engines without running them. Called in the server's
+    parent process so forked workers share the loaded models copy-on-write.
+    """
+    if not WARM_UP:
+        return
+    for engine in engines.values():
+        try:
+            engine.get()
+        except EngineUnavailableError:
+            pass
+
+def warm_up():
+    """Run every enabled engine once on a blank frame, then mark the process ready"""
+    # Start the slow loads side by side; the passes below wait for their own engine
+    for engine in engines.values():
+        engine.warm()
+
+    if worker_pool is not None:
+        try:
+            worker_pool.start()
+        except Exception as e:
+            print(f"⚠️ Worker pool start-up failed: {e}")
+
+    for task, frame in WARM_UP_FRAMES.items():
+        if task in DISABLED:
+            continue
+        try:
+            if task == 'object':
+                object_scheduler().run(frame())
+            else:
+                run_engine(task, frame())
+            warm_up_status[task] = 'ok'
+        except Exception as e:
+            warm_up_status[task] = str(e)
+
+    print(f"✅ Warm-up finished: {warm_up_status}")
+    warmed_up.set()
+
+def start_warm_up():
+    """Warm up in the background, once per process (forked workers warm up their own copies)"""
+    global warm_up_pid
+    with warm_up_lock:
+        if warm_up_pid == os.getpid():
+            return
+        warm_up_pid = os.getpid()
+        warmed_up.clear()
+        warm_up_status.clear()
+        if not WARM_UP:
+            warmed_up.set()
+            return
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+def shutdown():
+    """Stop accepting inference work and release worker processes"""
+    if 'object' in engines and engines['object'].loaded:
+        object_scheduler().close()
+    if worker_pool is not None:
+        worker_pool.close()
+    batch_executor.shutdown(wait=False)
+
+atexit.register(shutdown)
+
+def timed(func, *args):
+    """Call func(*args) and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, round((time.perf_counter() - start) * 1000, 2)
+
+def request_field(name):
+    """Read a form field from a JSON body, multipart form or query string"""
+    data = request.get_json(silent=True) if request.is_json else None
+    if data is not None:
+        return data.get(name)
+    return request.form.get(name) or request.args.get(name)
+
+def read_request_image(engine, field='image'):
+    """
+    Decode the image of a vision request into a DecodedImage, shrinking large
+    JPEGs during decode to the resolution `engine` works at.
+    Accepts, in order: a raw image/* (or octet-stream) body, a multipart file
+    part named `field`, or the legacy JSON body {field: base64 / data URL}.
+    Returns None when the request carries no image.
+    """
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        image_bytes = request.stream.read()
+        return decode_image_bytes(image_bytes, MAX_IMAGE_PIXELS, engine) if image_bytes else None
+
+    if field in request.files:
+        image_bytes = request.files[field].stream.read()
+        return decode_image_bytes(image_bytes, MAX_IMAGE_PIXELS, engine) if image_bytes else None
+
+    image_data = request_field(field)
+    return decode_base64_image(image_data, MAX_IMAGE_PIXELS, engine) if image_data else None
+
+def scale_detections(result, scale):
+    """Map detection boxes from engine resolution back to the uploaded image"""
+    if scale != 1:
+        for detection in result.get('detections', []):
+            detection['box'] = [int(round(v * scale)) for v in detection['box']]
+    return result
+
+def cached_run(task, image, compute, version=None):
+    """compute(image), answered from the task's result cache when it has the frame"""
+    cache = result_caches.get(task)
+    if cache is None:
+        return compute(image)
+    return cache.get_or_compute(image, compute, version)
+
+def cached_batch(task, items, compute_many, image_of, version=None):
+    """
+    Batch counterpart of cached_run: items whose frame (image_of(item)) is
+    cached are answered from the cache, the rest go through compute_many together
+    Returns: list of results in item order
+    """
+    cache = result_caches.get(task)
+    if cache is None:
+        return compute_many(items)
+
+    keys = [cache.keys_for(image_of(item)) for item in items]
+    results = [cache.get(key, phash, version) for key, phash in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        for i, result in zip(missing, compute_many([items[i] for i in missing])):
+            key, phash = keys[i]
+            cache.put(key, result, phash, version)
+            results[i] = result
+    return results
+
+def ocr_image(decoded):
+    """Run OCR on one frame and build the /api/ocr response"""
+    gray, _ = decoded.for_engine('ocr')
+
+    text = cached_run('ocr', gray, lambda image: run_engine('ocr', image))
+
+    if not text:
+        return {'text': 'No text detected in the image', 'success': False}
+
+    return {
+        'text': text,
+        'success': True,
+        'message': f'Detected text: {text}'
+    }
+
+def face_encodings_for_frames(decoded_images):
+    """
+    Locate and encode every face of one or more frames in one engine call
+    Returns: (list of encodings per frame, list of face boxes per frame, stage timings in ms,
+              faces found per frame before the MAX_FACES cut)
+    """
+    return run_engine('face', [decoded.for_engine('face')[0] for decoded in decoded_images])
+
+def recognize_faces(decoded_images):
+    """
+    Recognize faces in one or more frames, reusing the results of frames seen
+    recently against the same gallery (those report 0 ms). Freshly computed
+    results carry the stage timings of the engine call that produced them.
+    Returns: list of (result dict, inference ms) per frame
+    """
+    fresh = {}
+
+    def recognize(pending):
+        results, inference_ms, timings = match_faces(pending)
+        for decoded in pending:
+            fresh[id(decoded)] = (inference_ms, timings)
+        return results
+
+    # The version is read before matching, so a result computed while the
+    # gallery changes is stored under the old version and never served
+    results = cached_batch('face', decoded_images, recognize,
+                           lambda decoded: decoded.for_engine('face')[0], face_gallery.version)
+
+    recognized = []
+    for result, decoded in zip(results, decoded_images):
+        if id(decoded) in fresh:
+            inference_ms, timings = fresh[id(decoded)]
+            recognized.append((dict(result, stage_timing_ms=timings), inference_ms))
+        else:
+            recognized.append((result, 0))
+    return recognized
+
+def match_faces(decoded_images):
+    """
+    Recognize faces in one or more frames. All faces of all frames are encoded
+    in one batch and matched against the gallery in one batch, so every frame
+    reports the time of the whole batch.
+    Returns: (list of result dicts, inference ms, stage timings in ms)
+    """
+    start = time.perf_counter()
+    per_frame, _, timings, _ = face_encodings_for_frames(decoded_images)
+
+    all_encodings = [encoding for encodings in per_frame for encoding in encodings]
+    matches, timings['match'] = timed(face_gallery.match, all_encodings) if all_encodings else ([], 0)
+
+    results = []
+    offset = 0
+    for encodings in per_frame:
+        frame_matches = matches[offset:offset + len(encodings)]
+        offset += len(encodings)
+
+        recognized = [(name, distance) for name, distance in frame_matches if name is not None]
+
+        if not encodings:
+            result = {'error': 'No face detected in the image', 'success': False}
+        elif recognized:
+            result = {
+                'success': True,
+                'names': [name for name, _ in recognized],
+                'matches': [
+                    {'name': name, 'distance': round(distance, 4)}
+                    for name, distance in recognized
+                ],
+                'message': f'Recognized: {", ".join(name for name, _ in recognized)}'
+            }
+        else:
+            result = {
+                'success': False,
+                'message': 'Face not recognized'
+            }
+
+        results.append(result)
+
+    return results, round((time.perf_counter() - start) * 1000, 2), timings
+
+def decode_samples(payloads, decoder):
+    """
+    Decode enrollment photos in parallel; one that fails to decode becomes a
+    rejected sample instead of failing the request
+    Returns: list of DecodedImage or error message per payload
+    """
+    def decode(payload):
+        try:
+            return decoder(payload, MAX_IMAGE_PIXELS, 'face')
+        except ValueError as e:
+            return str(e)
+
+    return list(batch_executor.map(decode, payloads))
+
+def enroll_person(name, labels, decoded_samples):
+    """
+    Quality-gate one person's photos, encode them in one batch and replace
+    the person's gallery entries with the centroid and exemplars of the
+    accepted samples
+    Returns: enrollment result dict
+    """
+    start = time.perf_counter()
+    samples = [{'image': label} for label in labels]
+    decoded = [(i, sample) for i, sample in enumerate(decoded_samples) if not isinstance(sample, str)]
+    for i, sample in enumerate(decoded_samples):
+        if isinstance(sample, str):
+            samples[i].update(accepted=False, reason=sample)
+
+    timings = {}
+    accepted = []
+    if decoded:
+        encodings, locations, timings, detected = face_encodings_for_frames([sample for _, sample in decoded])
+        frames = [sample.for_engine('face')[0] for _, sample in decoded]
+        qualities, timings['quality'] = timed(
+            lambda: list(batch_executor.map(sample_quality, frames, locations, detected)))
+        for (i, _), quality, frame_encodings in zip(decoded, qualities, encodings):
+            samples[i].update(quality, accepted=quality['reason'] is None)
+            if quality['reason'] is None:
+                accepted.append((i, frame_encodings[0]))
+
+    for outlier in find_outliers([encoding for _, encoding in accepted]):
+        i = accepted[outlier][0]
+        samples[i].update(accepted=False, reason='Does not look like the other photos of this person')
+    accepted = [(i, encoding) for i, encoding in accepted if samples[i]['accepted']]
+
+    for sample in samples:
+        if sample['accepted']:
+            del sample['reason']
+
+    result = {'name': name, 'samples': samples, 'accepted': len(accepted)}
+    if not accepted:
+        result.update(success=False, error='No usable photo', ids=[])
+    else:
+        rows, exemplars = summarize_identity([encoding for _, encoding in accepted], ENROLL_EXEMPLARS)
+        result.update(success=True, ids=face_gallery.replace(name, rows),
+                      exemplars=[samples[accepted[j][0]]['image'] for j in exemplars])
+
+    result['stage_timing_ms'] = dict(timings, total=round((time.perf_counter() - start) * 1000, 2))
+    return result
+
+# Currency detector diagnostics that describe one run rather than the frame
+MONEY_RUN_KEYS = ('stage_timing_ms', 'ocr_calls', 'early_exit')
+
+def detect_money(decoded):
+    """
+    Run the currency detector at its working resolution. The cache keeps
+    results without their per-run diagnostics: a reused result is marked
+    cached and reports none, a fresh one carries those of its own run.
+    """
+    image, _ = decoded.for_engine('money')
+    runs = []
+
+    def detect(frame):
+        result = run_engine('money', frame)
+        runs.append({key: result.pop(key) for key in MONEY_RUN_KEYS if key in result})
+        return result
+
+    result = cached_run('money', image, detect)
+    if runs:
+        result.update(runs[0])
+    result['cached'] = not runs
+    return result
+
+def detect_objects_batch(decoded_images):
+    """Run all frames through YOLO together, sharing batches with concurrent requests"""
+    frames = [decoded.for_engine('object') for decoded in decoded_images]
+
+    # The forward pass is shared, so every frame reports the whole batch time
+    results, inference_ms = timed(cached_batch, 'object', [image for image, _ in frames],
+                                  object_scheduler().run_many, lambda image: image)
+    return [(scale_detections(result, scale), inference_ms) for result, (_, scale) in zip(results, frames)]
+
+def track_object_frame(tracker, frame_bytes):
+    """Decode one encoded camera frame and track objects in source coordinates"""
+    image, scale = decode_image_bytes(frame_bytes, MAX_IMAGE_PIXELS, 'object').for_engine('object')
+    return scale_detections(tracker.update(image), scale)
+
+def run_per_frame(func):
+    """Batch runner for engines without native batching: frames run in parallel"""
+    def runner(decoded_images):
+        return list(batch_executor.map(lambda img: timed(func, img), decoded_images))
+    return runner
 
 @app.route('/')
 def index():
@@ -64,151 +522,166 @@ def index():
 @app.route('/api/ocr', methods=['POST'])
 def extract_text():
     """Extract text from image using OCR"""
+    if 'ocr' in DISABLED:
+        return subsystem_disabled('ocr')
     try:
 
-        data = request.get_json()
-        image_data = data.get('image')
+        decoded = read_request_image('ocr')
         
-        if not image_data:
+        if decoded is None:
             return jsonify({'error': 'No image data provided'}), 400
 
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-        gray = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2GRAY)
-        gray = cv2.medianBlur(gray, 3)
-
-        text = pytesseract.image_to_string(gray)
-
-        text = text.strip()
-        
-        if not text:
-            return jsonify({'text': 'No text detected in the image', 'success': False})
-        
-        return jsonify({
-            'text': text,
-            'success': True,
-            'message': f'Detected text: {text}'
-        })
+        return jsonify(ocr_image(decoded))
         
+    except ImageTooLargeError as e:
+        return jsonify({'error': str(e), 'success': False}), 413
+    except PoolBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
 @app.route('/api/face/upload', methods=['POST'])
 def upload_face():
     """Upload and train a new face"""
+    if 'face' in DISABLED:
+        return subsystem_disabled('face')
     try:
-        data = request.get_json()
-        name = data.get('name')
-        image_data = data.get('image')
+        name = request_field('name')
+        decoded = read_request_image('face')
         
-        if not name or not image_data:
+        if not name or decoded is None:
             return jsonify({'error': 'Name and image are required'}), 400
 
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
+        # A single-photo enrollment, gated like the bulk API
+        result = enroll_person(name, ['image'], [decoded])
+        sample = result['samples'][0]
 
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+        if not result['success']:
+            return jsonify({'error': sample['reason'], 'quality': sample, 'success': False}), 400
 
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-        face_locations = face_recognition.face_locations(opencv_image)
-        
-        if not face_locations:
-            return jsonify({'error': 'No face detected in the image', 'success': False}), 400
-
-        face_encoding = face_recognition.face_encodings(opencv_image, face_locations)[0]
-
-        known_faces[name] = face_encoding.tolist()
-        known_face_encodings.append(face_encoding)
-
-        save_known_faces()
-        
         return jsonify({
             'success': True,
+            'ids': result['ids'],
+            'quality': sample,
             'message': f'Face uploaded successfully for {name}'
         })
         
+    except ImageTooLargeError as e:
+        return jsonify({'error': str(e), 'success': False}), 413
+    except PoolBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+@app.route('/api/face/enroll', methods=['POST'])
+def enroll_faces():
+    """Enroll people from many photos each.
+
+    Accepts a multipart body with a "name" field and several "images" file
+    parts, and/or an "archive" zip with photos at the top level (for "name")
+    or in one folder per person; or JSON {"name": ..., "images": [base64, ...]}.
+    Every person's entries are replaced by the centroid and exemplars of
+    their photos that pass the quality checks.
+    """
+    if 'face' in DISABLED:
+        return subsystem_disabled('face')
+    try:
+        name = request_field('name')
+        people = {}
+
+        if request.files:
+            for upload in request.files.getlist('images'):
+                people.setdefault(name, []).append((upload.filename or 'image', upload.read()))
+            if 'archive' in request.files:
+                archived = read_archive(request.files['archive'].read(), name, MAX_ENROLL_IMAGES)
+                for person, files in archived.items():
+                    people.setdefault(person, []).extend(files)
+            decoder = decode_image_bytes
+        else:
+            data = request.get_json(silent=True) or {}
+            images = data.get('images') or []
+            if images:
+                people[name] = [(f'image {i}', image) for i, image in enumerate(images)]
+            decoder = decode_base64_image
+
+        if None in people:
+            return jsonify({'error': 'A name is required for photos outside person folders', 'success': False}), 400
+        if not people:
+            return jsonify({'error': 'No images provided', 'success': False}), 400
+        if sum(len(files) for files in people.values()) > MAX_ENROLL_IMAGES:
+            return jsonify({'error': f'At most {MAX_ENROLL_IMAGES} images per enrollment', 'success': False}), 413
+
+        results = {}
+        for person, files in people.items():
+            labels = [label for label, _ in files]
+            results[person] = enroll_person(person, labels, decode_samples([payload for _, payload in files], decoder))
+
+        enrolled = [person for person, result in results.items() if result['success']]
+        return jsonify({
+            'success': bool(enrolled),
+            'people': results,
+            'message': f'Enrolled: {", ".join(enrolled)}' if enrolled else 'No one could be enrolled'
+        }), 200 if enrolled else 400
+
+    except (ValueError, zipfile.BadZipFile) as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except PoolBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
 @app.route('/api/face/recognize', methods=['POST'])
 def recognize_face():
     """Recognize face in uploaded image"""
+    if 'face' in DISABLED:
+        return subsystem_disabled('face')
     try:
-        data = request.get_json()
-        image_data = data.get('image')
+        decoded = read_request_image('face')
         
-        if not image_data:
+        if decoded is None:
             return jsonify({'error': 'No image data provided'}), 400
 
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
+        # Nearest identity for every face in one batched distance computation
+        result, _ = recognize_faces([decoded])[0]
 
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-        face_locations = face_recognition.face_locations(opencv_image)
-        
-        if not face_locations:
-            return jsonify({'error': 'No face detected in the image', 'success': False}), 400
-
-        face_encodings = face_recognition.face_encodings(opencv_image, face_locations)
-        
-        recognized_names = []
-        
-        for face_encoding in face_encodings:
+        if 'error' in result:
+            return jsonify(result), 400
 
-            matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.6)
-            
-            if True in matches:
-                first_match_index = matches.index(True)
-                name = list(known_faces.keys())[first_match_index]
-                recognized_names.append(name)
-        
-        if recognized_names:
-            return jsonify({
-                'success': True,
-                'names': recognized_names,
-                'message': f'Recognized: {", ".join(recognized_names)}'
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Face not recognized'
-            })
+        return jsonify(result)
         
+    except ImageTooLargeError as e:
+        return jsonify({'error': str(e), 'success': False}), 413
+    except PoolBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
 @app.route('/api/faces', methods=['GET'])
 def get_known_faces():
     """Get list of known faces"""
+    faces = face_gallery.people()
     return jsonify({
-        'faces': list(known_faces.keys()),
-        'count': len(known_faces)
+        'faces': faces,
+        'count': len(faces),
+        # People imported from known_faces.json that should be enrolled again
+        'legacy': face_gallery.store.legacy_people() if face_gallery.store else []
     })
 
 @app.route('/api/face/delete/<name>', methods=['DELETE'])
 def delete_face(name):
     """Delete a known face"""
+    if 'face' in DISABLED:
+        return subsystem_disabled('face')
     try:
-        if name in known_faces:
-
-            face_encoding = known_faces[name]
-            known_face_encodings.remove(np.array(face_encoding))
-            del known_faces[name]
-
-            save_known_faces()
-            
+        if face_gallery.remove(name):
             return jsonify({
                 'success': True,
                 'message': f'Face for {name} deleted successfully'
@@ -219,6 +692,23 @@ def delete_face(name):
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
+@app.route('/api/face/entry/<int:entry_id>', methods=['DELETE'])
+def delete_face_entry(entry_id):
+    """Delete a single stored encoding by its entry id"""
+    if 'face' in DISABLED:
+        return subsystem_disabled('face')
+    try:
+        if face_gallery.delete(entry_id):
+            return jsonify({
+                'success': True,
+                'message': f'Face entry {entry_id} deleted successfully'
+            })
+        else:
+            return jsonify({'error': 'Face entry not found'}), 404
+
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
 @app.route('/api/location', methods=['POST'])
 def update_location():
     """Update user location for navigation assistance"""
@@ -242,29 +732,26 @@ def update_location():
 @app.route('/api/money/detect', methods=['POST'])
 def detect_currency():
     """Detect Indian Rupee currency notes"""
+    if 'money' in DISABLED:
+        return subsystem_disabled('money')
     try:
-        data = request.get_json()
-        image_data = data.get('image')
+        # Raw image body, multipart part or base64 JSON -> OpenCV format
+        decoded = read_request_image('money')
         
-        if not image_data:
+        if decoded is None:
             return jsonify({'error': 'No image data provided', 'success': False}), 400
 
-        # Remove data URL prefix if present
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-
-        # Convert to OpenCV format
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
         # Detect currency
-        result = currency_detector.detect(opencv_image)
+        result = detect_money(decoded)
         
         return jsonify(result)
         
+    except ImageTooLargeError as e:
+        return jsonify({'error': str(e), 'success': False}), 413
+    except PoolBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
@@ -272,33 +759,186 @@ def detect_currency():
 @app.route('/api/object/detect', methods=['POST'])
 def detect_objects():
     """Detect generic objects in an uploaded image"""
+    if 'object' in DISABLED:
+        return subsystem_disabled('object')
     try:
-        if object_detector is None:
-            return jsonify({'error': 'Object detector not initialized', 'success': False}), 503
-
-        data = request.get_json()
-        image_data = data.get('image')
+        decoded = read_request_image('object')
 
-        if not image_data:
+        if decoded is None:
             return jsonify({'error': 'No image data provided', 'success': False}), 400
 
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
+        # Boxes come back in the coordinates of the uploaded image
+        image, scale = decoded.for_engine('object')
+        result = scale_detections(cached_run('object', image, object_scheduler().run), scale)
 
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+        return jsonify(result)
 
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    except ImageTooLargeError as e:
+        return jsonify({'error': str(e), 'success': False}), 413
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
+    except Exception as e:
+        print(f"Object detection error: {e}")
+        return jsonify({'error': str(e), 'success': False}), 500
 
-        result = object_detector.detect(opencv_image)
 
-        return jsonify(result)
+@sock.route('/ws/object/stream')
+def object_stream(ws):
+    """Continuous object detection over a WebSocket.
+
+    The client sends encoded camera frames (JPEG/PNG) as binary messages and
+    gets one JSON message per processed frame: the /api/object/detect result
+    plus 'seq' (1-based index of the frame it answers) and per-session
+    'metrics' (fps, latency_ms, inference_ms, received/processed/dropped).
+    Frames that arrive while inference is busy replace each other, so the
+    answer is always about the newest frame.
+
+    Objects are tracked across frames (see utils/object_tracker.py): every
+    detection carries a stable 'track_id' and 'new_track_ids' lists the
+    objects that just appeared, so the client only announces those.
+    """
+    if 'object' in DISABLED:
+        ws.send(json.dumps({'type': 'error', 'error': 'object is disabled on this server', 'success': False}))
+        return
+    try:
+        scheduler = object_scheduler()
+    except EngineUnavailableError as e:
+        ws.send(json.dumps({'type': 'error', 'error': str(e), 'success': False}))
+        return
+
+    tracker = ObjectTracker(scheduler.run, detect_every=TRACK_DETECT_EVERY)
+    stream = DetectionStream(lambda frame_bytes: track_object_frame(tracker, frame_bytes),
+                             lambda message: ws.send(json.dumps(message)))
+    try:
+        while not stream.closed:
+            message = ws.receive()
+            if message is None:
+                break
+            # Text messages are reserved for control; only binary frames are detected
+            if isinstance(message, bytes):
+                stream.submit(message)
+    finally:
+        stream.close()
+        metrics = stream.metrics()
+        print(f"📡 Object stream closed: {metrics['processed']}/{metrics['received']} frames, "
+              f"{tracker.detections_run} detector passes, {metrics['fps']} fps, {metrics['latency_ms']} ms latency")
+
+
+# Per-task batch runners: list of DecodedImage -> list of (result dict, inference ms).
+# Task names double as the image_decode engine profile used to decode the frames.
+BATCH_TASKS = {
+    'ocr': run_per_frame(ocr_image),
+    'face': recognize_faces,
+    'money': run_per_frame(detect_money),
+    'object': detect_objects_batch,
+}
+
+
+def run_batch(task, payloads, decoder, start):
+    """
+    Decode and process the frames of a batch request
+    Returns: (response dict, HTTP status)
+    """
+    if not payloads:
+        return {'error': 'No images provided', 'success': False}, 400
+
+    if len(payloads) > MAX_BATCH_IMAGES:
+        return {'error': f'At most {MAX_BATCH_IMAGES} images per batch', 'success': False}, 413
+
+    decoded = list(batch_executor.map(
+        lambda payload: timed(decoder, payload, MAX_IMAGE_PIXELS, task), payloads))
+    decoded_images = [image for image, _ in decoded]
+
+    frame_results = BATCH_TASKS[task](decoded_images)
+
+    results = []
+    for frame, ((result, inference_ms), (_, decode_ms)) in enumerate(zip(frame_results, decoded)):
+        result = dict(result)
+        result['frame'] = frame
+        result['timing_ms'] = {'decode': decode_ms, 'inference': inference_ms}
+        results.append(result)
+
+    return {
+        'success': True,
+        'task': task,
+        'count': len(results),
+        'results': results,
+        'timing_ms': {'total': round((time.perf_counter() - start) * 1000, 2)}
+    }, 200
+
+
+@app.route('/api/batch/<task>', methods=['POST'])
+def batch_detect(task):
+    """Run one vision task over several frames in a single request.
+
+    Accepts JSON {"images": [base64 or data URL, ...]} or a multipart body
+    with one or more "images" file parts. Frames are decoded in parallel and
+    run through the engine as one batch; results come back per frame.
+    """
+    try:
+        if task not in BATCH_TASKS:
+            return jsonify({'error': f'Unknown batch task: {task}', 'success': False}), 404
+        if task in DISABLED:
+            return subsystem_disabled(task)
+
+        start = time.perf_counter()
 
+        if request.files:
+            payloads = [f.read() for f in request.files.getlist('images')]
+            decoder = decode_image_bytes
+        else:
+            data = request.get_json(silent=True) or {}
+            payloads = data.get('images') or []
+            decoder = decode_base64_image
+
+        body, status = run_batch(task, payloads, decoder, start)
+        return jsonify(body), status
+
+    except ImageTooLargeError as e:
+        return jsonify({'error': str(e), 'success': False}), 413
+    except PoolBusyError as e:
+        return jsonify({'error': str(e), 'success': False}), 503, {'Retry-After': '1'}
+    except EngineUnavailableError as e:
+        return jsonify({'error': str(e), 'success': False}), 503
     except Exception as e:
-        print(f"Object detection error: {e}")
         return jsonify({'error': str(e), 'success': False}), 500
 
 
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Runtime counters of the shared inference machinery"""
+    object_engine = engines.get('object')
+    return jsonify({
+        'engines': {name: engine.status() for name, engine in engines.items()},
+        'disabled': sorted(DISABLED),
+        'object_scheduler': object_scheduler().stats() if object_engine and object_engine.loaded else None,
+        'result_cache': {task: cache.stats() for task, cache in result_caches.items()},
+        'worker_pool': worker_pool.stats() if worker_pool else None,
+    })
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 200 once every engine has been warmed up, 503 until then"""
+    start_warm_up()
+    ready = warmed_up.is_set()
+    return jsonify({
+        'ready': ready,
+        'engines': dict(warm_up_status),
+        'disabled': sorted(DISABLED),
+        'faces': len(face_gallery),
+    }), 200 if ready else 503
+
+
+def audio_save_path(provided_name, upload_name):
+    """Path of an uploaded recording: the reserved name the client passed, or a new unique one"""
+    if provided_name:
+        # sanitize provided name
+        return os.path.join(AUDIOS_FOLDER, secure_filename(provided_name))
+    filename = secure_filename(upload_name or "upload")
+    return os.path.join(AUDIOS_FOLDER, f"{uuid.uuid4().hex}_{filename}")
+
+
 @app.route('/api/audio/upload', methods=['POST'])
 def upload_audio():
     """Upload recorded audio file and save to audios folder"""
@@ -312,14 +952,7 @@ def upload_audio():
 
         # Allow client to provide a reserved filename to overwrite
         provided_name = request.form.get('filename') or request.args.get('filename')
-        if provided_name:
-            # sanitize provided name
-            filename = secure_filename(provided_name)
-            save_path = os.path.join(AUDIOS_FOLDER, filename)
-        else:
-            filename = secure_filename(file.filename or "upload")
-            unique_name = f"{uuid.uuid4().hex}_{filename}"
-            save_path = os.path.join(AUDIOS_FOLDER, unique_name)
+        save_path = audio_save_path(provided_name, file.filename)
 
         file.save(save_path)
         # return the saved filename (basename)
@@ -347,6 +980,84 @@ def reserve_audio():
         return jsonify({'error': str(e), 'success': False}), 500
 
 
+def chunk_error(e):
+    """Response for a failed chunked-upload call; conflicts carry the offset to resume from"""
+    if isinstance(e, UploadNotFoundError):
+        return {'error': str(e), 'success': False}, 404
+    if isinstance(e, UploadConflictError):
+        return {'error': str(e), 'success': False, 'offset': e.offset}, 409
+    if isinstance(e, UploadTooLargeError):
+        return {'error': str(e), 'success': False}, 413
+    if isinstance(e, ChecksumMismatchError):
+        return {'error': str(e), 'success': False, 'offset': 0}, 422
+    if isinstance(e, ValueError):
+        return {'error': str(e), 'success': False}, 400
+    return {'error': str(e), 'success': False}, 500
+
+
+def finalize_fields(data):
+    """(size, sha256) of a finalize request body; both are required"""
+    data = data if isinstance(data, dict) else {}
+    try:
+        size = int(data['size'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Finalize needs the total size in bytes') from None
+    sha256 = data.get('sha256')
+    if not (isinstance(sha256, str) and len(sha256) == 64
+            and all(c in '0123456789abcdefABCDEF' for c in sha256)):
+        raise ValueError('Finalize needs the SHA-256 of the file as 64 hex digits')
+    return size, sha256
+
+
+@app.route('/api/audio/chunks/<filename>', methods=['GET'])
+def audio_upload_status(filename):
+    """Bytes of a reserved recording received so far; the client resumes from there"""
+    try:
+        name = secure_filename(filename)
+        return jsonify({'success': True, 'filename': name, 'offset': audio_uploads.offset(name)}), 200
+    except Exception as e:
+        body, status = chunk_error(e)
+        return jsonify(body), status
+
+
+@app.route('/api/audio/chunks/<filename>', methods=['PUT'])
+def upload_audio_chunk(filename):
+    """
+    Append the raw request body to a reserved recording. ?offset= must equal
+    the bytes received so far; otherwise 409 returns the offset to resume from.
+    The body is streamed to disk, never held in memory as a whole.
+    """
+    try:
+        offset = int(request.args['offset'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'offset must be the number of bytes already sent', 'success': False}), 400
+    try:
+        name = secure_filename(filename)
+        audio_uploads.check_size(offset + (request.content_length or 0))
+        offset = audio_uploads.append(name, offset, request.stream.read)
+        return jsonify({'success': True, 'filename': name, 'offset': offset}), 200
+    except Exception as e:
+        body, status = chunk_error(e)
+        return jsonify(body), status
+
+
+@app.route('/api/audio/chunks/<filename>/finalize', methods=['POST'])
+def finalize_audio_upload(filename):
+    """
+    Complete a chunked recording with JSON {size, sha256}: the received bytes
+    are checked against both before the file replaces its placeholder. A
+    checksum mismatch discards them (422, offset 0) so the client starts over.
+    """
+    try:
+        name = secure_filename(filename)
+        size, sha256 = finalize_fields(request.get_json(silent=True))
+        size = audio_uploads.finalize(name, size, sha256)
+        return jsonify({'success': True, 'filename': name, 'size': size}), 200
+    except Exception as e:
+        body, status = chunk_error(e)
+        return jsonify(body), status
+
+
 @app.route('/api/audio/list', methods=['GET'])
 def list_audios():
     """Return list of saved audio files with metadata"""
@@ -354,7 +1065,8 @@ def list_audios():
         files = []
         for fname in os.listdir(AUDIOS_FOLDER):
             full = os.path.join(AUDIOS_FOLDER, fname)
-            if os.path.isfile(full):
+            # Part files of unfinished chunked uploads are not recordings yet
+            if os.path.isfile(full) and not fname.endswith(PART_SUFFIX):
                 stat = os.stat(full)
                 files.append({
                     'filename': fname,
@@ -382,5 +1094,5 @@ def download_audio(filename):
         return jsonify({'error': str(e), 'success': False}), 500
 
 if __name__ == '__main__':
-    load_known_faces()
+    start_warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
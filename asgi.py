@@ -0,0 +1,345 @@
+"""
+BLINDGO - ASGI Server
+An async front end for the same engines, gallery and caches as app.py.
+Request bodies, uploads and WebSocket frames are read on the event loop, so
+idle or slow connections cost no thread; only the CPU work (decoding,
+OCR, currency, face encoding) runs on a bounded thread pool, and object
+detection waits on the micro-batching scheduler without holding a thread.
+
+    POST /api/ocr, /api/money/detect, /api/object/detect,
+         /api/face/recognize, /api/batch/<task>    async versions
+    POST /api/audio/upload                         streamed to disk
+    GET/PUT /api/audio/chunks/<name>, POST .../finalize
+                                                   resumable chunked uploads
+    WS   /ws/object/stream                         async WebSocket
+    everything else                                the Flask app (app.py)
+                                                   through a WSGI adapter
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000   (or: python run.py --asgi)
+
+Keep one server process, as with gunicorn.conf.py: enrollments only update
+the gallery of the process that handled them.
+
+Settings (environment):
+    BLINDGO_ASGI_CPU_THREADS  CPU jobs run at once (default 2 x cores, at least 4)
+    BLINDGO_ASGI_WSGI_THREADS threads for the routes served by Flask (default 10)
+
+Needs `pip install starlette uvicorn a2wsgi python-multipart`; none of them
+is required by the WSGI server.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+import anyio
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+from werkzeug.utils import secure_filename
+
+import app as blindgo
+from utils.image_decode import ImageTooLargeError, decode_base64_image, decode_image_bytes
+from utils.lazy_engine import EngineUnavailableError
+from utils.object_tracker import ObjectTracker
+from utils.stream_session import DetectionStream
+from utils.worker_pool import PoolBusyError
+
+cores = os.cpu_count() or 1
+
+# Bounds the threads CPU-bound work can occupy, however many connections are open
+cpu_limiter = anyio.CapacityLimiter(int(os.environ.get('BLINDGO_ASGI_CPU_THREADS', max(4, 2 * cores))))
+WSGI_THREADS = int(os.environ.get('BLINDGO_ASGI_WSGI_THREADS', 10))
+# Audio uploads are copied to disk in pieces of this size
+AUDIO_CHUNK_BYTES = 1 << 20
+
+
+async def offload(func, *args):
+    """Run blocking work on the CPU thread pool"""
+    return await anyio.to_thread.run_sync(func, *args, limiter=cpu_limiter)
+
+
+def error_response(e):
+    """The status codes the Flask routes use for the same errors"""
+    if isinstance(e, ImageTooLargeError):
+        return JSONResponse({'error': str(e), 'success': False}, 413)
+    if isinstance(e, PoolBusyError):
+        return JSONResponse({'error': str(e), 'success': False}, 503, headers={'Retry-After': '1'})
+    if isinstance(e, EngineUnavailableError):
+        return JSONResponse({'error': str(e), 'success': False}, 503)
+    return JSONResponse({'error': str(e), 'success': False}, 500)
+
+
+def subsystem_disabled(subsystem):
+    return JSONResponse({'error': f'{subsystem} is disabled on this server', 'success': False}, 503)
+
+
+def mimetype(request):
+    return request.headers.get('content-type', '').split(';')[0].strip().lower()
+
+
+async def read_image_payload(request, field='image'):
+    """
+    Read the image of a vision request the way app.read_request_image does
+    (raw body, multipart part or base64 JSON), without decoding it
+    Returns: (decoder, payload) or None when the request carries no image
+    """
+    kind = mimetype(request)
+    if kind.startswith('image/') or kind == 'application/octet-stream':
+        body = await request.body()
+        return (decode_image_bytes, body) if body else None
+
+    if kind in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+        form = await request.form()
+        value = form.get(field)
+        if isinstance(value, str):
+            return (decode_base64_image, value) if value else None
+        if value is None:
+            return None
+        data = await value.read()
+        return (decode_image_bytes, data) if data else None
+
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    value = data.get(field) if isinstance(data, dict) else None
+    return (decode_base64_image, value) if value else None
+
+
+def vision_endpoint(task, respond):
+    """
+    Async route for one vision task: the image is read on the event loop,
+    then decoded and processed by respond(decoded) -> (dict, status) on the
+    CPU pool
+    """
+    async def endpoint(request):
+        if task in blindgo.DISABLED:
+            return subsystem_disabled(task)
+        try:
+            payload = await read_image_payload(request)
+            if payload is None:
+                return JSONResponse({'error': 'No image data provided', 'success': False}, 400)
+            decoder, data = payload
+
+            def run():
+                return respond(decoder(data, blindgo.MAX_IMAGE_PIXELS, task))
+
+            body, status = await offload(run)
+            return JSONResponse(body, status)
+        except Exception as e:
+            return error_response(e)
+
+    return endpoint
+
+
+def respond_ocr(decoded):
+    return blindgo.ocr_image(decoded), 200
+
+
+def respond_money(decoded):
+    return blindgo.detect_money(decoded), 200
+
+
+def respond_face(decoded):
+    result, _ = blindgo.recognize_faces([decoded])[0]
+    return result, 400 if 'error' in result else 200
+
+
+async def detect_objects(request):
+    """/api/object/detect; waits for the batched forward pass on the event loop"""
+    if 'object' in blindgo.DISABLED:
+        return subsystem_disabled('object')
+    try:
+        payload = await read_image_payload(request)
+        if payload is None:
+            return JSONResponse({'error': 'No image data provided', 'success': False}, 400)
+        decoder, data = payload
+
+        def prepare():
+            image, scale = decoder(data, blindgo.MAX_IMAGE_PIXELS, 'object').for_engine('object')
+            cache = blindgo.result_caches.get('object')
+            key, phash = cache.keys_for(image) if cache else (None, None)
+            cached = cache.get(key, phash) if cache else None
+            # The first call may load the detector, so it stays off the event loop too
+            return image, scale, key, phash, cached, blindgo.object_scheduler()
+
+        image, scale, key, phash, result, scheduler = await offload(prepare)
+        if result is None:
+            result = await asyncio.wrap_future(scheduler.submit(image))
+            cache = blindgo.result_caches.get('object')
+            if cache:
+                cache.put(key, result, phash)
+        return JSONResponse(blindgo.scale_detections(result, scale))
+    except Exception as e:
+        return error_response(e)
+
+
+async def batch_detect(request):
+    """/api/batch/<task>: payloads are read here, decoded and run on the CPU pool"""
+    task = request.path_params['task']
+    if task not in blindgo.BATCH_TASKS:
+        return JSONResponse({'error': f'Unknown batch task: {task}', 'success': False}, 404)
+    if task in blindgo.DISABLED:
+        return subsystem_disabled(task)
+    try:
+        start = time.perf_counter()
+        if mimetype(request) == 'multipart/form-data':
+            form = await request.form()
+            payloads = [await upload.read() for upload in form.getlist('images') if not isinstance(upload, str)]
+            decoder = decode_image_bytes
+        else:
+            try:
+                data = await request.json()
+            except ValueError:
+                data = {}
+            payloads = (data.get('images') if isinstance(data, dict) else None) or []
+            decoder = decode_base64_image
+
+        body, status = await offload(blindgo.run_batch, task, payloads, decoder, start)
+        return JSONResponse(body, status)
+    except Exception as e:
+        return error_response(e)
+
+
+async def upload_audio(request):
+    """/api/audio/upload: the recording is copied to disk in pieces, off the event loop"""
+    try:
+        form = await request.form()
+        upload = form.get('file')
+        if upload is None or isinstance(upload, str):
+            return JSONResponse({'error': 'No file part in request'}, 400)
+        if upload.filename == '':
+            return JSONResponse({'error': 'No selected file'}, 400)
+
+        provided_name = form.get('filename') or request.query_params.get('filename')
+        save_path = blindgo.audio_save_path(provided_name, upload.filename)
+
+        # python-multipart has spooled the part; move it without blocking the loop
+        async with await anyio.open_file(save_path, 'wb') as target:
+            while chunk := await upload.read(AUDIO_CHUNK_BYTES):
+                await target.write(chunk)
+
+        return JSONResponse({'success': True, 'filename': os.path.basename(save_path)})
+    except Exception as e:
+        return JSONResponse({'error': str(e), 'success': False}, 500)
+
+
+async def audio_upload_status(request):
+    """GET /api/audio/chunks/<name>: bytes received so far"""
+    try:
+        name = secure_filename(request.path_params['filename'])
+        offset = await anyio.to_thread.run_sync(blindgo.audio_uploads.offset, name)
+        return JSONResponse({'success': True, 'filename': name, 'offset': offset})
+    except Exception as e:
+        return JSONResponse(*blindgo.chunk_error(e))
+
+
+async def upload_audio_chunk(request):
+    """
+    PUT /api/audio/chunks/<name>?offset=N: the body is appended as it arrives,
+    each piece written off the event loop
+    """
+    try:
+        offset = int(request.query_params['offset'])
+    except (KeyError, ValueError):
+        return JSONResponse({'error': 'offset must be the number of bytes already sent', 'success': False}, 400)
+    try:
+        name = secure_filename(request.path_params['filename'])
+        uploads = blindgo.audio_uploads
+        uploads.check_size(offset + int(request.headers.get('content-length') or 0))
+        # Holds the upload for this chunk; appending() never blocks, a busy upload is refused
+        with uploads.appending(name, offset) as part:
+            async with await anyio.open_file(part, 'ab') as target:
+                async for piece in request.stream():
+                    offset += len(piece)
+                    uploads.check_size(offset)
+                    await target.write(piece)
+        return JSONResponse({'success': True, 'filename': name, 'offset': offset})
+    except Exception as e:
+        return JSONResponse(*blindgo.chunk_error(e))
+
+
+async def finalize_audio_upload(request):
+    """POST /api/audio/chunks/<name>/finalize: the checksum is computed on the CPU pool"""
+    try:
+        name = secure_filename(request.path_params['filename'])
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        size, sha256 = blindgo.finalize_fields(data)
+        size = await offload(blindgo.audio_uploads.finalize, name, size, sha256)
+        return JSONResponse({'success': True, 'filename': name, 'size': size})
+    except Exception as e:
+        return JSONResponse(*blindgo.chunk_error(e))
+
+
+async def object_stream(websocket):
+    """/ws/object/stream with the same protocol as the flask-sock route"""
+    await websocket.accept()
+    if 'object' in blindgo.DISABLED:
+        await websocket.send_text(json.dumps({'type': 'error', 'error': 'object is disabled on this server',
+                                              'success': False}))
+        await websocket.close()
+        return
+    try:
+        scheduler = await offload(blindgo.object_scheduler)
+    except EngineUnavailableError as e:
+        await websocket.send_text(json.dumps({'type': 'error', 'error': str(e), 'success': False}))
+        await websocket.close()
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def send(message):
+        # Called on the session's worker thread; a send that cannot finish closes the session
+        asyncio.run_coroutine_threadsafe(websocket.send_text(json.dumps(message)), loop).result(timeout=30)
+
+    tracker = ObjectTracker(scheduler.run, detect_every=blindgo.TRACK_DETECT_EVERY)
+    stream = DetectionStream(lambda frame_bytes: blindgo.track_object_frame(tracker, frame_bytes), send)
+    try:
+        while not stream.closed:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            # Text messages are reserved for control; only binary frames are detected
+            if message.get('bytes') is not None:
+                stream.submit(message['bytes'])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream.close()
+        metrics = stream.metrics()
+        print(f"📡 Object stream closed: {metrics['processed']}/{metrics['received']} frames, "
+              f"{tracker.detections_run} detector passes, {metrics['fps']} fps, {metrics['latency_ms']} ms latency")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    blindgo.start_warm_up()
+    yield
+    blindgo.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/ocr', vision_endpoint('ocr', respond_ocr), methods=['POST']),
+        Route('/api/money/detect', vision_endpoint('money', respond_money), methods=['POST']),
+        Route('/api/face/recognize', vision_endpoint('face', respond_face), methods=['POST']),
+        Route('/api/object/detect', detect_objects, methods=['POST']),
+        Route('/api/batch/{task}', batch_detect, methods=['POST']),
+        Route('/api/audio/upload', upload_audio, methods=['POST']),
+        Route('/api/audio/chunks/{filename}', audio_upload_status, methods=['GET']),
+        Route('/api/audio/chunks/{filename}', upload_audio_chunk, methods=['PUT']),
+        Route('/api/audio/chunks/{filename}/finalize', finalize_audio_upload, methods=['POST']),
+        WebSocketRoute('/ws/object/stream', object_stream),
+        Mount('/', WSGIMiddleware(blindgo.app, workers=WSGI_THREADS)),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,169 @@
+"""
+BLINDGO - Async Server Load Test
+Compares the threaded gunicorn server (gunicorn.conf.py, app:app) with the
+async front end (uvicorn, asgi:app) while many clients are slow: each slow
+client starts an audio upload and trickles its body a few bytes at a time,
+like a phone on a poor link. Meanwhile fast clients hit a cheap route, and
+the test reports their throughput, p50/p99 latency and failures.
+
+A threaded server reads request bodies on its request threads, so once the
+slow uploads outnumber the threads, everyone else waits; the async server
+reads them on the event loop.
+
+Every server runs in a scratch directory with its engines disabled and no
+warm-up, so only the serving layer is measured and the repo's data is left
+alone. Needs gunicorn, and uvicorn + the packages listed in asgi.py.
+
+Usage:
+    python benchmarks/bench_async_load.py --slow 0 50 500 --clients 20 --requests 20
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'gunicorn': lambda bind: [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'), 'app:app'],
+    'asgi': lambda bind: [sys.executable, '-m', 'uvicorn', 'asgi:app', '--no-access-log',
+                          '--host', bind[0], '--port', str(bind[1])],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def request(port, path, timeout):
+    """One GET on a fresh connection; returns the status code"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def slow_upload(port, stop, trickle_s):
+    """Start a large multipart upload and send one byte every trickle_s until stopped"""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        return
+    try:
+        writer.write(b'POST /api/audio/upload HTTP/1.1\r\nHost: localhost\r\n'
+                     b'Content-Type: multipart/form-data; boundary=blindgo\r\n'
+                     b'Content-Length: 10000000\r\n\r\n--blindgo\r\n')
+        await writer.drain()
+        while not stop.is_set():
+            await asyncio.sleep(trickle_s)
+            writer.write(b'x')
+            await writer.drain()
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+
+async def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if await request(port, '/api/faces', 2) == 200:
+                return True
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            pass
+        await asyncio.sleep(0.2)
+    return False
+
+
+async def load(port, args, slow):
+    stop = asyncio.Event()
+    slow_tasks = [asyncio.create_task(slow_upload(port, stop, args.trickle)) for _ in range(slow)]
+    await asyncio.sleep(1)    # let the slow uploads occupy the server
+
+    latencies, failures = [], 0
+
+    async def client():
+        nonlocal failures
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            try:
+                status = await request(port, args.path, args.timeout)
+                if status != 200:
+                    failures += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await asyncio.gather(*slow_tasks, return_exceptions=True)
+    return len(latencies) / elapsed, np.array(latencies), failures
+
+
+def run_server(name, args):
+    port = free_port()
+    scratch = tempfile.mkdtemp(prefix='blindgo-load-')
+    env = dict(os.environ, BLINDGO_BIND=f'127.0.0.1:{port}', BLINDGO_WARM_UP='0',
+               BLINDGO_DISABLE='object,ocr,money,face', BLINDGO_WEB_THREADS=str(args.threads),
+               BLINDGO_ASGI_WSGI_THREADS=str(args.threads),
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    process = subprocess.Popen(SERVERS[name](('127.0.0.1', port)), cwd=scratch, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not asyncio.run(wait_until_up(port)):
+            print(f"{name:>9}  did not start")
+            return
+        for slow in args.slow:
+            throughput, latencies, failures = asyncio.run(load(port, args, slow))
+            p50 = f"{np.percentile(latencies, 50):>8.1f}" if len(latencies) else f"{'-':>8}"
+            p99 = f"{np.percentile(latencies, 99):>8.1f}" if len(latencies) else f"{'-':>8}"
+            print(f"{name:>9} {slow:>6} {throughput:>8.1f} {p50} {p99} {failures:>7}")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the threaded and async servers under slow clients')
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--slow', type=int, nargs='+', default=[0, 50, 500], help='slow uploads held open')
+    parser.add_argument('--clients', type=int, default=20, help='concurrent fast clients')
+    parser.add_argument('--requests', type=int, default=20, help='requests per fast client')
+    parser.add_argument('--path', default='/api/faces', help='route the fast clients call')
+    parser.add_argument('--threads', type=int, default=8, help='request threads of either server')
+    parser.add_argument('--trickle', type=float, default=1.0, help='seconds between slow-client bytes')
+    parser.add_argument('--timeout', type=float, default=10.0, help='fast request timeout in seconds')
+    args = parser.parse_args()
+
+    print(f"{'server':>9} {'slow':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    print("-" * 52)
+    for name in args.servers:
+        run_server(name, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+BLINDGO - Currency Feature Benchmark
+Times the colour and edge features of INRCurrencyDetector: the original
+per-denomination matchers (7 inRange passes, separate HSV conversions and
+Canny maps) against the shared extract_features() pass with lookup-table
+scoring. It also checks that the results did not regress:
+
+- exact:     LUT scoring on the full-resolution HSV image must equal the
+             original inRange scoring, match for match
+- agreement: how often the downsampled features pick the same top colour
+             match and dominant-colour denomination as the original
+
+Exits with status 1 if the exact check fails.
+
+Usage:
+    python benchmarks/bench_currency_features.py --images notes/*.jpg --iterations 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.currency_detector import INRCurrencyDetector
+
+
+def legacy_match_color(detector, hsv_image):
+    """match_color_to_denomination as it was: one inRange pass per denomination"""
+    matches = []
+    for denomination, color_range in detector.color_ranges.items():
+        mask = cv2.inRange(hsv_image, color_range['lower'], color_range['upper'])
+        match_percentage = (np.sum(mask > 0) / mask.size) * 100
+        if match_percentage > 2:
+            matches.append((denomination, match_percentage))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
+def legacy_dominant_color(detector, image):
+    """detect_dominant_color_advanced as it was: resize, HSV, boolean-mask mean"""
+    hsv = cv2.cvtColor(cv2.resize(image, (150, 150)), cv2.COLOR_BGR2HSV)
+    pixels = hsv.reshape(-1, 3)
+    pixels = pixels[(pixels[:, 2] > 30) & (pixels[:, 2] < 230)]
+    if len(pixels) == 0:
+        return None
+    avg_hue, avg_saturation = np.mean(pixels[:, 0]), np.mean(pixels[:, 1])
+    best_match, best_confidence = None, 0
+    for denom, color_info in detector.color_ranges.items():
+        lower, upper = color_info['lower'], color_info['upper']
+        if lower[0] <= avg_hue <= upper[0] and lower[1] <= avg_saturation <= upper[1]:
+            hue_distance = abs(avg_hue - (lower[0] + upper[0]) / 2) / ((upper[0] - lower[0]) / 2)
+            confidence = max(0, (1 - hue_distance) * 100)
+            if confidence > best_confidence:
+                best_match, best_confidence = denom, confidence
+    return best_match
+
+
+def legacy_features(detector, image):
+    """The colour/edge work the original detect() did per frame"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    contours, _ = cv2.findContours(cv2.Canny(gray, 50, 150), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if contours:
+        cv2.boundingRect(max(contours, key=cv2.contourArea))
+    dominant = legacy_dominant_color(detector, image)
+    matches = legacy_match_color(detector, cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+    edges = cv2.Canny(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 50, 150)
+    np.sum(edges) / edges.size
+    return matches, dominant
+
+
+def shared_features(detector, image):
+    """The same work through extract_features()"""
+    features = detector.extract_features(image)
+    detector.find_note_bounds(image, features['edges'])
+    dominant, _ = detector.detect_dominant_color_advanced(image, features)
+    matches = detector.match_color_to_denomination(features['hsv'])
+    detector.detect_edge_patterns(image, features['edges'])
+    return matches, dominant
+
+
+def synthetic_notes(detector, width=800, height=600):
+    """One noisy, textured frame per denomination colour, with a dark background"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for color in detector.color_ranges.values():
+        center = ((color['lower'].astype(int) + color['upper'].astype(int)) // 2).astype(np.uint8)
+        hsv = np.empty((height, width, 3), dtype=np.uint8)
+        hsv[:] = center
+        noise = rng.integers(-12, 13, size=hsv.shape)
+        hsv = np.clip(hsv.astype(int) + noise, 0, 255).astype(np.uint8)
+        hsv[:, :, 0] = np.minimum(hsv[:, :, 0], 179)
+        frame = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        frame[:60] = frame[-60:] = 20
+        cv2.putText(frame, '500', (480, 520), cv2.FONT_HERSHEY_SIMPLEX, 4, (30, 30, 30), 8)
+        frames.append(frame)
+    return frames
+
+
+def load_images(paths, max_side=800):
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"skipping unreadable {path}")
+            continue
+        # detect() works on the preprocessed image, at most 800 px wide
+        if frame.shape[1] > max_side:
+            factor = max_side / frame.shape[1]
+            frame = cv2.resize(frame, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        frames.append(frame)
+    return frames
+
+
+def time_per_frame(func, detector, frames, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for frame in frames:
+            func(detector, frame)
+    return (time.perf_counter() - start) * 1000 / (iterations * len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark currency colour/edge features')
+    parser.add_argument('--images', nargs='*', help='note photos (defaults to synthetic frames)')
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    detector = INRCurrencyDetector(ocr=object())    # OCR is not exercised here
+    frames = load_images(args.images) if args.images else synthetic_notes(detector)
+    if not frames:
+        sys.exit('No images to benchmark')
+
+    exact_failures = 0
+    top_agree = dominant_agree = 0
+    max_diff = 0.0
+    for frame in frames:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        legacy = legacy_match_color(detector, hsv)
+        if detector.match_color_to_denomination(hsv) != legacy:
+            exact_failures += 1
+
+        matches, dominant = shared_features(detector, frame)
+        top_agree += (matches[:1] or [(None,)])[0][0] == (legacy[:1] or [(None,)])[0][0]
+        dominant_agree += dominant == legacy_dominant_color(detector, frame)
+        legacy_pct, shared_pct = dict(legacy), dict(matches)
+        for denomination in set(legacy_pct) | set(shared_pct):
+            max_diff = max(max_diff, abs(legacy_pct.get(denomination, 0) - shared_pct.get(denomination, 0)))
+
+    legacy_ms = time_per_frame(legacy_features, detector, frames, args.iterations)
+    shared_ms = time_per_frame(shared_features, detector, frames, args.iterations)
+
+    print(f"frames: {len(frames)} at {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'original features':>22} {legacy_ms:>8.2f} ms/frame")
+    print(f"{'shared features':>22} {shared_ms:>8.2f} ms/frame  ({legacy_ms / shared_ms:.1f}x)")
+    print(f"{'exact LUT scoring':>22} {len(frames) - exact_failures}/{len(frames)} identical")
+    print(f"{'top colour match':>22} {top_agree}/{len(frames)} agree (max coverage diff {max_diff:.2f} pts)")
+    print(f"{'dominant colour':>22} {dominant_agree}/{len(frames)} agree")
+
+    if exact_failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
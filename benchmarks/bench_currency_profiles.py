@@ -0,0 +1,102 @@
+"""
+BLINDGO - Currency Preprocessing Profile Benchmark
+Runs a set of note photos through INRCurrencyDetector.detect with every
+preprocessing profile (fast, balanced, quality) and with 'auto', and
+reports preprocessing and end-to-end latency plus accuracy. For 'auto' it
+also shows which profiles were picked.
+
+Photos are labelled by the first valid denomination in their file name or
+parent folder (500_front.jpg, notes/2000/img1.jpg). Without --images a
+synthetic set at several noise and blur levels is used; it is only good
+for latency and profile selection, because the numerals are not real notes.
+
+Usage:
+    python benchmarks/bench_currency_profiles.py --images notes/*/*.jpg
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.currency_detector import PREPROCESS_PROFILES, VALID_DENOMINATIONS, INRCurrencyDetector
+
+
+def label_for(path):
+    for part in (os.path.basename(path), os.path.basename(os.path.dirname(path))):
+        for number in re.findall(r'\d+', part):
+            if int(number) in VALID_DENOMINATIONS:
+                return int(number)
+    return None
+
+
+def load_images(paths):
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"skipping unreadable {path}")
+            continue
+        frames.append((os.path.basename(path), frame, label_for(path)))
+    return frames
+
+
+def synthetic_frames():
+    """A grey note with a numeral, clean, with two noise levels and blurred"""
+    rng = np.random.default_rng(0)
+    base = np.full((900, 1200, 3), 35, dtype=np.uint8)
+    cv2.rectangle(base, (150, 220), (1050, 640), (125, 120, 118), -1)
+    cv2.putText(base, '500', (800, 600), cv2.FONT_HERSHEY_SIMPLEX, 3, (20, 20, 20), 8)
+
+    frames = [('clean', base, 500)]
+    for sigma in (6, 14):
+        noisy = np.clip(base + rng.normal(0, sigma, base.shape), 0, 255).astype(np.uint8)
+        frames.append((f'noise-{sigma}', noisy, 500))
+    frames.append(('blurred', cv2.GaussianBlur(base, (15, 15), 0), 500))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark currency preprocessing profiles')
+    parser.add_argument('--images', nargs='*', help='labelled note photos (defaults to a synthetic set)')
+    parser.add_argument('--profiles', nargs='+', default=list(PREPROCESS_PROFILES) + ['auto'])
+    args = parser.parse_args()
+
+    frames = load_images(args.images) if args.images else synthetic_frames()
+    if not frames:
+        sys.exit('No images to benchmark')
+    labelled = sum(1 for _, _, label in frames if label is not None)
+
+    print(f"frames: {len(frames)} ({labelled} labelled)")
+    print(f"{'profile':>9} {'prep p50':>9} {'prep max':>9} {'total p50':>10} {'accuracy':>9}  chosen")
+    print("-" * 72)
+
+    for profile in args.profiles:
+        detector = INRCurrencyDetector(preprocess_profile=profile)
+        detector.detect(frames[0][1])    # warm-up
+
+        preprocess_ms, total_ms = [], []
+        correct = 0
+        chosen = Counter()
+        for _, frame, label in frames:
+            result = detector.detect(frame)
+            timings = result['stage_timing_ms']
+            preprocess_ms.append(timings.get('preprocess', 0) + timings.get('profile', 0))
+            total_ms.append(timings['total'])
+            chosen[result.get('preprocess_profile', profile)] += 1
+            correct += label is not None and result.get('denomination') == label
+
+        accuracy = f"{correct / labelled * 100:>8.0f}%" if labelled else f"{'-':>9}"
+        picks = ', '.join(f'{name}={count}' for name, count in chosen.most_common()) if profile == 'auto' else ''
+        print(f"{profile:>9} {np.percentile(preprocess_ms, 50):>9.1f} {max(preprocess_ms):>9.1f} "
+              f"{np.percentile(total_ms, 50):>10.1f} {accuracy}  {picks}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+BLINDGO - Face Detector Benchmark
+Times every face detection tier of utils/face_detector.py (and any extra
+detector/size pairs) on the same photos, and compares what each finds with
+the original detector: dlib HOG on the full-resolution frame. Recall is the
+share of reference faces a configuration finds (IoU >= 0.5).
+
+Photos are shrunk to the face engine's working size (1024 px) first, as the
+app does. Without --images one synthetic frame is used, which has no faces
+and is only good for latency.
+
+Usage:
+    python benchmarks/bench_face_detectors.py --images group/*.jpg --extra hog:480 yunet:640
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.face_detector import FACE_DETECTION_TIERS, FACE_DETECTORS, downscale, largest_faces
+from utils.image_decode import ENGINE_PROFILES
+
+
+def load_frames(paths):
+    side = ENGINE_PROFILES['face'][1]
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"skipping unreadable {path}")
+            continue
+        frames.append(cv2.cvtColor(downscale(frame, side)[0], cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def synthetic_frames():
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 255, size=(768, 1024, 3), dtype=np.uint8)
+    return [cv2.GaussianBlur(noise, (7, 7), 0)]
+
+
+def iou(a, b):
+    top, right = max(a[0], b[0]), min(a[1], b[1])
+    bottom, left = min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, bottom - top) * max(0, right - left)
+    area = lambda box: (box[2] - box[0]) * (box[1] - box[3])
+    union = area(a) + area(b) - inter
+    return inter / union if union else 0.0
+
+
+def matched(reference, found, threshold=0.5):
+    """Reference boxes with a found box overlapping them by at least `threshold`"""
+    return sum(1 for box in reference if any(iou(box, other) >= threshold for other in found))
+
+
+def run(detector, frames, max_faces):
+    latencies, locations = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        boxes = largest_faces(detector.detect(frame), max_faces)
+        latencies.append((time.perf_counter() - start) * 1000)
+        locations.append(boxes)
+    return np.array(latencies), locations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark face detection tiers')
+    parser.add_argument('--images', nargs='*', help='photos with faces (defaults to a synthetic frame)')
+    parser.add_argument('--extra', nargs='*', default=[], help='more detector:side pairs, e.g. hog:480')
+    parser.add_argument('--max-faces', type=int, default=0, help='keep only the N largest faces (0 = all)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.images) if args.images else synthetic_frames()
+    if not frames:
+        sys.exit('No images to benchmark')
+    frames = frames * args.repeat
+
+    configs = [('reference', 'hog', 0)]
+    configs += [(tier, name, side) for tier, (name, side) in FACE_DETECTION_TIERS.items()]
+    for pair in args.extra:
+        name, _, side = pair.partition(':')
+        configs.append(('-', name, int(side or 0)))
+
+    print(f"frames: {len(frames) // args.repeat} x {args.repeat}")
+    print(f"{'tier':>10} {'detector':>9} {'side':>5} {'p50 ms':>8} {'p99 ms':>8} {'faces':>6} {'recall':>7}")
+    print("-" * 60)
+
+    reference = None
+    for tier, name, side in configs:
+        try:
+            detector = FACE_DETECTORS[name](detect_side=side)
+            detector.detect(frames[0])    # warm-up
+        except Exception as e:
+            print(f"{tier:>10} {name:>9} {side or 'full':>5}  skipped: {e}")
+            continue
+
+        latencies, locations = run(detector, frames, args.max_faces)
+        faces = sum(len(boxes) for boxes in locations)
+        if tier == 'reference':
+            reference = locations
+        recall = '-'
+        if reference is not None:
+            expected = sum(len(boxes) for boxes in reference)
+            if expected:
+                recall = f"{sum(matched(r, f) for r, f in zip(reference, locations)) / expected * 100:.0f}%"
+
+        print(f"{tier:>10} {name:>9} {side or 'full':>5} {np.percentile(latencies, 50):>8.1f} "
+              f"{np.percentile(latencies, 99):>8.1f} {faces:>6} {recall:>7}")
+
+
+if __name__ == '__main__':
+    main()
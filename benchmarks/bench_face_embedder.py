@@ -0,0 +1,96 @@
+"""
+BLINDGO - Face Embedder Benchmark
+Encodes the faces of a set of photos the original way (face_recognition
+.face_encodings per frame) and through FaceEmbedder with every landmark
+model / num_jitters / threads combination asked for, all on the same face
+boxes, and reports ms per frame and per face plus the largest distance from
+the original encodings (0 for the same settings; jitter and the 68-point
+model move encodings slightly).
+
+Usage:
+    python benchmarks/bench_face_embedder.py --images group/*.jpg --jitters 1 5 --threads 1 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.face_detector import downscale
+from utils.face_embedder import LANDMARK_MODELS, FaceEmbedder
+from utils.image_decode import ENGINE_PROFILES
+
+
+class FixedBoxes:
+    """Detector stand-in that returns precomputed boxes, so only encoding is timed"""
+    def __init__(self, frames, boxes):
+        self.boxes = {id(frame): frame_boxes for frame, frame_boxes in zip(frames, boxes)}
+
+    def detect(self, rgb_image):
+        return self.boxes[id(rgb_image)]
+
+
+def load_frames(paths):
+    side = ENGINE_PROFILES['face'][1]
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"skipping unreadable {path}")
+            continue
+        frames.append(np.ascontiguousarray(cv2.cvtColor(downscale(frame, side)[0], cv2.COLOR_BGR2RGB)))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched face encoding')
+    parser.add_argument('--images', nargs='+', required=True, help='photos with faces')
+    parser.add_argument('--landmarks', nargs='+', default=list(LANDMARK_MODELS), choices=LANDMARK_MODELS)
+    parser.add_argument('--jitters', type=int, nargs='+', default=[1])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import face_recognition
+
+    frames = load_frames(args.images)
+    boxes = [face_recognition.face_locations(frame) for frame in frames]
+    faces = sum(len(frame_boxes) for frame_boxes in boxes)
+    if not faces:
+        sys.exit('No faces found in the images')
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        reference = [face_recognition.face_encodings(frame, frame_boxes) for frame, frame_boxes in zip(frames, boxes)]
+    baseline_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    print(f"frames: {len(frames)}, faces: {faces}")
+    print(f"{'config':>24} {'ms/frame':>9} {'ms/face':>8} {'speedup':>8} {'max dist':>9}")
+    print("-" * 64)
+    print(f"{'face_encodings':>24} {baseline_ms / len(frames):>9.1f} {baseline_ms / faces:>8.2f} {'1.0x':>8} {0:>9.4f}")
+
+    detector = FixedBoxes(frames, boxes)
+    for landmarks in args.landmarks:
+        for jitters in args.jitters:
+            for threads in args.threads:
+                embedder = FaceEmbedder(detector, landmarks, jitters, max_faces=0, threads=threads)
+                embedder.encode(frames[:1])    # warm-up
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    encodings, _, _, _ = embedder.encode(frames)
+                elapsed_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+                distance = max(float(np.linalg.norm(a - b))
+                               for frame, ref in zip(encodings, reference) for a, b in zip(frame, ref))
+                label = f'{landmarks}pt jit={jitters} thr={threads}'
+                print(f"{label:>24} {elapsed_ms / len(frames):>9.1f} {elapsed_ms / faces:>8.2f} "
+                      f"{baseline_ms / elapsed_ms:>7.1f}x {distance:>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+BLINDGO - Face Index Benchmark
+Compares recall and p50/p99 query latency of the IVF-PQ index against the
+exact brute-force gallery scan on synthetic 128-d face galleries
+
+Usage:
+    python benchmarks/bench_face_index.py --sizes 10000 100000 --nprobe 4 8 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.face_gallery import FaceGallery
+from utils.face_index import IVFPQIndex
+
+
+def synthetic_gallery(size, dimension=128, seed=0):
+    """
+    Random unit-ish vectors shaped like face_recognition encodings,
+    plus probes that are noisy copies of random gallery rows
+    """
+    rng = np.random.default_rng(seed)
+    gallery = rng.normal(0, 0.09, size=(size, dimension)).astype(np.float32)
+    return gallery
+
+
+def make_probes(gallery, count, noise=0.02, seed=1):
+    rng = np.random.default_rng(seed)
+    truth = rng.choice(len(gallery), size=count, replace=False)
+    probes = gallery[truth] + rng.normal(0, noise, size=(count, gallery.shape[1])).astype(np.float32)
+    return probes, truth
+
+
+def time_queries(gallery, probes):
+    latencies = []
+    answers = []
+    for probe in probes:
+        start = time.perf_counter()
+        name, _ = gallery.match(probe, tolerance=10.0)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        answers.append(name)
+    return np.array(latencies), answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark face gallery indexes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nlist', type=int, default=None, help='defaults to 4*sqrt(N), capped at 2048')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--rerank-k', type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'index':>18} {'recall@1':>9} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8}")
+    print("-" * 66)
+
+    for size in args.sizes:
+        encodings = synthetic_gallery(size)
+        probes, _ = make_probes(encodings, min(args.queries, size))
+        names = {f'person_{i}': row for i, row in enumerate(encodings)}
+
+        exact = FaceGallery()
+        exact.load_dict(names)
+        latencies, truth = time_queries(exact, probes)
+        print(f"{size:>9} {'flat':>18} {1.0:>9.3f} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f} {0.0:>8.1f}")
+
+        nlist = args.nlist or min(2048, int(4 * np.sqrt(size)))
+        for nprobe in args.nprobe:
+            index = IVFPQIndex(nlist=nlist, nprobe=nprobe, rerank_k=args.rerank_k, min_train_size=1)
+            approx = FaceGallery(index=index, auto_train=False)
+            approx.load_dict(names)
+
+            start = time.perf_counter()
+            approx.train_index()
+            build = time.perf_counter() - start
+
+            latencies, answers = time_queries(approx, probes)
+            recall = np.mean([a == t for a, t in zip(answers, truth)])
+            label = f'ivfpq/{nlist}/p{nprobe}'
+            print(f"{size:>9} {label:>18} {recall:>9.3f} {np.percentile(latencies, 50):>8.2f} "
+                  f"{np.percentile(latencies, 99):>8.2f} {build:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+BLINDGO - Inference Scheduler Benchmark
+Simulates several clients calling the object detector at once and compares
+every request thread running its own forward pass against the micro-batching
+BatchScheduler: throughput, p50/p99 latency and the batch sizes it formed
+
+Usage:
+    python benchmarks/bench_inference_scheduler.py --clients 1 4 8 16 --backend onnx
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.inference_scheduler import BatchScheduler
+from utils.object_detector import ObjectDetector
+
+
+def load_test(call, clients, requests_per_client, frame):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        mine = []
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            call(frame)
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return len(latencies) / elapsed, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark micro-batched object detection')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--requests', type=int, default=20, help='requests per client')
+    parser.add_argument('--backend', default='torch', choices=['torch', 'onnx', 'openvino'])
+    parser.add_argument('--max-batch', type=int, default=8)
+    parser.add_argument('--max-wait-ms', type=float, default=15)
+    args = parser.parse_args()
+
+    detector = ObjectDetector(backend=args.backend)
+    if not detector.model_loaded:
+        sys.exit('Object detector could not be loaded')
+
+    frame = np.random.default_rng(0).integers(0, 255, size=(480, 640, 3), dtype=np.uint8)
+    detector.detect(frame)    # warm-up
+
+    print(f"{'clients':>7} {'mode':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    print("-" * 58)
+
+    for clients in args.clients:
+        throughput, latencies = load_test(detector.detect, clients, args.requests, frame)
+        print(f"{clients:>7} {'direct':>10} {throughput:>8.1f} {np.percentile(latencies, 50):>8.1f} "
+              f"{np.percentile(latencies, 99):>8.1f} {'-':>10}")
+
+        scheduler = BatchScheduler(detector.detect_batch, args.max_batch, args.max_wait_ms, name='bench')
+        throughput, latencies = load_test(scheduler.run, clients, args.requests, frame)
+        scheduler.close()
+        print(f"{clients:>7} {'scheduled':>10} {throughput:>8.1f} {np.percentile(latencies, 50):>8.1f} "
+              f"{np.percentile(latencies, 99):>8.1f} {scheduler.stats()['avg_batch_size']:>10}")
+
+
+if __name__ == '__main__':
+    main()
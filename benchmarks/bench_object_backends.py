@@ -0,0 +1,120 @@
+"""
+BLINDGO - Object Detector Backend Benchmark
+Compares the ObjectDetector inference backends (PyTorch, ONNX Runtime,
+OpenVINO; FP32 and INT8) on load time, single-frame latency, batched
+throughput and peak resident memory. Every configuration runs in its own
+process so imports and RSS do not leak between them.
+
+Usage:
+    python benchmarks/bench_object_backends.py --image street.jpg --threads 4
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CONFIGS = ['torch', 'onnx', 'onnx-int8', 'openvino', 'openvino-int8']
+
+
+def load_frame(path):
+    if path:
+        frame = cv2.imread(path)
+        if frame is None:
+            sys.exit(f'Could not read {path}')
+        return frame
+    # Without a photo the timings are still valid, only the detections are meaningless
+    return np.random.default_rng(0).integers(0, 255, size=(480, 640, 3), dtype=np.uint8)
+
+
+def run_config(config, args):
+    """Measure one backend configuration in this process; returns a dict"""
+    backend, _, precision = config.partition('-')
+
+    start = time.perf_counter()
+    from utils.object_detector import ObjectDetector
+    detector = ObjectDetector(backend=backend, int8=precision == 'int8', threads=args.threads,
+                              cache_dir=args.cache_dir)
+    load_s = time.perf_counter() - start
+
+    if not detector.model_loaded or detector.backend_name != backend:
+        return {'config': config, 'error': 'backend unavailable'}
+
+    frame = load_frame(args.image)
+    detector.detect(frame)    # warm-up
+
+    latencies = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        result = detector.detect(frame)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = [frame] * args.batch
+    start = time.perf_counter()
+    for _ in range(max(1, args.iterations // args.batch)):
+        detector.detect_batch(batch)
+    throughput = max(1, args.iterations // args.batch) * args.batch / (time.perf_counter() - start)
+
+    return {
+        'config': config,
+        'load_s': load_s,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'throughput': throughput,
+        # ru_maxrss is in KiB on Linux
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'objects': len(result['detections']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark object detector backends')
+    parser.add_argument('--configs', nargs='+', default=CONFIGS, choices=CONFIGS)
+    parser.add_argument('--image', help='photo to detect on (defaults to random noise)')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=None, help='intra-op threads (default: all cores)')
+    parser.add_argument('--cache-dir', default=os.path.join(ROOT, 'models'))
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_config(args.worker, args)))
+        return
+
+    print(f"{'backend':>14} {'load s':>7} {'p50 ms':>8} {'p99 ms':>8} {'batch fps':>10} {'RSS MB':>8} {'objects':>8}")
+    print("-" * 70)
+
+    for config in args.configs:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', config,
+                   '--iterations', str(args.iterations), '--batch', str(args.batch),
+                   '--cache-dir', args.cache_dir]
+        if args.image:
+            command += ['--image', args.image]
+        if args.threads:
+            command += ['--threads', str(args.threads)]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        try:
+            row = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            row = {'config': config, 'error': (completed.stderr.strip().splitlines() or ['failed'])[-1]}
+
+        if 'error' in row:
+            print(f"{config:>14}  skipped: {row['error']}")
+            continue
+        print(f"{config:>14} {row['load_s']:>7.2f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+              f"{row['throughput']:>10.1f} {row['rss_mb']:>8.0f} {row['objects']:>8}")
+
+
+if __name__ == '__main__':
+    main()
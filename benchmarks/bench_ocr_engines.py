@@ -0,0 +1,99 @@
+"""
+BLINDGO - OCR Engine Benchmark
+Compares the OCR engines of utils/ocr_engine.py: pytesseract, which starts a
+tesseract process per call, against tesserocr, which keeps a pool of
+initialised Tesseract APIs (one per thread here). Reports calls per second
+and p50/p99 latency for one thread and for several threads, plus the text
+each engine read.
+
+Usage:
+    python benchmarks/bench_ocr_engines.py --image receipt.jpg --threads 1 4 --psm 6
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr_engine import OCR_ENGINES, create_ocr_engine
+
+
+def load_gray(path):
+    if path:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            sys.exit(f'Could not read {path}')
+        return image
+    # A rendered line of text, about the size of a cropped currency numeral region
+    image = np.full((120, 640), 255, dtype=np.uint8)
+    cv2.putText(image, 'Rs 500 BLINDGO 2000', (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+    return image
+
+
+def load_test(engine, image, threads, calls_per_thread, psm):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        mine = []
+        for _ in range(calls_per_thread):
+            start = time.perf_counter()
+            engine.image_to_string(image, psm=psm)
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    return len(latencies) / elapsed, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR engines')
+    parser.add_argument('--image', help='image to read (defaults to a rendered line of text)')
+    # The first engine listed is the baseline for the speedup column
+    parser.add_argument('--engines', nargs='+', default=['pytesseract', 'tesserocr'], choices=list(OCR_ENGINES))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--calls', type=int, default=20, help='calls per thread')
+    parser.add_argument('--psm', type=int, default=6)
+    args = parser.parse_args()
+
+    image = load_gray(args.image)
+
+    print(f"{'engine':>12} {'threads':>7} {'calls/s':>8} {'p50 ms':>8} {'p99 ms':>8}  text")
+    print("-" * 70)
+
+    baseline = None
+    for name in args.engines:
+        try:
+            start = time.perf_counter()
+            engine = create_ocr_engine(name, handles=max(args.threads))
+            text = engine.image_to_string(image, psm=args.psm)    # warm-up, also loads the language data
+            init_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            print(f"{name:>12}  skipped: {e}")
+            continue
+
+        for threads in args.threads:
+            throughput, latencies = load_test(engine, image, threads, args.calls, args.psm)
+            if baseline is None:
+                baseline = throughput
+            print(f"{name:>12} {threads:>7} {throughput:>8.1f} {np.percentile(latencies, 50):>8.1f} "
+                  f"{np.percentile(latencies, 99):>8.1f}  {' '.join(text.split())[:30]!r}"
+                  f"  ({throughput / baseline:.1f}x, first call {init_ms:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
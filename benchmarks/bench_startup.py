@@ -0,0 +1,99 @@
+"""
+BLINDGO - Startup Benchmark
+Measures the cold start of app.py for several BLINDGO_DISABLE settings:
+time to import the app, resident memory after import, which heavy model
+libraries the import pulled in, and (with --warm-up) the time until every
+enabled engine is warm and /api/ready would pass. Every configuration runs
+in a fresh interpreter inside a scratch directory, so nothing is cached
+between them and the repo's face store is left alone.
+
+Usage:
+    python benchmarks/bench_startup.py --warm-up
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = {
+    'full': '',
+    'no-object': 'object',
+    'no-face': 'face',
+    'audio-only': 'object,ocr,money,face',
+}
+HEAVY_MODULES = ['torch', 'ultralytics', 'onnxruntime', 'openvino', 'face_recognition', 'dlib', 'pytesseract']
+
+
+def run_config(args):
+    """Import the app in this process and measure it; returns a dict"""
+    start = time.perf_counter()
+    import app
+    import_ms = (time.perf_counter() - start) * 1000
+    row = {
+        'import_ms': import_ms,
+        # ru_maxrss is in KiB on Linux
+        'import_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'heavy': [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+    if args.warm_up:
+        start = time.perf_counter()
+        app.start_warm_up()
+        app.warmed_up.wait()
+        row['ready_ms'] = (time.perf_counter() - start) * 1000
+        row['ready_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        row['failed'] = [task for task, status in app.warm_up_status.items() if status != 'ok']
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark app.py import time and warm-up')
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--warm-up', action='store_true', help='also time the background warm-up')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per configuration (best is reported)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_config(args)))
+        return
+
+    print(f"{'config':>11} {'import ms':>10} {'RSS MB':>7} {'ready ms':>9} {'RSS MB':>7}  heavy modules imported")
+    print("-" * 80)
+
+    for config in args.configs:
+        env = dict(os.environ, BLINDGO_DISABLE=CONFIGS[config],
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        command = [sys.executable, os.path.abspath(__file__), '--worker']
+        if args.warm_up:
+            command.append('--warm-up')
+
+        rows = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as scratch:
+                completed = subprocess.run(command, cwd=scratch, env=env, capture_output=True, text=True)
+            lines = completed.stdout.strip().splitlines()
+            try:
+                rows.append(json.loads(lines[-1]))
+            except (IndexError, ValueError):
+                print(f"{config:>11}  failed: {(completed.stderr.strip().splitlines() or ['no output'])[-1]}")
+                break
+        if not rows:
+            continue
+
+        row = min(rows, key=lambda r: r['import_ms'])
+        ready = f"{row['ready_ms']:>9.0f} {row['ready_rss_mb']:>7.0f}" if args.warm_up else f"{'-':>9} {'-':>7}"
+        failed = f"  (failed: {', '.join(row['failed'])})" if row.get('failed') else ''
+        print(f"{config:>11} {row['import_ms']:>10.0f} {row['import_rss_mb']:>7.0f} {ready}  "
+              f"{', '.join(row['heavy']) or '-'}{failed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+BLINDGO - Worker Pool Benchmark
+Runs one vision task from N concurrent clients, first in-process on request
+threads and then through VisionWorkerPool with W worker processes, and
+reports throughput and p50/p99 latency for each
+
+Usage:
+    python benchmarks/bench_worker_pool.py --task money --image note.jpg --clients 4 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_decode import decode_image_bytes
+from utils.vision_tasks import load_task
+from utils.worker_pool import VisionWorkerPool
+
+
+def load_test(call, clients, requests_per_client, image):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        mine = []
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            call(image)
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return len(latencies) / (time.perf_counter() - start), np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark in-process vs worker-process vision tasks')
+    parser.add_argument('--task', default='money', choices=['ocr', 'money', 'face'])
+    parser.add_argument('--image', required=True, help='photo to run the task on')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=10, help='requests per client')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with open(args.image, 'rb') as f:
+        image, _ = decode_image_bytes(f.read(), engine=args.task).for_engine(args.task)
+    if args.task == 'face':
+        image = [image]    # the face engine takes a batch of frames
+
+    print(f"{'mode':>12} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    print("-" * 42)
+
+    handler = load_task(args.task)
+    handler(image)    # warm-up
+    throughput, latencies = load_test(handler, args.clients, args.requests, image)
+    print(f"{'in-process':>12} {throughput:>8.2f} {np.percentile(latencies, 50):>9.1f} "
+          f"{np.percentile(latencies, 99):>9.1f}")
+
+    for workers in args.workers:
+        pool = VisionWorkerPool({args.task: workers}, pending_per_worker=args.clients)
+        pool.start()
+        throughput, latencies = load_test(lambda img: pool.run(args.task, img), args.clients, args.requests, image)
+        pool.close()
+        label = f'{workers} worker' + ('s' if workers > 1 else '')
+        print(f"{label:>12} {throughput:>8.2f} {np.percentile(latencies, 50):>9.1f} "
+              f"{np.percentile(latencies, 99):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
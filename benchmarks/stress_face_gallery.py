@@ -0,0 +1,166 @@
+"""
+BLINDGO - Face Gallery Stress Test
+Runs concurrent enroll, delete, update and recognize calls against one
+FaceGallery (optionally backed by a FaceStore) and checks that the in-memory
+matrix, the id maps and the on-disk store agree afterwards
+
+Usage:
+    python benchmarks/stress_face_gallery.py --seconds 10 --threads 8 --store /tmp/face_store
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.face_gallery import FaceGallery
+from utils.face_index import IVFPQIndex
+from utils.face_store import FaceStore
+
+
+def random_encoding(rng):
+    return rng.normal(0, 0.09, size=128).astype(np.float32)
+
+
+def check_consistency(gallery):
+    """
+    Return a list of invariant violations (empty when consistent)
+    """
+    problems = []
+    size = gallery.size
+
+    if len(gallery._rows) != size:
+        problems.append(f'{len(gallery._rows)} ids mapped but {size} rows live')
+
+    for entry_id, row in gallery._rows.items():
+        if row >= size or gallery._ids[row] != entry_id:
+            problems.append(f'entry {entry_id} maps to row {row} holding {gallery._ids[row]}')
+            break
+
+    expected_sq = np.einsum('ij,ij->i', gallery.encodings, gallery.encodings)
+    if not np.allclose(expected_sq, gallery._sq_norms[:size], rtol=1e-4, atol=1e-6):
+        problems.append('cached squared norms are stale')
+
+    counted = sum(len(ids) for ids in gallery._by_name.values())
+    if counted != size:
+        problems.append(f'name map holds {counted} entries but {size} rows live')
+
+    if gallery.index is not None and gallery.index.trained and gallery.index.size != size:
+        problems.append(f'index holds {gallery.index.size} rows but gallery holds {size}')
+
+    index = gallery.index
+    if index is not None and index.trained:
+        listed = np.concatenate([index._members[l][:index._lengths[l]] for l in range(index.nlist)])
+        if not np.array_equal(np.sort(listed), np.arange(index.size)):
+            problems.append('inverted lists do not hold every index row exactly once')
+        elif not np.all(index.list_ids[listed] == np.repeat(np.arange(index.nlist), index._lengths)):
+            problems.append('a row sits in another inverted list than its list id')
+
+    if gallery.store is not None:
+        ids, names, encodings = FaceStore(gallery.store.folder).load()
+        reloaded = dict(zip(ids, zip(names, encodings)))
+        if set(reloaded) != set(gallery._rows):
+            problems.append('store and gallery disagree on live entry ids')
+        else:
+            for entry_id, row in gallery._rows.items():
+                name, encoding = reloaded[entry_id]
+                if name != gallery._names[row] or not np.array_equal(encoding, gallery._matrix[row]):
+                    problems.append(f'entry {entry_id} differs between store and gallery')
+                    break
+
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress-test concurrent face gallery access')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=8, help='recognizer threads')
+    parser.add_argument('--writers', type=int, default=2, help='threads per write operation')
+    parser.add_argument('--initial', type=int, default=2000)
+    parser.add_argument('--store', default=None, help='folder for a FaceStore (wiped first)')
+    parser.add_argument('--ivfpq', action='store_true', help='use the IVF-PQ index')
+    args = parser.parse_args()
+
+    store = None
+    if args.store:
+        shutil.rmtree(args.store, ignore_errors=True)
+        store = FaceStore(args.store, compact_min_dead=16)
+
+    index = IVFPQIndex(nlist=32, min_train_size=512) if args.ivfpq else None
+    gallery = FaceGallery(index=index, store=store)
+
+    rng = np.random.default_rng(0)
+    for i in range(args.initial):
+        gallery.add(f'person_{i}', random_encoding(rng))
+
+    stop = threading.Event()
+    counts = {'enroll': 0, 'delete': 0, 'update': 0, 'recognize': 0}
+    errors = []
+    count_lock = threading.Lock()
+
+    def worker(kind, seed):
+        local_rng = np.random.default_rng(seed)
+        done = 0
+        try:
+            while not stop.is_set():
+                if kind == 'enroll':
+                    gallery.add(f'person_{seed}_{done}', random_encoding(local_rng))
+                elif kind in ('delete', 'update'):
+                    ids = list(gallery._rows)
+                    if not ids:
+                        time.sleep(0.001)
+                        continue
+                    if kind == 'delete':
+                        gallery.delete(random.choice(ids))
+                    else:
+                        gallery.update(random.choice(ids), random_encoding(local_rng))
+                else:
+                    probes = local_rng.normal(0, 0.09, size=(4, 128))
+                    for name, distance in gallery.match(probes):
+                        if name is not None and distance is None:
+                            raise AssertionError('match returned a name without a distance')
+                done += 1
+        except Exception as e:
+            errors.append(f'{kind}: {e!r}')
+            stop.set()
+        with count_lock:
+            counts[kind] += done
+
+    threads = []
+    for kind in ('enroll', 'delete', 'update'):
+        for i in range(args.writers):
+            threads.append(threading.Thread(target=worker, args=(kind, 1000 * len(threads) + i)))
+    for i in range(args.threads):
+        threads.append(threading.Thread(target=worker, args=('recognize', 1000 * len(threads) + i)))
+
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    for kind, done in counts.items():
+        print(f"{kind:>10}: {done:>8} ops  ({done / args.seconds:,.0f}/s)")
+    print(f"{'gallery':>10}: {len(gallery)} entries, {len(gallery.people())} people")
+
+    # Let a training still running swap its index in, so that index is checked too
+    gallery.train_index()
+    problems = errors + check_consistency(gallery)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+
+    print("✅ Gallery, index and store are consistent")
+
+
+if __name__ == '__main__':
+    main()
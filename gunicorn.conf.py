@@ -0,0 +1,67 @@
+"""
+BLINDGO - Production server configuration
+Usage:
+    gunicorn -c gunicorn.conf.py app:app      (or: python run.py --production)
+
+The app and its models are imported once in the parent process and shared
+with the forked workers copy-on-write. Every worker then warms up its own
+engines in the background; GET /api/ready answers 503 until that is done.
+
+Settings (environment):
+    BLINDGO_BIND         address to listen on (default 0.0.0.0:5000)
+    BLINDGO_WEB_WORKERS  server processes (default 1, see below)
+    BLINDGO_WEB_THREADS  request threads per process (default 2 x cores, at least 4)
+    BLINDGO_WORKERS      OCR / currency / face worker processes (see app.py)
+"""
+
+import os
+
+cores = os.cpu_count() or 1
+
+bind = os.environ.get('BLINDGO_BIND', '0.0.0.0:5000')
+preload_app = True
+worker_class = 'gthread'
+
+# Enrollments update the in-memory face gallery of the process that served
+# them, so several server processes would disagree about who is enrolled.
+# Keep one process and scale CPU work through threads, the micro-batching
+# object scheduler and the BLINDGO_WORKERS engine processes instead.
+workers = int(os.environ.get('BLINDGO_WEB_WORKERS', 1))
+threads = int(os.environ.get('BLINDGO_WEB_THREADS', max(4, 2 * cores)))
+
+# Split the cores between server processes so their inference thread pools
+# do not oversubscribe the machine
+os.environ.setdefault('BLINDGO_OBJECT_THREADS', str(max(1, cores // workers)))
+os.environ.setdefault('OMP_NUM_THREADS', str(max(1, cores // workers)))
+
+# Model warm-up can make the first requests slow; live streams hold a
+# connection open, so give workers time to finish them on shutdown
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.environ.get('BLINDGO_WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+
+
+def when_ready(server):
+    import app
+    # Loaded before forking, so every worker shares the models
+    app.preload_engines()
+    if workers > 1:
+        server.log.warning('BLINDGO_WEB_WORKERS=%s: face enrollments are only '
+                           'visible to the worker that handled them', workers)
+    server.log.info('BLINDGO ready: %s worker(s) x %s thread(s) on %s', workers, threads, bind)
+
+
+def post_fork(server, worker):
+    import app
+    app.start_warm_up()
+
+
+def worker_exit(server, worker):
+    import app
+    app.shutdown()
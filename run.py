@@ -2,8 +2,13 @@
 """
 BLINDGO - Startup Script
 Simple script to launch the BLINDGO application
+
+    python run.py               development server with debug reload
+    python run.py --production  gunicorn with gunicorn.conf.py (Linux / macOS)
+    python run.py --asgi        uvicorn with the async front end in asgi.py
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -48,8 +53,41 @@ def create_directories():
             os.makedirs(directory)
             print(f"📁 Created directory: {directory}")
 
+def run_production():
+    """Replace this process with gunicorn using gunicorn.conf.py"""
+    if os.name != 'posix':
+        print("❌ gunicorn needs Linux or macOS; use the development server on Windows")
+        sys.exit(1)
+
+    print("\n🌐 Starting BLINDGO with gunicorn...")
+    config = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+    try:
+        os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', config, 'app:app'])
+    except OSError as e:
+        print(f"❌ Could not start gunicorn: {e}")
+        sys.exit(1)
+
+def run_asgi():
+    """Replace this process with uvicorn serving asgi.py on BLINDGO_BIND"""
+    host, _, port = os.environ.get('BLINDGO_BIND', '0.0.0.0:5000').rpartition(':')
+
+    print("\n🌐 Starting BLINDGO with uvicorn (async)...")
+    try:
+        os.execvp(sys.executable, [sys.executable, '-m', 'uvicorn', 'asgi:app',
+                                   '--host', host or '0.0.0.0', '--port', port])
+    except OSError as e:
+        print(f"❌ Could not start uvicorn: {e}")
+        sys.exit(1)
+
 def main():
     """Main startup function"""
+    parser = argparse.ArgumentParser(description='Launch BLINDGO')
+    parser.add_argument('--production', action='store_true',
+                        help='serve with gunicorn instead of the development server')
+    parser.add_argument('--asgi', action='store_true',
+                        help='serve the async front end (asgi.py) with uvicorn')
+    args = parser.parse_args()
+
     print("🚀 Starting BLINDGO - Assistant for Visually Impaired")
     print("=" * 60)
 
@@ -59,6 +97,11 @@ def main():
     check_tesseract()
 
     create_directories()
+
+    if args.asgi:
+        run_asgi()
+    if args.production:
+        run_production()
     
     print("\n🌐 Starting Flask application...")
     
@@ -113,6 +113,10 @@ class AudioRecorder {
         this.recordingsList.prepend(item);
     }
     async uploadBlob(blob, serverFilename = null) {
+        // Reserved recordings go up in resumable chunks; anything else in one request.
+        // Finalizing needs the file's SHA-256, so without Web Crypto (plain http)
+        // a reserved recording is sent in one request as well
+        if (serverFilename && window.crypto && crypto.subtle) return this.uploadChunked(blob, serverFilename);
         const fd = new FormData();
         const filename = serverFilename || `recording_${Date.now()}.webm`;
         fd.append('file', blob, filename);
@@ -136,6 +140,76 @@ class AudioRecorder {
         setTimeout(() => this.updateUI(), 800);
     }
 
+    // Sends the blob in CHUNK_BYTES slices. Each slice says at which byte it starts;
+    // after a failure the server's offset tells where to resume, so a dropped
+    // connection only costs the slice in flight. Finalize checks size and SHA-256.
+    async uploadChunked(blob, serverFilename) {
+        const url = `/api/audio/chunks/${encodeURIComponent(serverFilename)}`;
+        let failures = 0;
+        let finalizeAttempts = 0;
+        try {
+            let offset = await this.fetchUploadOffset(url);
+            while (true) {
+                try {
+                    while (offset < blob.size) {
+                        this.statusEl && (this.statusEl.textContent = `Uploading... ${Math.floor(100 * offset / blob.size)}%`);
+                        const res = await fetch(`${url}?offset=${offset}`, {
+                            method: 'PUT',
+                            headers: { 'Content-Type': 'application/octet-stream' },
+                            body: blob.slice(offset, offset + AudioRecorder.CHUNK_BYTES)
+                        });
+                        const data = await res.json();
+                        // 409: the server has a different offset; continue from there
+                        if (!res.ok && res.status !== 409) throw new Error(data.error || `HTTP ${res.status}`);
+                        offset = data.offset;
+                        failures = 0;
+                    }
+
+                    const res = await fetch(`${url}/finalize`, {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ size: blob.size, sha256: await this.sha256Hex(blob) })
+                    });
+                    const data = await res.json();
+                    if (res.ok && data.success) {
+                        this.statusEl && (this.statusEl.textContent = 'Saved: ' + data.filename);
+                        setTimeout(() => this.fetchServerRecordings(), 500);
+                        break;
+                    }
+                    // 409 (bytes missing) or 422 (checksum, bytes discarded): resend from the server's offset
+                    if (data.offset === undefined || ++finalizeAttempts > 2) {
+                        failures = AudioRecorder.MAX_RETRIES;
+                        throw new Error(data.error || `HTTP ${res.status}`);
+                    }
+                    offset = data.offset;
+                } catch (err) {
+                    if (++failures > AudioRecorder.MAX_RETRIES) throw err;
+                    console.warn(`Chunk upload failed, retrying (${failures})`, err);
+                    this.statusEl && (this.statusEl.textContent = 'Connection lost, retrying...');
+                    await new Promise(resolve => setTimeout(resolve, Math.min(30000, 1000 * 2 ** failures)));
+                    offset = await this.fetchUploadOffset(url).catch(() => offset);
+                }
+            }
+        } catch (err) {
+            this.statusEl && (this.statusEl.textContent = 'Upload failed');
+            console.error('Chunked upload failed', err);
+        }
+        setTimeout(() => this.updateUI(), 800);
+    }
+
+    async fetchUploadOffset(url) {
+        const res = await fetch(url);
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+        return data.offset;
+    }
+
+    // Hex SHA-256 of the blob (needs Web Crypto)
+    async sha256Hex(blob) {
+        const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+    }
+
     async uploadCurrent() {
         if (!(this.currentBlob instanceof Blob)) return;
         await this.uploadBlob(this.currentBlob);
@@ -204,6 +278,10 @@ class AudioRecorder {
     }
 }
 
+// Slice size of chunked uploads and retries of one slice before giving up
+AudioRecorder.CHUNK_BYTES = 256 * 1024;
+AudioRecorder.MAX_RETRIES = 8;
+
 // Expose globally
 window.AudioRecorder = AudioRecorder;
 window.audioRecorder = new AudioRecorder();
@@ -0,0 +1,139 @@
+"""
+Chunked Upload Module
+Resumable uploads of long recordings over flaky links. The client reserves
+a filename, sends the file as chunks that each say at which byte offset
+they start, and finalizes with the total size and a SHA-256 checksum.
+
+- Chunks are appended to `<name>.part` in the upload folder and streamed to
+  disk piece by piece, so memory use does not grow with the chunk size.
+- Every byte on disk counts as acknowledged: after a dropped connection the
+  client asks for the current offset and resumes from there. A chunk whose
+  offset is not the current size is refused with that size.
+- Finalize checks the size and the checksum, then moves the part file over
+  the reserved placeholder; a failed checksum discards the part file.
+- One chunk at a time per upload; a second concurrent one is refused.
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+PART_SUFFIX = '.part'
+
+
+class UploadNotFoundError(LookupError):
+    """Raised for a filename that was never reserved"""
+
+
+class UploadConflictError(RuntimeError):
+    """Raised when a chunk does not start at the current offset or the upload is busy"""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload would exceed the size limit"""
+
+
+class ChecksumMismatchError(ValueError):
+    """Raised by finalize when the received bytes do not match the client's checksum"""
+
+
+class ChunkedUploads:
+    def __init__(self, folder, max_bytes=200 * 1024 * 1024, piece_bytes=64 * 1024):
+        """
+        folder:      where reserved files and their part files live
+        max_bytes:   largest upload accepted
+        piece_bytes: size of the reads a chunk is copied to disk in
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.piece_bytes = piece_bytes
+        self._busy = set()
+        self._lock = threading.Lock()
+
+    def _paths(self, name):
+        path = os.path.join(self.folder, name)
+        if not os.path.isfile(path):
+            raise UploadNotFoundError(f'No reserved upload named {name}')
+        return path, path + PART_SUFFIX
+
+    def offset(self, name):
+        """Bytes received so far, i.e. where the next chunk has to start"""
+        _, part = self._paths(name)
+        return os.path.getsize(part) if os.path.exists(part) else 0
+
+    @contextmanager
+    def appending(self, name, offset):
+        """
+        Claim an upload for one chunk starting at `offset`
+        Yields: path of the part file to append the chunk to
+        """
+        _, part = self._paths(name)
+        with self._lock:
+            if name in self._busy:
+                raise UploadConflictError('Another chunk of this upload is in progress', self.offset(name))
+            current = self.offset(name)
+            if offset != current:
+                raise UploadConflictError(f'Chunk starts at {offset} but {current} bytes were received', current)
+            self._busy.add(name)
+        try:
+            yield part
+        finally:
+            with self._lock:
+                self._busy.discard(name)
+
+    def check_size(self, size):
+        if size > self.max_bytes:
+            raise UploadTooLargeError(f'Uploads are limited to {self.max_bytes // (1024 * 1024)} MB')
+
+    def append(self, name, offset, read):
+        """
+        Copy a chunk from a file-like `read(n)` callable to the end of the upload
+        Returns: the new offset
+        """
+        with self.appending(name, offset) as part:
+            with open(part, 'ab') as target:
+                while piece := read(self.piece_bytes):
+                    offset += len(piece)
+                    self.check_size(offset)
+                    target.write(piece)
+        return offset
+
+    def finalize(self, name, size, sha256):
+        """
+        Verify the received bytes against the total size and the hex SHA-256
+        the client computed, then publish the file under its reserved name
+        Returns: final size in bytes
+        """
+        path, part = self._paths(name)
+        with self._lock:
+            if name in self._busy:
+                raise UploadConflictError('A chunk of this upload is still in progress', self.offset(name))
+            self._busy.add(name)
+        try:
+            received = os.path.getsize(part) if os.path.exists(part) else 0
+            if received != size:
+                raise UploadConflictError(f'Expected {size} bytes but {received} were received', received)
+
+            digest = hashlib.sha256()
+            if os.path.exists(part):
+                with open(part, 'rb') as source:
+                    while piece := source.read(1024 * 1024):
+                        digest.update(piece)
+            if digest.hexdigest() != sha256.lower():
+                if os.path.exists(part):
+                    os.remove(part)
+                raise ChecksumMismatchError('Checksum does not match; upload the file again')
+
+            if os.path.exists(part):
+                os.replace(part, path)
+            else:
+                open(path, 'wb').close()
+            return size
+        finally:
+            with self._lock:
+                self._busy.discard(name)
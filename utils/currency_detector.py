@@ -6,12 +6,62 @@ Uses OCR to extract denomination numbers from INR notes
 import cv2
 import numpy as np
 from collections import Counter
-import pytesseract
 import re
+import time
+from utils.ocr_engine import create_ocr_engine
+
+# Valid INR denominations
+VALID_DENOMINATIONS = [10, 20, 50, 100, 200, 500, 2000]
+
+# Preprocessing profiles: working width and denoiser. 'quality' is the
+# original non-local means pass, which can take hundreds of ms on its own.
+PREPROCESS_PROFILES = {
+    'fast': {'max_width': 640, 'denoise': 'median'},
+    'balanced': {'max_width': 800, 'denoise': 'bilateral'},
+    'quality': {'max_width': 800, 'denoise': 'nlmeans'},
+}
+
+# 'auto' picks a profile from the frame: estimated noise sigma (grey levels,
+# measured at the 800 px working width) below the first threshold -> fast,
+# above the second -> quality, balanced in between. Blurry frames (variance
+# of the Laplacian below BLUR_THRESHOLD) go to fast: denoising only smears
+# them further.
+NOISE_THRESHOLDS = (2.0, 5.0)
+BLUR_THRESHOLD = 50.0
+
+# Longest side of the downsampled HSV image colour features are computed on
+FEATURE_SIZE = 200
+
+# Canonical size a detected note is warped to: landscape, about the INR aspect ratio
+NOTE_WIDTH, NOTE_HEIGHT = 640, 288
+
+# Where the denomination numerals sit on an upright note, as fractions of the
+# note (x0, y0, x1, y1). Front: large numeral bottom right, small numeral top
+# left; back: numeral top right. An upside-down note is read by turning the
+# warped note 180° and using the same regions.
+NUMERAL_REGIONS = {
+    'front_bottom_right': (0.70, 0.60, 0.98, 0.97),
+    'front_top_left': (0.02, 0.03, 0.24, 0.26),
+    'back_top_right': (0.72, 0.03, 0.98, 0.30),
+}
 
 class INRCurrencyDetector:
-    def __init__(self):
-        """Initialize INR Currency Detector with comprehensive note characteristics"""
+    def __init__(self, early_exit_confidence=80, ocr=None, preprocess_profile='auto'):
+        """
+        Initialize INR Currency Detector with comprehensive note characteristics
+
+        early_exit_confidence: detect() stops running OCR once the combined
+                               score of the denomination read reaches this
+        ocr:                   OCR engine (see utils/ocr_engine.py); defaults
+                               to tesserocr, falling back to pytesseract
+        preprocess_profile:    'fast', 'balanced', 'quality' (see
+                               PREPROCESS_PROFILES) or 'auto' to choose per frame
+        """
+        if preprocess_profile != 'auto' and preprocess_profile not in PREPROCESS_PROFILES:
+            raise ValueError(f'Unknown preprocessing profile: {preprocess_profile}')
+        self.early_exit_confidence = early_exit_confidence
+        self.preprocess_profile = preprocess_profile
+        self.ocr = ocr if ocr is not None else create_ocr_engine()
         
         # Actual dimensions of INR notes (width x height in mm)
         self.note_dimensions = {
@@ -79,14 +129,74 @@ class INRCurrencyDetector:
             2000: 2.52  # 166mm / 66mm
         }
         
-    def preprocess_image(self, image):
+        self._build_color_luts()
+        
+    def _build_color_luts(self):
+        """
+        Per-channel lookup tables for all colour ranges at once: bit i of
+        lut[value, channel] is set when that H, S or V value lies inside the
+        range of denomination i. ANDing the three lookups gives every pixel
+        a code whose bits are the denominations it matches.
+        """
+        self.color_denominations = list(self.color_ranges)
+        lut = np.zeros((256, 1, 3), dtype=np.uint8)
+        for bit, denomination in enumerate(self.color_denominations):
+            lower = self.color_ranges[denomination]['lower']
+            upper = self.color_ranges[denomination]['upper']
+            for channel in range(3):
+                lut[lower[channel]:upper[channel] + 1, 0, channel] |= 1 << bit
+        self.color_lut = lut
+        
+        # code_members[code, i] = 1 when code includes denomination i
+        bits = np.arange(len(self.color_denominations))
+        self.code_members = (np.arange(256)[:, None] >> bits) & 1
+        
+    def estimate_quality(self, image):
+        """
+        Cheap noise and blur estimates at the working resolution
+        Returns: (noise_sigma, sharpness)
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        if width > 800:
+            scale = 800 / width
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            height, width = gray.shape
+        
+        # Immerkaer's estimator: this kernel cancels image structure up to
+        # second order, so what is left is mostly noise
+        kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = cv2.filter2D(gray.astype(np.float32), -1, kernel)[1:-1, 1:-1]
+        noise_sigma = float(np.abs(response).sum() * np.sqrt(np.pi / 2) / (6 * (width - 2) * (height - 2)))
+        
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+        return noise_sigma, sharpness
+    
+    def choose_profile(self, image):
+        """
+        Pick the preprocessing profile for one frame from its noise and blur
+        Returns: (profile name, {'noise_sigma': float, 'sharpness': float})
+        """
+        noise_sigma, sharpness = self.estimate_quality(image)
+        estimates = {'noise_sigma': round(noise_sigma, 2), 'sharpness': round(sharpness, 1)}
+        
+        if sharpness < BLUR_THRESHOLD or noise_sigma < NOISE_THRESHOLDS[0]:
+            return 'fast', estimates
+        if noise_sigma > NOISE_THRESHOLDS[1]:
+            return 'quality', estimates
+        return 'balanced', estimates
+    
+    def preprocess_image(self, image, profile='quality'):
         """
         Preprocess the image for better detection
+        profile: key of PREPROCESS_PROFILES
         """
+        settings = PREPROCESS_PROFILES[profile]
+        
         # Resize for consistent processing
         height, width = image.shape[:2]
-        if width > 800:
-            scale = 800 / width
+        if width > settings['max_width']:
+            scale = settings['max_width'] / width
             image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
         
         # Enhance contrast
@@ -98,18 +208,44 @@ class INRCurrencyDetector:
         enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
         
         # Denoise
-        denoised = cv2.fastNlMeansDenoisingColored(enhanced, None, 10, 10, 7, 21)
+        if settings['denoise'] == 'median':
+            return cv2.medianBlur(enhanced, 3)
+        if settings['denoise'] == 'bilateral':
+            return cv2.bilateralFilter(enhanced, 7, 50, 50)
+        return cv2.fastNlMeansDenoisingColored(enhanced, None, 10, 10, 7, 21)
+    
+    def extract_features(self, image):
+        """
+        Shared per-frame features, computed once and used by every matcher:
+        one downsampled HSV image, its hue/saturation histogram over
+        well-exposed pixels, and one full-resolution edge map
+        Returns: dict with 'hsv', 'hs_hist' and 'edges'
+        """
+        height, width = image.shape[:2]
+        scale = FEATURE_SIZE / max(height, width)
+        # Nearest-neighbour sampling keeps the pixel distribution (coverage
+        # fractions stay unbiased); area averaging would blend colours
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST) if scale < 1 else image
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        
+        # Drop very dark and very bright pixels (background/shadows)
+        value = hsv[:, :, 2]
+        exposed = ((value > 30) & (value < 230)).astype(np.uint8)
+        hs_hist = cv2.calcHist([hsv], [0, 1], exposed, [180, 256], [0, 180, 0, 256])
+        
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
         
-        return denoised
+        return {'hsv': hsv, 'hs_hist': hs_hist, 'edges': edges}
     
-    def detect_note_region(self, image):
+    def detect_note_region(self, image, edges=None):
         """
         Detect the currency note region in the image
+        edges: edge map from extract_features, computed here when omitted
         Returns the largest rectangular contour
         """
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        edges = cv2.Canny(blurred, 50, 150)
+        if edges is None:
+            edges = self.extract_features(image)['edges']
         
         # Find contours
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -146,35 +282,33 @@ class INRCurrencyDetector:
         # Convert to HSV
         hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
         
-        # Reshape to a list of pixels
-        pixels = hsv.reshape(-1, 3)
-        
-        # Remove black/very dark pixels (likely background)
-        pixels = pixels[pixels[:, 2] > 30]
+        # Hue histogram without black/very dark pixels (likely background)
+        bright = (hsv[:, :, 2] > 30).astype(np.uint8)
+        hist = cv2.calcHist([hsv], [0], bright, [180], [0, 180])
         
-        if len(pixels) == 0:
+        if not hist.any():
             return None
         
         # Get the most common hue value
-        hues = pixels[:, 0]
-        hist, bins = np.histogram(hues, bins=180, range=(0, 180))
-        dominant_hue = np.argmax(hist)
-        
-        return dominant_hue
+        return int(np.argmax(hist))
     
     def match_color_to_denomination(self, hsv_image):
         """
         Match the dominant color to a denomination
+        Scores every colour range in one pass over the image (see _build_color_luts)
         Returns list of (denomination, confidence) tuples
         """
         matches = []
         
-        for denomination, color_range in self.color_ranges.items():
-            # Create mask for this color range
-            mask = cv2.inRange(hsv_image, color_range['lower'], color_range['upper'])
-            
+        h, s, v = cv2.split(cv2.LUT(hsv_image, self.color_lut))
+        codes = cv2.bitwise_and(cv2.bitwise_and(h, s), v)
+        
+        # Pixels per code, then pixels per denomination
+        counts = np.bincount(codes.ravel(), minlength=256) @ self.code_members
+        
+        for denomination, count in zip(self.color_denominations, counts):
             # Calculate percentage of image matching this color
-            match_percentage = (np.sum(mask > 0) / mask.size) * 100
+            match_percentage = (count / codes.size) * 100
             
             if match_percentage > 2:  # At least 2% match (more flexible)
                 matches.append((denomination, match_percentage))
@@ -226,27 +360,33 @@ class INRCurrencyDetector:
         matches.sort(key=lambda x: x[1], reverse=True)
         return matches
     
+    def find_note_bounds(self, image, edges=None):
+        """
+        Bounding rectangle of the largest contour (should be the note)
+        edges: edge map from extract_features, computed here when omitted
+        Returns: (x, y, w, h) or None
+        """
+        if edges is None:
+            edges = self.extract_features(image)['edges']
+        
+        # Find contours
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        if not contours:
+            return None
+        
+        return cv2.boundingRect(max(contours, key=cv2.contourArea))
+    
     def detect_note_dimensions(self, image):
         """
         Detect actual note dimensions from image
         Returns: (width, height, aspect_ratio)
         """
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            bounds = self.find_note_bounds(image)
             
-            # Apply edge detection
-            edges = cv2.Canny(gray, 50, 150)
-            
-            # Find contours
-            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            if contours:
-                # Get largest contour (should be the note)
-                largest_contour = max(contours, key=cv2.contourArea)
-                
-                # Get bounding rectangle
-                x, y, w, h = cv2.boundingRect(largest_contour)
+            if bounds:
+                x, y, w, h = bounds
                 
                 # Calculate aspect ratio
                 aspect_ratio = w / h if h > 0 else 0
@@ -281,31 +421,26 @@ class INRCurrencyDetector:
         matches.sort(key=lambda x: x[1], reverse=True)
         return matches
     
-    def detect_dominant_color_advanced(self, image):
+    def detect_dominant_color_advanced(self, image, features=None):
         """
         Advanced color detection using clustering
+        features: output of extract_features, computed here when omitted
         Returns: (denomination, confidence) based on dominant colors
         """
         try:
-            # Resize for faster processing
-            small = cv2.resize(image, (150, 150))
-            
-            # Convert to HSV
-            hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+            if features is None:
+                features = self.extract_features(image)
             
-            # Flatten image
-            pixels = hsv.reshape(-1, 3)
+            # Well-exposed pixels only, counted by (hue, saturation)
+            hs_hist = features['hs_hist']
+            total = hs_hist.sum()
             
-            # Remove very dark and very bright pixels (background/shadows)
-            mask = (pixels[:, 2] > 30) & (pixels[:, 2] < 230)
-            filtered_pixels = pixels[mask]
-            
-            if len(filtered_pixels) == 0:
+            if total == 0:
                 return None, 0
             
-            # Get average hue
-            avg_hue = np.mean(filtered_pixels[:, 0])
-            avg_saturation = np.mean(filtered_pixels[:, 1])
+            # Get average hue and saturation from the histogram marginals
+            avg_hue = float(hs_hist.sum(axis=1) @ np.arange(180)) / total
+            avg_saturation = float(hs_hist.sum(axis=0) @ np.arange(256)) / total
             
             # Match to denomination colors with more precision
             best_match = None
@@ -336,17 +471,15 @@ class INRCurrencyDetector:
             print(f"Advanced color detection error: {str(e)}")
             return None, 0
     
-    def detect_edge_patterns(self, image):
+    def detect_edge_patterns(self, image, edges=None):
         """
         Detect unique edge patterns (motifs) on notes
+        edges: edge map from extract_features, computed here when omitted
         Returns: (denomination, confidence)
         """
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Detect edges
-            edges = cv2.Canny(gray, 50, 150)
+            if edges is None:
+                edges = self.extract_features(image)['edges']
             
             # Count edge density in different regions
             h, w = edges.shape
@@ -388,6 +521,11 @@ class INRCurrencyDetector:
         """
         Rotate image by specified angle
         """
+        # Quarter turns are exact and keep the whole note in frame
+        quarter_turns = {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_CLOCKWISE}
+        if angle in quarter_turns:
+            return cv2.rotate(image, quarter_turns[angle])
+        
         (h, w) = image.shape[:2]
         center = (w // 2, h // 2)
         M = cv2.getRotationMatrix2D(center, angle, 1.0)
@@ -396,15 +534,25 @@ class INRCurrencyDetector:
                                  borderMode=cv2.BORDER_REPLICATE)
         return rotated
     
-    def try_ocr_with_rotation(self, image, valid_denominations):
+    def binarizations(self, gray):
+        """
+        OCR inputs for one rotation, produced lazily so an early exit skips the rest
+        """
+        yield gray  # Original grayscale
+        yield cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]  # Otsu threshold
+        yield cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)  # Adaptive
+    
+    def try_ocr_with_rotation(self, image, valid_denominations, angles=(0, 90, 180, 270), good_enough=None):
         """
-        Try OCR with multiple rotations (0°, 90°, 180°, 270°)
-        Returns: (denomination, confidence, rotation_angle) or (None, 0, 0)
+        Try OCR with multiple rotations (0°, 90°, 180°, 270° by default)
+        good_enough: optional callable(denomination, confidence) -> bool, asked
+                     after every OCR call; True stops the search there
+        Returns: (denomination, confidence, rotation_angle, ocr_calls) or (None, 0, 0, ocr_calls)
         """
         best_result = (None, 0, 0)
+        ocr_calls = 0
         
-        # Try all 4 rotations
-        for angle in [0, 90, 180, 270]:
+        for angle in angles:
             if angle == 0:
                 rotated = image
             else:
@@ -413,18 +561,14 @@ class INRCurrencyDetector:
             # Preprocess for better OCR
             gray = cv2.cvtColor(rotated, cv2.COLOR_BGR2GRAY)
             
-            # Try multiple preprocessing techniques
-            preprocessing_methods = [
-                gray,  # Original grayscale
-                cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1],  # Otsu threshold
-                cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2),  # Adaptive
-            ]
-            
             detected_numbers = []
+            confidence = 0
             
-            for processed_img in preprocessing_methods:
+            # Try multiple preprocessing techniques
+            for processed_img in self.binarizations(gray):
                 # Extract text using OCR
-                text = pytesseract.image_to_string(processed_img, config='--psm 6')
+                text = self.ocr.image_to_string(processed_img, psm=6)
+                ocr_calls += 1
                 
                 # Find all numbers in the text
                 numbers = re.findall(r'\d+', text)
@@ -437,12 +581,12 @@ class INRCurrencyDetector:
                             detected_numbers.append(num)
                     except ValueError:
                         continue
-            
-            if detected_numbers:
+                
+                if not detected_numbers:
+                    continue
+                
                 # Get most common detection
-                most_common = Counter(detected_numbers).most_common(1)[0]
-                denomination = most_common[0]
-                frequency = most_common[1]
+                denomination, frequency = Counter(detected_numbers).most_common(1)[0]
                 
                 # Confidence based on how many times it was detected
                 confidence = min(95, 60 + (frequency * 15))
@@ -450,12 +594,19 @@ class INRCurrencyDetector:
                 # Keep track of best result
                 if confidence > best_result[1]:
                     best_result = (denomination, confidence, angle)
-                    
-                # If we got high confidence, no need to try other rotations
+                
+                if good_enough is not None and good_enough(denomination, confidence):
+                    return best_result + (ocr_calls,)
+                
+                # Read twice: the remaining binarization cannot change the answer
                 if confidence > 80:
                     break
+            
+            # If we got high confidence, no need to try other rotations
+            if confidence > 80:
+                break
         
-        return best_result
+        return best_result + (ocr_calls,)
     
     def extract_denomination_via_ocr(self, image):
         """
@@ -463,11 +614,8 @@ class INRCurrencyDetector:
         Returns: (denomination, confidence) or (None, 0)
         """
         try:
-            # Valid INR denominations
-            valid_denominations = [10, 20, 50, 100, 200, 500, 2000]
-            
             # Try OCR with all rotations
-            denomination, confidence, rotation = self.try_ocr_with_rotation(image, valid_denominations)
+            denomination, confidence, rotation, _ = self.try_ocr_with_rotation(image, VALID_DENOMINATIONS)
             
             if denomination:
                 if rotation != 0:
@@ -480,97 +628,284 @@ class INRCurrencyDetector:
             print(f"OCR error: {str(e)}")
             return None, 0
     
+    def extract_cheap_features(self, image):
+        """
+        Cheap features that run before any OCR: note bounds, size and colour
+        matches, and the rotations worth reading in
+        Returns: dict with 'bounds', 'size_matches', 'color_matches', 'angles'
+        """
+        img_h, img_w = image.shape[:2]
+        shared = self.extract_features(image)
+        bounds = self.find_note_bounds(image, shared['edges'])
+        
+        # Size/Aspect Ratio
+        aspect_ratio = bounds[2] / bounds[3] if bounds and bounds[3] > 0 else None
+        size_matches = self.match_by_size(aspect_ratio)
+        
+        # Colour matching on the downsampled HSV image
+        color_matches = self.match_color_to_denomination(shared['hsv'])
+        
+        # Contours that small are print or texture, not the note outline
+        if bounds and bounds[2] * bounds[3] < 0.1 * img_w * img_h:
+            bounds = None
+        
+        # Numerals run along the long side: a landscape note reads at 0/180°,
+        # a portrait one at 90/270°. The other two are only a fallback.
+        width, height = (bounds[2], bounds[3]) if bounds else (img_w, img_h)
+        angles = (0, 180, 90, 270) if width >= height else (90, 270, 0, 180)
+        
+        return {
+            'bounds': bounds,
+            'size_matches': size_matches,
+            'color_matches': color_matches,
+            'angles': angles,
+            'quad': self.detect_note_region(image, shared['edges']) if bounds else None,
+        }
+    
+    def order_corners(self, quad):
+        """
+        Order the 4 corners of a note contour as top-left, top-right,
+        bottom-right, bottom-left
+        """
+        points = quad.reshape(4, 2).astype(np.float32)
+        sums = points.sum(axis=1)
+        diffs = np.diff(points, axis=1).ravel()
+        return np.array([
+            points[np.argmin(sums)],
+            points[np.argmin(diffs)],
+            points[np.argmax(sums)],
+            points[np.argmax(diffs)],
+        ], dtype=np.float32)
+    
+    def warp_note(self, image, quad):
+        """
+        Perspective-warp the note inside `quad` to a canonical landscape
+        NOTE_WIDTH x NOTE_HEIGHT image. Only a 180° ambiguity remains.
+        """
+        tl, tr, br, bl = corners = self.order_corners(quad)
+        width = max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))
+        height = max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))
+        
+        if width >= height:
+            target = np.array([[0, 0], [NOTE_WIDTH - 1, 0], [NOTE_WIDTH - 1, NOTE_HEIGHT - 1],
+                               [0, NOTE_HEIGHT - 1]], dtype=np.float32)
+        else:
+            # Portrait in frame: map the long left edge onto the top edge
+            target = np.array([[NOTE_WIDTH - 1, 0], [NOTE_WIDTH - 1, NOTE_HEIGHT - 1],
+                               [0, NOTE_HEIGHT - 1], [0, 0]], dtype=np.float32)
+        
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(image, matrix, (NOTE_WIDTH, NOTE_HEIGHT), flags=cv2.INTER_LINEAR)
+    
+    def try_ocr_on_numeral_regions(self, note, valid_denominations, good_enough=None):
+        """
+        OCR only the numeral regions of a warped note, upright and then turned
+        180°, with a digits-only whitelist and single-line page segmentation
+        good_enough: optional callable(denomination, confidence) -> bool, asked
+                     after every OCR call; True stops the search there
+        Returns: (denomination, confidence, rotation_angle, ocr_calls) or (None, 0, 0, ocr_calls)
+        """
+        best_result = (None, 0, 0)
+        ocr_calls = 0
+        gray_note = cv2.cvtColor(note, cv2.COLOR_BGR2GRAY)
+        
+        for angle in (0, 180):
+            gray = gray_note if angle == 0 else cv2.rotate(gray_note, cv2.ROTATE_180)
+            detected_numbers = []
+            confidence = 0
+            
+            for x0, y0, x1, y1 in NUMERAL_REGIONS.values():
+                roi = gray[int(y0 * NOTE_HEIGHT):int(y1 * NOTE_HEIGHT), int(x0 * NOTE_WIDTH):int(x1 * NOTE_WIDTH)]
+                
+                for processed_img in self.binarizations(roi):
+                    text = self.ocr.image_to_string(processed_img, psm=7, whitelist='0123456789')
+                    ocr_calls += 1
+                    
+                    numbers = [int(n) for n in re.findall(r'\d+', text) if int(n) in valid_denominations]
+                    if not numbers:
+                        continue
+                    
+                    # One reading per region; agreement between regions raises confidence
+                    detected_numbers.append(numbers[0])
+                    denomination, frequency = Counter(detected_numbers).most_common(1)[0]
+                    confidence = min(95, 60 + (frequency * 15))
+                    
+                    if confidence > best_result[1]:
+                        best_result = (denomination, confidence, angle)
+                    
+                    if good_enough is not None and good_enough(denomination, confidence):
+                        return best_result + (ocr_calls,)
+                    break
+                
+                if confidence > 80:
+                    break
+            
+            if confidence > 80:
+                break
+        
+        return best_result + (ocr_calls,)
+    
+    def crop_to_note(self, image, bounds, margin=0.05):
+        """
+        Crop to the note's bounding rectangle plus a small margin
+        """
+        if bounds is None:
+            return image
+        
+        x, y, w, h = bounds
+        img_h, img_w = image.shape[:2]
+        dx, dy = int(w * margin), int(h * margin)
+        return image[max(0, y - dy):min(img_h, y + h + dy), max(0, x - dx):min(img_w, x + w + dx)]
+    
+    def combine_scores(self, ocr_denomination, ocr_confidence, size_matches, color_matches):
+        """
+        Multi-feature scoring with cross-verification
+        Returns: (denomination, confidence, verification_count) or None
+        """
+        denomination_scores = {}
+        verification_details = {}
+        
+        # OCR: Weight 60% (most accurate for reading numbers)
+        if ocr_denomination:
+            denomination_scores[ocr_denomination] = ocr_confidence * 0.6
+            verification_details[ocr_denomination] = {'ocr': True, 'size': False, 'color': False}
+        
+        # Size matching: Weight 25% (physical characteristic)
+        for denom, score in size_matches[:3]:
+            if denom in denomination_scores:
+                denomination_scores[denom] += score * 0.25
+                verification_details[denom]['size'] = True
+            else:
+                denomination_scores[denom] = score * 0.25
+                verification_details[denom] = {'ocr': False, 'size': True, 'color': False}
+        
+        # Color matching: Weight 15% (can fade over time)
+        for denom, score in color_matches[:3]:
+            if denom in denomination_scores:
+                denomination_scores[denom] += score * 0.15
+                verification_details[denom]['color'] = True
+            else:
+                denomination_scores[denom] = score * 0.15
+                verification_details[denom] = {'ocr': False, 'size': False, 'color': True}
+        
+        if not denomination_scores:
+            return None
+        
+        # Get best match
+        denomination, confidence = max(denomination_scores.items(), key=lambda x: x[1])
+        
+        # Check verification count (how many methods agreed)
+        verification_count = sum(verification_details[denomination].values())
+        
+        # Apply verification bonus: multiple methods agree - boost confidence
+        if verification_count >= 2:
+            confidence = min(95, confidence * 1.2)
+        
+        return denomination, confidence, verification_count
+    
+    def _timed(self, timings, stage, func, *args, **kwargs):
+        """Call func and record its duration in timings[stage] (ms)"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 2)
+    
     def detect(self, image):
         """
-        Main detection method using multi-feature verification
+        Main detection method using multi-feature verification, as a staged
+        pipeline: preprocess, then cheap features (note bounds, aspect ratio,
+        colour), then OCR. When the note's outline is found, the note is
+        warped flat and only its numeral regions are read; otherwise (or when
+        they read nothing) the note region is read in the rotations the
+        features suggest. OCR stops as soon as the combined score of what it
+        read reaches early_exit_confidence.
         Returns: {
             'denomination': int,
             'confidence': float,
             'currency': 'INR',
-            'color_name': str
+            'color_name': str,
+            'stage_timing_ms': {stage: ms},
+            'ocr_calls': int,
+            'preprocess_profile': str
         }
         """
+        timings = {}
+        stats = {'ocr_calls': 0, 'early_exit': False}
+        start = time.perf_counter()
+        
+        def report(result):
+            timings['total'] = round((time.perf_counter() - start) * 1000, 2)
+            result['stage_timing_ms'] = timings
+            result.update(stats)
+            return result
+        
         try:
-            # Preprocess image
-            processed = self.preprocess_image(image)
-            
-            # Method 1: OCR (Primary - most reliable for denomination)
-            ocr_denomination, ocr_confidence = self.extract_denomination_via_ocr(processed)
-            
-            # Method 2: Size/Aspect Ratio (Secondary verification)
-            width, height, aspect_ratio = self.detect_note_dimensions(processed)
-            size_matches = self.match_by_size(aspect_ratio)
-            
-            # Method 3: Advanced Color Detection
-            color_denom, color_conf = self.detect_dominant_color_advanced(processed)
+            # Stage 1: preprocess image with a profile fitting its noise and blur
+            profile = self.preprocess_profile
+            if profile == 'auto':
+                profile, estimates = self._timed(timings, 'profile', self.choose_profile, image)
+                stats.update(estimates)
+            stats['preprocess_profile'] = profile
+            processed = self._timed(timings, 'preprocess', self.preprocess_image, image, profile)
+            
+            # Stage 2: cheap features
+            features = self._timed(timings, 'features', self.extract_cheap_features, processed)
+            size_matches = features['size_matches']
+            color_matches = features['color_matches']
+            
+            def good_enough(denomination, confidence):
+                combined = self.combine_scores(denomination, confidence, size_matches, color_matches)
+                return (combined is not None and combined[0] == denomination
+                        and combined[1] >= self.early_exit_confidence)
+            
+            # Stage 3: OCR (most reliable for denomination). It always runs:
+            # size and colour alone score at most 48, below any useful
+            # early_exit_confidence, so they only decide when OCR may stop
+            ocr_denomination, ocr_confidence = None, 0
+            rotation = 0
+            if features['quad'] is not None:
+                note = self._timed(timings, 'warp', self.warp_note, processed, features['quad'])
+                ocr_denomination, ocr_confidence, rotation, stats['ocr_calls'] = self._timed(
+                    timings, 'ocr_regions', self.try_ocr_on_numeral_regions, note, VALID_DENOMINATIONS,
+                    good_enough)
+            
+            if not ocr_denomination:
+                region = self.crop_to_note(processed, features['bounds'])
+                ocr_denomination, ocr_confidence, rotation, calls = self._timed(
+                    timings, 'ocr', self.try_ocr_with_rotation, region, VALID_DENOMINATIONS,
+                    features['angles'], good_enough)
+                stats['ocr_calls'] += calls
             
-            # Method 4: Basic color matching (fallback)
-            hsv = cv2.cvtColor(processed, cv2.COLOR_BGR2HSV)
-            color_matches = self.match_color_to_denomination(hsv)
-            
-            # Method 5: Edge pattern detection (when numbers are covered)
-            edge_denom, edge_conf = self.detect_edge_patterns(processed)
-            
-            # Multi-feature scoring with cross-verification
-            denomination_scores = {}
-            verification_details = {}
-            
-            # OCR: Weight 60% (most accurate for reading numbers)
             if ocr_denomination:
-                denomination_scores[ocr_denomination] = ocr_confidence * 0.6
-                verification_details[ocr_denomination] = {'ocr': True, 'size': False, 'color': False}
-            
-            # Size matching: Weight 25% (physical characteristic)
-            for denom, score in size_matches[:3]:
-                if denom in denomination_scores:
-                    denomination_scores[denom] += score * 0.25
-                    verification_details[denom]['size'] = True
-                else:
-                    denomination_scores[denom] = score * 0.25
-                    verification_details[denom] = {'ocr': False, 'size': True, 'color': False}
-            
-            # Color matching: Weight 15% (can fade over time)
-            for denom, score in color_matches[:3]:
-                if denom in denomination_scores:
-                    denomination_scores[denom] += score * 0.15
-                    verification_details[denom]['color'] = True
-                else:
-                    denomination_scores[denom] = score * 0.15
-                    verification_details[denom] = {'ocr': False, 'size': False, 'color': True}
-            
-            if not denomination_scores:
-                return {
+                stats['early_exit'] = bool(good_enough(ocr_denomination, ocr_confidence))
+                if rotation != 0:
+                    print(f"✓ Note detected at {rotation}° rotation: ₹{ocr_denomination}")
+            combined = self.combine_scores(ocr_denomination, ocr_confidence, size_matches, color_matches)
+            
+            if combined is None:
+                return report({
                     'success': False,
                     'message': 'No currency note detected. Please ensure the note is fully visible in frame.'
-                }
-            
-            # Get best match
-            best_denomination = max(denomination_scores.items(), key=lambda x: x[1])
-            denomination = best_denomination[0]
-            confidence = best_denomination[1]
+                })
             
-            # Check verification count (how many methods agreed)
-            verification = verification_details.get(denomination, {'ocr': False, 'size': False, 'color': False})
-            verification_count = sum(verification.values())
+            denomination, confidence, verification_count = combined
             
-            # Apply verification bonus
             if verification_count >= 2:
-                # Multiple methods agree - boost confidence
-                confidence = min(95, confidence * 1.2)
                 verification_status = f"{verification_count}/3 methods verified"
             else:
                 verification_status = "Single method detection"
             
             # Stricter threshold with verification requirement
             if confidence < 30:
-                return {
+                return report({
                     'success': False,
                     'message': 'Detection confidence too low. Please hold the note flat and ensure good lighting.'
-                }
+                })
             
             # High confidence with cross-verification
             if ocr_denomination and verification_count >= 2:
-                return {
+                return report({
                     'success': True,
                     'denomination': denomination,
                     'confidence': round(confidence, 2),
@@ -580,10 +915,10 @@ class INRCurrencyDetector:
                     'method': f'Multi-feature ({verification_status})',
                     'verified': True,
                     'message': f'Detected ₹{denomination} note with {round(confidence, 2)}% confidence'
-                }
+                })
             
             # Lower confidence or single method
-            return {
+            return report({
                 'success': True,
                 'denomination': denomination,
                 'confidence': round(confidence, 2),
@@ -593,10 +928,10 @@ class INRCurrencyDetector:
                 'method': f'{verification_status}',
                 'verified': False,
                 'message': f'Detected ₹{denomination} note with {round(confidence, 2)}% confidence'
-            }
+            })
             
         except Exception as e:
-            return {
+            return report({
                 'success': False,
                 'message': f'Detection error: {str(e)}'
-            }
+            })
@@ -0,0 +1,325 @@
+"""
+Object Detector Backends
+Inference engines behind ObjectDetector. Every backend takes BGR frames and
+returns, per frame, detections in the same schema:
+    {'label': str, 'confidence': float, 'box': [x, y, w, h]}
+
+    torch     ultralytics YOLO on PyTorch (the original path)
+    onnx      ONNX Runtime on an exported yolov8n.onnx, optionally INT8
+    openvino  OpenVINO IR exported from the same weights, optionally INT8
+
+The ONNX and OpenVINO models are exported once through ultralytics and
+cached in `cache_dir`; once cached, neither torch nor ultralytics is imported.
+OpenCV is imported when a frame is first processed.
+"""
+
+import ast
+import os
+import shutil
+
+import numpy as np
+
+
+MODEL_NAME = 'yolov8n'
+INPUT_SIZE = 640
+
+# Fallback class names for exports that carry no metadata
+COCO_NAMES = [
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat',
+    'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+    'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack',
+    'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball',
+    'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket',
+    'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple',
+    'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush',
+]
+
+
+def default_threads():
+    """Intra-op threads for one inference: every core, since requests are serialized per model"""
+    return os.cpu_count() or 1
+
+
+class TorchBackend:
+    name = 'torch'
+
+    def __init__(self, threads=None, conf=0.5, **_):
+        # Imported here so the other backends never pay for torch
+        from ultralytics import YOLO
+
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+
+        # YOLOv8-nano is smallest and fastest
+        # Auto-downloads on first use to ~/.yolo/models/
+        self.model = YOLO(f'{MODEL_NAME}.pt')
+        self.conf = conf
+
+    def predict(self, images):
+        # Ultralytics batches a list of frames through the network at once
+        results = self.model(list(images), conf=self.conf, verbose=False)
+        return [self._parse_result(result) for result in results]
+
+    def _parse_result(self, result):
+        """Convert one ultralytics Results object into detection dicts."""
+        detections = []
+
+        boxes = result.boxes
+        if boxes is not None:
+            for box in boxes:
+                # Get confidence
+                confidence = float(box.conf[0])
+
+                # Get class name
+                cls_idx = int(box.cls[0])
+                label = self.model.names[cls_idx]
+
+                # Get bounding box coordinates
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                box_w = x2 - x1
+                box_h = y2 - y1
+
+                if box_w > 0 and box_h > 0:
+                    detections.append({
+                        'label': label,
+                        'confidence': round(confidence, 2),
+                        'box': [x1, y1, box_w, box_h]
+                    })
+
+        return detections
+
+
+def _export(cache_dir, target, export_format, int8):
+    """
+    Export yolov8n.pt through ultralytics into cache_dir/target, once.
+    The result is moved into place atomically so concurrent workers never
+    load a half-written model.
+    """
+    path = os.path.join(cache_dir, target)
+    if os.path.exists(path):
+        return path
+
+    from ultralytics import YOLO
+
+    os.makedirs(cache_dir, exist_ok=True)
+    print(f"⏳ Exporting {MODEL_NAME} to {export_format}{' (INT8)' if int8 else ''}...")
+    options = {'int8': True} if int8 else {}
+    exported = YOLO(f'{MODEL_NAME}.pt').export(format=export_format, imgsz=INPUT_SIZE, dynamic=True, **options)
+
+    staging = f'{path}.tmp{os.getpid()}'
+    shutil.move(str(exported), staging)
+    os.replace(staging, path)
+    return path
+
+
+def export_onnx(cache_dir, int8=False):
+    """
+    Path of the cached ONNX model, exporting (and quantizing) it on first use
+    """
+    path = _export(cache_dir, f'{MODEL_NAME}.onnx', 'onnx', int8=False)
+    if not int8:
+        return path
+
+    int8_path = os.path.join(cache_dir, f'{MODEL_NAME}.int8.onnx')
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # Weight-only INT8: needs no calibration data
+        staging = f'{int8_path}.tmp{os.getpid()}'
+        quantize_dynamic(path, staging, weight_type=QuantType.QUInt8)
+        os.replace(staging, int8_path)
+    return int8_path
+
+
+def export_openvino(cache_dir, int8=False):
+    """
+    Directory of the cached OpenVINO IR, exporting it on first use;
+    INT8 export calibrates on ultralytics' sample dataset
+    """
+    suffix = '_int8' if int8 else ''
+    return _export(cache_dir, f'{MODEL_NAME}{suffix}_openvino_model', 'openvino', int8)
+
+
+def letterbox(image, size=INPUT_SIZE):
+    """
+    Resize keeping the aspect ratio and pad to size x size, as YOLOv8 was trained
+    Returns: (padded image, ratio, (pad_x, pad_y))
+    """
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    if (new_width, new_height) != (width, height):
+        import cv2
+
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    padded = np.full((size, size, 3), 114, dtype=np.uint8)
+    padded[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = image
+    return padded, ratio, (pad_x, pad_y)
+
+
+class ExportedBackend:
+    """
+    Shared pre/post-processing for raw YOLOv8 graphs: letterbox, one
+    (B, 3, 640, 640) forward pass, then confidence filter and class-aware NMS
+    """
+    names = dict(enumerate(COCO_NAMES))
+
+    def __init__(self, conf=0.5, iou=0.7):
+        self.conf = conf
+        self.iou = iou
+        self.pid = None
+
+    def _load(self):
+        """Create the runtime session; sets self.pid"""
+        raise NotImplementedError
+
+    def _infer(self, blob):
+        raise NotImplementedError
+
+    def predict(self, images):
+        import cv2
+
+        # Runtime thread pools do not survive fork(): a forked server worker
+        # opens its own session on first use
+        if self.pid != os.getpid():
+            self._load()
+
+        boxed = [letterbox(image) for image in images]
+        # BGR -> RGB, HWC -> CHW and /255 in a single pass
+        blob = cv2.dnn.blobFromImages([padded for padded, _, _ in boxed], 1 / 255.0, swapRB=True)
+        output = self._infer(blob)
+
+        return [
+            self._parse_output(prediction, ratio, pad, image.shape[:2])
+            for prediction, image, (_, ratio, pad) in zip(output, images, boxed)
+        ]
+
+    def _parse_output(self, prediction, ratio, pad, image_shape):
+        """Turn one (4 + classes, anchors) prediction into detection dicts"""
+        prediction = prediction.T
+        class_scores = prediction[:, 4:]
+        class_ids = np.argmax(class_scores, axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+
+        keep = scores >= self.conf
+        if not keep.any():
+            return []
+        boxes, scores, class_ids = prediction[keep, :4], scores[keep], class_ids[keep]
+
+        # (cx, cy, w, h) -> (x, y, w, h), undoing the letterbox
+        xywh = np.empty_like(boxes)
+        xywh[:, 0] = (boxes[:, 0] - boxes[:, 2] / 2 - pad[0]) / ratio
+        xywh[:, 1] = (boxes[:, 1] - boxes[:, 3] / 2 - pad[1]) / ratio
+        xywh[:, 2:] = boxes[:, 2:] / ratio
+
+        # Offsetting each class far apart makes a single NMS call class-aware
+        offset = xywh.copy()
+        offset[:, :2] += class_ids[:, None] * 8192
+        import cv2
+
+        kept = cv2.dnn.NMSBoxes(offset.tolist(), scores.tolist(), self.conf, self.iou)
+
+        height, width = image_shape
+        detections = []
+        for i in np.asarray(kept, dtype=np.int64).reshape(-1):
+            x, y, w, h = xywh[i]
+            x1, y1 = max(0, int(x)), max(0, int(y))
+            x2, y2 = min(width, int(x + w)), min(height, int(y + h))
+            if x2 > x1 and y2 > y1:
+                detections.append({
+                    'label': self.names.get(int(class_ids[i]), str(class_ids[i])),
+                    'confidence': round(float(scores[i]), 2),
+                    'box': [x1, y1, x2 - x1, y2 - y1]
+                })
+
+        detections.sort(key=lambda d: d['confidence'], reverse=True)
+        return detections
+
+
+class OnnxBackend(ExportedBackend):
+    name = 'onnx'
+
+    def __init__(self, cache_dir='models', int8=False, threads=None, conf=0.5, iou=0.7):
+        super().__init__(conf, iou)
+        import onnxruntime as ort
+
+        self.ort = ort
+        self.options = ort.SessionOptions()
+        self.options.intra_op_num_threads = threads or default_threads()
+        self.options.inter_op_num_threads = 1
+        self.options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.path = export_onnx(cache_dir, int8)
+        self._load()
+
+        # ultralytics stores the class names as a dict literal in the model metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if 'names' in metadata:
+            self.names = ast.literal_eval(metadata['names'])
+
+    def _load(self):
+        self.session = self.ort.InferenceSession(self.path, self.options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.pid = os.getpid()
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoBackend(ExportedBackend):
+    name = 'openvino'
+
+    def __init__(self, cache_dir='models', int8=False, threads=None, conf=0.5, iou=0.7):
+        super().__init__(conf, iou)
+        import openvino as ov
+
+        self.ov = ov
+        self.threads = threads or default_threads()
+        self.path = export_openvino(cache_dir, int8)
+        self._load()
+
+        metadata_path = os.path.join(self.path, 'metadata.yaml')
+        if os.path.exists(metadata_path):
+            try:
+                import yaml
+                with open(metadata_path) as f:
+                    self.names = yaml.safe_load(f).get('names', self.names)
+            except ImportError:
+                pass
+
+    def _load(self):
+        core = self.ov.Core()
+        model = core.read_model(os.path.join(self.path, f'{MODEL_NAME}.xml'))
+        self.compiled = core.compile_model(model, 'CPU', {
+            'INFERENCE_NUM_THREADS': self.threads,
+            'PERFORMANCE_HINT': 'LATENCY',
+        })
+        self.output = self.compiled.output(0)
+        self.pid = os.getpid()
+
+    def _infer(self, blob):
+        return self.compiled([blob])[self.output]
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend,
+    'openvino': OpenVinoBackend,
+}
+
+
+def create_backend(name='torch', **options):
+    """
+    Build an inference backend by name: 'torch', 'onnx' or 'openvino'
+    """
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown object detector backend: {name}')
+    return BACKENDS[name](**options)
@@ -0,0 +1,180 @@
+"""
+Face Detector Module
+Finds faces before they are encoded. Every detector runs on a copy of the
+frame shrunk to at most `detect_side` pixels and maps its boxes back to the
+frame it was given, in face_recognition's (top, right, bottom, left) order.
+
+    haar    OpenCV Haar cascade: fastest, misses turned and small faces
+    hog     dlib HOG through face_recognition (the original detector)
+    yunet   OpenCV DNN face detector (YuNet): fast and the most robust
+            to pose and scale; needs the ONNX model file
+    cnn     dlib CNN through face_recognition: accurate but very slow
+            without a GPU
+
+Tiers pick a detector and detection size for a speed/accuracy trade-off;
+see FACE_DETECTION_TIERS.
+"""
+
+import os
+import threading
+
+import cv2
+
+
+# tier -> (detector, longest side detection runs at)
+FACE_DETECTION_TIERS = {
+    'fast': ('haar', 480),
+    'balanced': ('hog', 640),
+    'accurate': ('yunet', 960),
+}
+
+# From https://github.com/opencv/opencv_zoo/tree/main/models/face_detection_yunet
+YUNET_MODEL = os.path.join('models', 'face_detection_yunet_2023mar.onnx')
+
+
+def downscale(image, detect_side):
+    """
+    Shrink an image so its longest side is at most detect_side
+    Returns: (image, factor to multiply its coordinates by)
+    """
+    longest = max(image.shape[:2])
+    if not detect_side or longest <= detect_side:
+        return image, 1.0
+    factor = detect_side / longest
+    small = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    return small, longest / max(small.shape[:2])
+
+
+def scale_locations(locations, factor, shape):
+    """Map (top, right, bottom, left) boxes by factor, clipped to an image of `shape`"""
+    height, width = shape[:2]
+    return [
+        (max(0, int(round(top * factor))), min(width, int(round(right * factor))),
+         min(height, int(round(bottom * factor))), max(0, int(round(left * factor))))
+        for top, right, bottom, left in locations
+    ]
+
+
+def largest_faces(locations, max_faces):
+    """The max_faces largest boxes (all of them when max_faces is 0), in their original order"""
+    if not max_faces or len(locations) <= max_faces:
+        return list(locations)
+    area = lambda box: (box[2] - box[0]) * (box[1] - box[3])
+    keep = set(sorted(range(len(locations)), key=lambda i: area(locations[i]), reverse=True)[:max_faces])
+    return [box for i, box in enumerate(locations) if i in keep]
+
+
+class FaceDetector:
+    name = None
+
+    def __init__(self, detect_side=640):
+        self.detect_side = detect_side
+
+    def _detect(self, rgb_image):
+        """(top, right, bottom, left) boxes in rgb_image coordinates"""
+        raise NotImplementedError
+
+    def detect(self, rgb_image):
+        """
+        Detect faces on a downscaled copy of an RGB frame
+        Returns: list of (top, right, bottom, left) in rgb_image coordinates
+        """
+        small, factor = downscale(rgb_image, self.detect_side)
+        # Scaling also clips boxes that reach past the frame edge
+        return scale_locations(self._detect(small), factor, rgb_image.shape)
+
+
+class HogFaceDetector(FaceDetector):
+    name = 'hog'
+    model = 'hog'
+
+    def __init__(self, detect_side=640, upsample=1):
+        super().__init__(detect_side)
+        import face_recognition
+
+        self.face_recognition = face_recognition
+        self.upsample = upsample
+
+    def _detect(self, rgb_image):
+        return self.face_recognition.face_locations(rgb_image, self.upsample, model=self.model)
+
+
+class CnnFaceDetector(HogFaceDetector):
+    name = 'cnn'
+    model = 'cnn'
+
+
+class HaarFaceDetector(FaceDetector):
+    name = 'haar'
+
+    def __init__(self, detect_side=480, min_face=24):
+        super().__init__(detect_side)
+        if not hasattr(cv2, 'CascadeClassifier'):
+            # OpenCV 5 moved the cascades out of the main package
+            raise RuntimeError('this OpenCV build has no Haar cascade support')
+        path = os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise RuntimeError(f'Haar cascade not found at {path}')
+        self.min_face = min_face
+
+    def _detect(self, rgb_image):
+        gray = cv2.equalizeHist(cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY))
+        boxes = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5,
+                                              minSize=(self.min_face, self.min_face))
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in boxes]
+
+
+class YuNetFaceDetector(FaceDetector):
+    name = 'yunet'
+
+    def __init__(self, detect_side=960, model_path=YUNET_MODEL, score_threshold=0.8):
+        super().__init__(detect_side)
+        if not os.path.exists(model_path):
+            raise RuntimeError(f'YuNet model not found at {model_path}; download '
+                               'face_detection_yunet_2023mar.onnx from the OpenCV model zoo')
+        self.model_path = model_path
+        self.score_threshold = score_threshold
+        self._local = threading.local()
+        self._net()
+
+    def _net(self):
+        # The detector keeps its input size as state, so every thread gets its own
+        net = getattr(self._local, 'net', None)
+        if net is None:
+            net = cv2.FaceDetectorYN.create(self.model_path, '', (320, 320), self.score_threshold)
+            self._local.net = net
+        return net
+
+    def _detect(self, rgb_image):
+        height, width = rgb_image.shape[:2]
+        net = self._net()
+        net.setInputSize((width, height))
+        _, faces = net.detect(cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR))
+        if faces is None:
+            return []
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in faces[:, :4]]
+
+
+FACE_DETECTORS = {
+    'haar': HaarFaceDetector,
+    'hog': HogFaceDetector,
+    'yunet': YuNetFaceDetector,
+    'cnn': CnnFaceDetector,
+}
+
+
+def create_face_detector(tier='balanced', detector=None, detect_side=None):
+    """
+    Create the face detector of a tier ('fast', 'balanced' or 'accurate');
+    `detector` ('haar', 'hog', 'yunet' or 'cnn') and `detect_side` override
+    the tier's choice
+    Returns: detector with detect(rgb_image) -> list of (top, right, bottom, left)
+    """
+    if tier not in FACE_DETECTION_TIERS:
+        raise ValueError(f'Unknown face detection tier: {tier}')
+    tier_detector, tier_side = FACE_DETECTION_TIERS[tier]
+    name = detector or tier_detector
+    if name not in FACE_DETECTORS:
+        raise ValueError(f'Unknown face detector: {name}')
+    return FACE_DETECTORS[name](detect_side=detect_side or tier_side)
@@ -0,0 +1,123 @@
+"""
+Face Embedder Module
+Turns frames into 128-d face encodings with the same dlib models as
+face_recognition, but in batches: the faces of every frame in a request go
+through one compute_face_descriptor call instead of one call per face.
+
+    detect     face boxes per frame (utils/face_detector.py), largest
+               max_faces kept
+    landmarks  5-point (fast, the face_recognition default) or 68-point
+               shape per face
+    encode     128-d descriptor per face; num_jitters > 1 averages that many
+               randomly perturbed crops for a steadier encoding at
+               num_jitters times the cost
+
+dlib releases the GIL, so with threads > 1 frames are detected and encoded
+on a thread pool.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.face_detector import largest_faces
+
+
+LANDMARK_MODELS = ('5', '68')
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+class FaceEmbedder:
+    def __init__(self, detector, landmarks='5', num_jitters=1, max_faces=10, threads=1):
+        """
+        detector:    face detector with detect(rgb_image) -> (top, right, bottom, left) boxes
+        landmarks:   '5' or '68' point shape predictor
+        num_jitters: crops averaged per encoding
+        max_faces:   largest faces encoded per frame (0 = all)
+        threads:     frames processed in parallel
+        """
+        import dlib
+        import face_recognition.api as face_api
+
+        if landmarks not in LANDMARK_MODELS:
+            raise ValueError(f'Unknown landmark model: {landmarks}')
+
+        self.dlib = dlib
+        self.detector = detector
+        self.predictor = face_api.pose_predictor_5_point if landmarks == '5' else face_api.pose_predictor_68_point
+        self.encoder = face_api.face_encoder
+        self.landmarks = landmarks
+        self.num_jitters = max(1, num_jitters)
+        self.max_faces = max_faces
+        self.threads = max(1, threads)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _map(self, func, items):
+        if self.threads == 1 or len(items) < 2:
+            return [func(item) for item in items]
+        # Pool threads do not survive a fork, so every process starts its own
+        with self._executor_lock:
+            if self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='face-embed')
+                self._executor_pid = os.getpid()
+            executor = self._executor
+        return list(executor.map(func, items))
+
+    def detect(self, rgb_image):
+        """(largest max_faces boxes, number of faces found before the cut)"""
+        locations = self.detector.detect(rgb_image)
+        return largest_faces(locations, self.max_faces), len(locations)
+
+    def shapes(self, rgb_image, locations):
+        """Landmarks of every face box of one frame"""
+        shapes = self.dlib.full_object_detections()
+        for top, right, bottom, left in locations:
+            shapes.append(self.predictor(rgb_image, self.dlib.rectangle(left, top, right, bottom)))
+        return shapes
+
+    def _encode_chunk(self, chunk):
+        """One dlib call for all faces of several frames"""
+        images, shapes = zip(*chunk)
+        descriptors = self.encoder.compute_face_descriptor(list(images), list(shapes), self.num_jitters)
+        return [[np.array(d) for d in frame] for frame in descriptors]
+
+    def encode(self, rgb_images):
+        """
+        Locate and encode every face of one or more RGB frames
+        Returns: (list of encodings per frame, list of face boxes per frame,
+                  stage timings in ms, faces found per frame before the
+                  max_faces cut)
+        """
+        timings = {}
+
+        start = time.perf_counter()
+        locations, detected = zip(*self._map(self.detect, rgb_images)) if rgb_images else ((), ())
+        locations, detected = list(locations), list(detected)
+        timings['detect'] = elapsed_ms(start)
+
+        start = time.perf_counter()
+        with_faces = [i for i, boxes in enumerate(locations) if boxes]
+        shapes = [self.shapes(rgb_images[i], locations[i]) for i in with_faces]
+        timings['landmarks'] = elapsed_ms(start)
+
+        start = time.perf_counter()
+        encodings = [[] for _ in rgb_images]
+        if with_faces:
+            pairs = [(rgb_images[i], shape) for i, shape in zip(with_faces, shapes)]
+            # One chunk per thread; a single thread encodes everything in one call
+            size = -(-len(pairs) // min(self.threads, len(pairs)))
+            chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+            frames = [frame for chunk in self._map(self._encode_chunk, chunks) for frame in chunk]
+            for i, frame in zip(with_faces, frames):
+                encodings[i] = frame
+        timings['encode'] = elapsed_ms(start)
+
+        return encodings, locations, timings, detected
@@ -0,0 +1,147 @@
+"""
+Face Enrollment Module
+Turns many photos of a person into a compact gallery identity.
+
+- Quality gating: a sample is rejected when it has no face or several, when
+  the face is too small, blurred (variance of the Laplacian of the face crop)
+  or badly exposed, or when its encoding is far from the person's other
+  samples (most likely someone else's photo).
+- Summary: the accepted encodings are stored as their centroid plus a few
+  exemplars chosen to cover the spread of the samples (farthest-point
+  sampling), so recognition sees the typical face and its extremes without
+  keeping every sample.
+- Archives: zip uploads hold images at the top level (one person, named in
+  the request) or in one folder per person.
+"""
+
+import io
+import os
+import zipfile
+
+import numpy as np
+
+
+# Smallest face side in the face engine's frame (1024 px)
+MIN_FACE_SIZE = 80
+# Laplacian variance of the face crop at CROP_SIZE; lower is blurred
+MIN_SHARPNESS = 40.0
+CROP_SIZE = 160
+# Mean grey level range of the face crop
+BRIGHTNESS_RANGE = (40, 220)
+# Samples further than this from the centroid of the others are dropped
+OUTLIER_DISTANCE = 0.5
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def sample_quality(rgb_image, locations, faces=None):
+    """
+    Quality metrics of one enrollment photo from its face boxes
+    faces: faces the detector found, when `locations` was cut to the largest few
+    Returns: dict with faces, face_size, sharpness, brightness and
+             'reason' (None when the sample is usable)
+    """
+    faces = len(locations) if faces is None else faces
+    quality = {'faces': faces, 'reason': None}
+    if not faces:
+        quality['reason'] = 'No face detected'
+        return quality
+    if faces > 1:
+        quality['reason'] = f'{faces} faces in the image; use photos of one person'
+        return quality
+
+    # Only the part of the box inside the frame is judged
+    height, width = rgb_image.shape[:2]
+    top, right, bottom, left = locations[0]
+    top, left = max(0, top), max(0, left)
+    bottom, right = min(height, bottom), min(width, right)
+
+    quality['face_size'] = int(max(0, min(bottom - top, right - left)))
+    if quality['face_size'] == 0:
+        quality['reason'] = 'Face is cut off by the edge of the photo'
+        return quality
+    if quality['face_size'] < MIN_FACE_SIZE:
+        quality['reason'] = f"Face too small ({quality['face_size']} px)"
+        return quality
+
+    import cv2
+
+    crop = cv2.cvtColor(rgb_image[top:bottom, left:right], cv2.COLOR_RGB2GRAY)
+    # Compare sharpness at one scale so large and small faces are judged alike
+    crop = cv2.resize(crop, (CROP_SIZE, CROP_SIZE), interpolation=cv2.INTER_AREA)
+
+    quality['sharpness'] = round(float(cv2.Laplacian(crop, cv2.CV_64F).var()), 1)
+    quality['brightness'] = round(float(crop.mean()), 1)
+
+    if quality['sharpness'] < MIN_SHARPNESS:
+        quality['reason'] = 'Image is blurred'
+    elif not BRIGHTNESS_RANGE[0] <= quality['brightness'] <= BRIGHTNESS_RANGE[1]:
+        quality['reason'] = 'Face is too dark' if quality['brightness'] < BRIGHTNESS_RANGE[0] else 'Face is overexposed'
+    return quality
+
+
+def find_outliers(encodings, max_distance=OUTLIER_DISTANCE):
+    """
+    Indices of encodings further than max_distance from the centroid of the
+    remaining ones; needs at least three samples to tell who is the odd one out
+    """
+    matrix = np.asarray(encodings, dtype=np.float32)
+    if len(matrix) < 3:
+        return []
+    total = matrix.sum(axis=0)
+    # Leave-one-out centroids, so an outlier does not pull its own reference
+    others = (total[None, :] - matrix) / (len(matrix) - 1)
+    distances = np.linalg.norm(matrix - others, axis=1)
+    return [int(i) for i in np.flatnonzero(distances > max_distance)]
+
+
+def summarize_identity(encodings, exemplars=3):
+    """
+    Centroid of the encodings plus up to `exemplars` samples, each the one
+    furthest from everything chosen so far
+    Returns: (rows to store, indices of the exemplar samples)
+    """
+    matrix = np.asarray(encodings, dtype=np.float32)
+    centroid = matrix.mean(axis=0)
+
+    chosen = []
+    nearest = np.linalg.norm(matrix - centroid, axis=1)
+    for _ in range(min(exemplars, len(matrix) - 1)):
+        best = int(np.argmax(nearest))
+        if nearest[best] <= 0:
+            break
+        chosen.append(best)
+        nearest = np.minimum(nearest, np.linalg.norm(matrix - matrix[best], axis=1))
+
+    return np.vstack([centroid[None, :], matrix[chosen]]), chosen
+
+
+def read_archive(data, name=None, max_images=100, max_bytes=200 * 1024 * 1024):
+    """
+    Image files of a zip archive grouped by person: files at the top level
+    belong to `name`, files in a folder to the folder's name
+    Returns: {person: [(file name, bytes), ...]}
+    """
+    people = {}
+    total = count = 0
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            parts = [part for part in info.filename.replace('\\', '/').split('/') if part]
+            if any(part.startswith(('.', '__MACOSX')) for part in parts):
+                continue
+            person = parts[-2] if len(parts) > 1 else name
+            if not person:
+                raise ValueError(f'{info.filename} is not in a person folder and no name was given')
+
+            count += 1
+            total += info.file_size
+            if count > max_images:
+                raise ValueError(f'At most {max_images} images per enrollment')
+            # Checked against the declared sizes before anything is inflated
+            if total > max_bytes:
+                raise ValueError(f'Archive expands to more than {max_bytes // (1024 * 1024)} MB')
+
+            people.setdefault(person, []).append((os.path.basename(info.filename), archive.read(info)))
+    return people
@@ -0,0 +1,510 @@
+"""
+Face Gallery Module
+Keeps every enrolled face encoding in one contiguous float32 matrix so that
+all probe faces of a frame are matched with a single batched distance computation.
+An optional ANN index (utils/face_index.py) narrows the search on very large galleries,
+and an optional FaceStore (utils/face_store.py) persists every change.
+
+Every encoding is an entry with a stable id. Entries are added at the end of
+the matrix and deleted by moving the last row into the freed slot
+(swap-remove), so add / update / delete are O(1) regardless of gallery size.
+The gallery is shared by all request threads: recognition takes a read lock
+and never blocks other recognitions; mutations take the write lock only for
+the in-memory swap.
+
+The ANN index is (re)trained on a background thread after a load or an
+enrollment grows the gallery enough: a fresh index is trained on a snapshot
+of the encodings, the writes made meanwhile are replayed onto it, and it is
+swapped in under a brief write lock. Until then recognition keeps using the
+current index, or exact search before the first training.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer; waiting writers block new readers
+    so a steady stream of recognitions cannot starve enrollment
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class FaceGallery:
+    def __init__(self, dimension=128, index=None, store=None, auto_train=True):
+        """
+        Initialize an empty gallery of `dimension`-d face encodings
+
+        index:      optional approximate index (e.g. IVFPQIndex); None means exact brute force
+        store:      optional FaceStore that every add / update / delete is written through to
+        auto_train: train the index in the background when loads and enrollments
+                    make it need training; otherwise only train_index() does
+        """
+        self.dimension = dimension
+        self.index = index
+        self.store = store
+        self.auto_train = auto_train
+
+        # Background training: index operations made while a replacement index
+        # trains are logged here (None when no training runs) and replayed onto it
+        self._training = None
+        self._training_lock = threading.Lock()
+        self._pending_ops = None
+        self._pending_pid = None
+        self._epoch = 0
+
+        self.lock = ReadWriteLock()
+        # Serializes writers end to end (store I/O included) without blocking readers
+        self.write_mutex = threading.Lock()
+
+        # Bumped on every mutation so callers can invalidate derived state
+        self.version = 0
+
+        self._reset()
+
+    def _reset(self):
+        if self.index is not None:
+            self.index.reset()
+        # A training snapshot of the old contents must not be swapped in
+        self._epoch += 1
+        self._pending_ops = None
+
+        # Over-allocated row buffers; rows [0, size) are live.
+        # Row i holds the encoding of entry _ids[i], which belongs to _names[i].
+        self.size = 0
+        self._matrix = np.empty((0, self.dimension), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._names = np.empty(0, dtype=object)
+        self._ids = np.empty(0, dtype=np.int64)
+
+        self._rows = {}       # entry id -> row
+        self._by_name = {}    # name -> {entry id: None}, in enrollment order
+        self._next_id = 0
+
+    @property
+    def encodings(self):
+        return self._matrix[:self.size]
+
+    @property
+    def names(self):
+        return self._names[:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def people(self):
+        """
+        Return enrolled identities in enrollment order
+        """
+        with self.lock.read_lock():
+            return list(self._by_name)
+
+    def entries(self, name):
+        """
+        Return the entry ids of a person
+        """
+        with self.lock.read_lock():
+            return list(self._by_name.get(name, ()))
+
+    def _as_matrix(self, encodings):
+        matrix = np.asarray(encodings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f'Expected {self.dimension}-d face encodings, got {matrix.shape[1]}-d')
+        return matrix
+
+    def _reserve(self, needed):
+        if needed <= len(self._matrix):
+            return
+
+        capacity = max(needed, 2 * len(self._matrix), 64)
+        matrix = np.empty((capacity, self.dimension), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        names = np.empty(capacity, dtype=object)
+        ids = np.empty(capacity, dtype=np.int64)
+
+        matrix[:self.size] = self._matrix[:self.size]
+        sq_norms[:self.size] = self._sq_norms[:self.size]
+        names[:self.size] = self._names[:self.size]
+        ids[:self.size] = self._ids[:self.size]
+
+        self._matrix, self._sq_norms, self._names, self._ids = matrix, sq_norms, names, ids
+
+    def _append(self, ids, names, matrix):
+        """Append rows in memory; caller holds the write lock"""
+        start, end = self.size, self.size + len(matrix)
+        self._reserve(end)
+
+        self._matrix[start:end] = matrix
+        self._sq_norms[start:end] = np.einsum('ij,ij->i', matrix, matrix)
+        self._names[start:end] = names
+        self._ids[start:end] = ids
+
+        for row, (entry_id, name) in enumerate(zip(ids, names), start):
+            self._rows[entry_id] = row
+            self._by_name.setdefault(name, {})[entry_id] = None
+            self._next_id = max(self._next_id, entry_id + 1)
+
+        self.size = end
+
+        self._index_op('add', np.array(matrix, dtype=np.float32))
+
+    def _swap_remove(self, entry_id):
+        """Delete one entry in O(1); caller holds the write lock"""
+        row = self._rows.pop(entry_id)
+        name = self._names[row]
+        last = self.size - 1
+
+        if row != last:
+            moved_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self._names[row] = self._names[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+
+        self._names[last] = None
+        self.size = last
+
+        person = self._by_name[name]
+        del person[entry_id]
+        if not person:
+            del self._by_name[name]
+
+        self._index_op('swap_remove', row)
+
+    def add(self, name, encodings):
+        """
+        Add one encoding (1-d) or several encodings (2-d) for a person
+        Returns: list of new entry ids
+        """
+        matrix = self._as_matrix(encodings)
+
+        with self.write_mutex:
+            if self.store is not None:
+                ids = self.store.append(name, matrix)
+            else:
+                ids = list(range(self._next_id, self._next_id + len(matrix)))
+
+            with self.lock.write_lock():
+                self._append(ids, [name] * len(matrix), matrix)
+                self.version += 1
+
+        self._maybe_train()
+        return ids
+
+    def update(self, entry_id, encoding):
+        """
+        Overwrite the encoding of one entry in place
+        Returns: False if the entry does not exist
+        """
+        vector = self._as_matrix(encoding)[0]
+
+        with self.write_mutex:
+            if entry_id not in self._rows:
+                return False
+            if self.store is not None:
+                self.store.update(entry_id, vector)
+
+            with self.lock.write_lock():
+                row = self._rows[entry_id]
+                self._matrix[row] = vector
+                self._sq_norms[row] = vector @ vector
+                self._index_op('update', row, vector.copy())
+                self.version += 1
+
+        return True
+
+    def delete(self, entry_id):
+        """
+        Delete one entry by id
+        Returns: False if the entry does not exist
+        """
+        with self.write_mutex:
+            if entry_id not in self._rows:
+                return False
+            if self.store is not None:
+                self.store.delete([entry_id])
+
+            with self.lock.write_lock():
+                self._swap_remove(entry_id)
+                self.version += 1
+
+        return True
+
+    def remove(self, name):
+        """
+        Remove every encoding of a person
+        Returns: number of encodings removed
+        """
+        with self.write_mutex:
+            ids = list(self._by_name.get(name, ()))
+            if not ids:
+                return 0
+            if self.store is not None:
+                self.store.delete(ids)
+
+            with self.lock.write_lock():
+                for entry_id in ids:
+                    self._swap_remove(entry_id)
+                self.version += 1
+
+        return len(ids)
+
+    def replace(self, name, encodings):
+        """
+        Replace all encodings of a person with new ones
+        Returns: list of new entry ids
+        """
+        matrix = self._as_matrix(encodings)
+
+        with self.write_mutex:
+            old_ids = list(self._by_name.get(name, ()))
+            if self.store is not None:
+                self.store.delete(old_ids)
+                ids = self.store.append(name, matrix)
+            else:
+                ids = list(range(self._next_id, self._next_id + len(matrix)))
+
+            # Readers see either the old or the new encodings, never neither
+            with self.lock.write_lock():
+                for entry_id in old_ids:
+                    self._swap_remove(entry_id)
+                self._append(ids, [name] * len(matrix), matrix)
+                self.version += 1
+
+        self._maybe_train()
+        return ids
+
+    def distances(self, probe_encodings):
+        """
+        Euclidean distances between every probe and every gallery row
+        Returns: (num_probes, num_encodings) float32 matrix
+        """
+        probes = self._as_matrix(probe_encodings)
+
+        with self.lock.read_lock():
+            return self._distances(probes)
+
+    def _distances(self, probes):
+        # ||p - g||^2 = ||p||^2 + ||g||^2 - 2 p.g  -> one GEMM for the whole batch
+        probe_sq = np.einsum('ij,ij->i', probes, probes)
+        sq = probe_sq[:, None] + self._sq_norms[None, :self.size] - 2.0 * (probes @ self.encodings.T)
+        np.maximum(sq, 0, out=sq)
+
+        return np.sqrt(sq)
+
+    def match(self, probe_encodings, tolerance=0.6):
+        """
+        Find the nearest enrolled identity for each probe encoding
+        Returns: list of (name, distance) tuples; name is None when the
+                 nearest encoding is further away than `tolerance`
+        """
+        probes = self._as_matrix(probe_encodings)
+
+        with self.lock.read_lock():
+            if self.size == 0:
+                return [(None, None) for _ in range(len(probes))]
+
+            if self.index is not None and self.index.trained:
+                nearest, nearest_dist = self._match_indexed(probes)
+            else:
+                dist = self._distances(probes)
+                nearest = np.argmin(dist, axis=1)
+                nearest_dist = dist[np.arange(len(probes)), nearest]
+
+            results = []
+            for idx, d in zip(nearest, nearest_dist):
+                if idx < 0:
+                    results.append((None, None))
+                    continue
+                d = float(d)
+                results.append((self._names[idx] if d <= tolerance else None, d))
+
+        return results
+
+    def _index_op(self, operation, *args):
+        """Apply a row change to the index; caller holds the write lock"""
+        if self.index is None:
+            return
+        getattr(self.index, operation)(*args)
+        if self._pending_ops is not None and self._pending_pid == os.getpid():
+            self._pending_ops.append((operation, args))
+
+    def _maybe_train(self):
+        if self.auto_train:
+            self._start_training()
+
+    def train_index(self, wait=True):
+        """
+        Train the index now if it needs it, on a background thread; with
+        wait=True, return once the trained index serves recognition
+        """
+        thread = self._start_training()
+        if thread is not None and wait:
+            thread.join()
+
+    def _start_training(self):
+        """Start (or return the running) training thread; None when not needed"""
+        if self.index is None:
+            return None
+        with self._training_lock:
+            if self._training is not None and self._training.is_alive():
+                return self._training
+            if not self.index.needs_training(self.size):
+                return None
+            self._training = threading.Thread(target=self._train, name='face-index-training', daemon=True)
+            self._training.start()
+            return self._training
+
+    def _train(self):
+        # A reload during training discards the result; train again on the new contents
+        while self._train_once():
+            pass
+
+    def _train_once(self):
+        """Returns: True when the gallery was reloaded meanwhile and training must restart"""
+        # The write mutex keeps writers out while the snapshot is taken;
+        # recognition carries on meanwhile
+        with self.write_mutex:
+            if not self.index.needs_training(self.size):
+                return False
+            snapshot = self.encodings.copy()
+            epoch = self._epoch
+            self._pending_ops, self._pending_pid = [], os.getpid()
+
+        start = time.perf_counter()
+        index = self.index.untrained_copy()
+        try:
+            index.train(snapshot)
+        except Exception as e:
+            print(f"⚠️ Face index training failed: {e}")
+            with self.write_mutex:
+                self._pending_ops = None
+            return False
+
+        with self.write_mutex:
+            if epoch != self._epoch:
+                return True
+            # Catch up with the writes made during training, then swap
+            for operation, args in self._pending_ops:
+                getattr(index, operation)(*args)
+            with self.lock.write_lock():
+                self.index = index
+            self._pending_ops = None
+        print(f"✅ Face index trained on {len(snapshot)} encodings in {time.perf_counter() - start:.1f} s")
+        return False
+
+    def _match_indexed(self, probes):
+        """
+        Ask the ANN index for candidates and re-rank them exactly
+        """
+        nearest = np.full(len(probes), -1, dtype=np.int64)
+        nearest_dist = np.zeros(len(probes), dtype=np.float32)
+
+        for i, probe in enumerate(probes):
+            rows = self.index.search(probe)
+            if len(rows) == 0:
+                continue
+
+            diff = self._matrix[rows] - probe
+            dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+            best = int(np.argmin(dist))
+
+            nearest[i] = rows[best]
+            nearest_dist[i] = dist[best]
+
+        return nearest, nearest_dist
+
+    def load(self):
+        """
+        Replace the gallery contents with the live entries of the store
+        """
+        ids, names, encodings = self.store.load()
+        self.load_arrays(names, encodings, ids)
+
+    def load_dict(self, known_faces):
+        """
+        Load the known_faces.json layout: {name: encoding} or {name: [encoding, ...]}
+        """
+        names, rows = [], []
+        for name, value in known_faces.items():
+            matrix = self._as_matrix(value)
+            names.extend([name] * len(matrix))
+            rows.append(matrix)
+
+        self.load_arrays(names, np.vstack(rows) if rows else np.empty((0, self.dimension)))
+
+    def load_arrays(self, names, encodings, ids=None):
+        """
+        Replace the in-memory contents with parallel name / encoding (/ id) arrays;
+        the store, if any, is not written
+        """
+        matrix = self._as_matrix(encodings) if len(names) else np.empty((0, self.dimension), dtype=np.float32)
+        if ids is None:
+            ids = list(range(len(names)))
+
+        with self.write_mutex, self.lock.write_lock():
+            self._reset()
+            # Build the matrix in one go instead of growing it row by row
+            self._append(list(ids), list(names), matrix)
+            self.version += 1
+
+        self._maybe_train()
+
+    def to_dict(self):
+        """
+        Serialize to the known_faces.json layout; people with a single encoding
+        keep the original flat list format
+        """
+        known_faces = {}
+
+        with self.lock.read_lock():
+            for name, ids in self._by_name.items():
+                rows = self._matrix[[self._rows[entry_id] for entry_id in ids]].astype(float)
+                known_faces[name] = rows[0].tolist() if len(rows) == 1 else rows.tolist()
+
+        return known_faces
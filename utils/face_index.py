@@ -0,0 +1,311 @@
+"""
+Approximate Nearest-Neighbour Face Index
+IVF-PQ (inverted file + product quantization) written in NumPy for galleries
+with 10^5-10^6 identities. The index only proposes candidates; FaceGallery
+re-ranks them exactly against its float32 matrix.
+
+The inverted lists are maintained in place: every add, update and
+swap-remove touches only the lists of the rows involved, so a steady
+trickle of enrollments never forces a regrouping of the whole gallery.
+"""
+
+import numpy as np
+
+
+def squared_distances(a, b, b_sq_norms=None):
+    """
+    Squared Euclidean distances between the rows of `a` and the rows of `b`
+    """
+    if b_sq_norms is None:
+        b_sq_norms = np.einsum('ij,ij->i', b, b)
+    a_sq_norms = np.einsum('ij,ij->i', a, a)
+    sq = a_sq_norms[:, None] + b_sq_norms[None, :] - 2.0 * (a @ b.T)
+    np.maximum(sq, 0, out=sq)
+    return sq
+
+
+def nearest_centroid(data, centroids, chunk_size=8192):
+    """
+    Index of the nearest centroid for every row, computed in chunks to bound memory
+    """
+    centroid_sq_norms = np.einsum('ij,ij->i', centroids, centroids)
+    assignment = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        assignment[start:start + chunk_size] = np.argmin(
+            squared_distances(chunk, centroids, centroid_sq_norms), axis=1)
+    return assignment
+
+
+def kmeans(data, k, iterations=20, seed=0):
+    """
+    Plain Lloyd's k-means; returns (k, d) float32 centroids
+    """
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=np.float32)
+    k = min(k, len(data))
+
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = nearest_centroid(data, centroids)
+
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, data)
+
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+        # Re-seed empty clusters from random points so no list stays unused
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+
+    return centroids
+
+
+class IVFPQIndex:
+    def __init__(self, nlist=256, m=16, nprobe=8, rerank_k=32,
+                 min_train_size=None, max_train_size=65536, retrain_growth=4.0, seed=0):
+        """
+        Initialize an untrained IVF-PQ index
+
+        nlist:    number of coarse clusters (inverted lists)
+        m:        number of PQ sub-quantizers; the encoding dimension must divide by m
+        nprobe:   lists visited per query - the main recall/latency knob
+        rerank_k: approximate candidates handed back for exact re-ranking
+        """
+        self.nlist = nlist
+        self.m = m
+        self.nprobe = nprobe
+        self.rerank_k = rerank_k
+        self.min_train_size = min_train_size or nlist * 39
+        self.max_train_size = max_train_size
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+        self.reset()
+
+    def untrained_copy(self):
+        """A new, empty index with the same settings (to train off to the side)"""
+        return IVFPQIndex(self.nlist, self.m, self.nprobe, self.rerank_k, self.min_train_size,
+                          self.max_train_size, self.retrain_growth, self.seed)
+
+    def reset(self):
+        """Drop the trained quantizers and every encoded row"""
+        self.coarse_centroids = None
+        self.pq_codebooks = None
+        self.pq_sq_norms = None
+        self.pq_codebooks_t = None
+        self.trained_size = 0
+
+        # Parallel to the gallery rows: inverted list id and PQ code of each row,
+        # kept in over-allocated buffers so appends are amortized O(1)
+        self.size = 0
+        self._list_ids = np.empty(0, dtype=np.int32)
+        self._codes = np.empty((0, self.m), dtype=np.uint8)
+
+        # Inverted lists: _members[l][:_lengths[l]] are the rows of list l, and
+        # _positions[row] is the slot of the row in its list
+        self._members = [np.empty(0, dtype=np.int64) for _ in range(self.nlist)]
+        self._lengths = np.zeros(self.nlist, dtype=np.int64)
+        self._positions = np.empty(0, dtype=np.int64)
+
+    @property
+    def list_ids(self):
+        return self._list_ids[:self.size]
+
+    @property
+    def codes(self):
+        return self._codes[:self.size]
+
+    @property
+    def trained(self):
+        return self.coarse_centroids is not None
+
+    def needs_training(self, size):
+        """
+        Whether a gallery of `size` rows should (re)train the index
+        """
+        if size < self.min_train_size:
+            return False
+        if not self.trained:
+            return True
+        return size > self.trained_size * self.retrain_growth
+
+    def train(self, encodings):
+        """
+        Train the coarse quantizer and the residual PQ codebooks, then encode every row
+        """
+        encodings = np.asarray(encodings, dtype=np.float32)
+        dimension = encodings.shape[1]
+        if dimension % self.m:
+            raise ValueError(f'Encoding dimension {dimension} is not divisible by m={self.m}')
+
+        rng = np.random.default_rng(self.seed)
+        sample = encodings
+        if len(sample) > self.max_train_size:
+            sample = sample[rng.choice(len(sample), size=self.max_train_size, replace=False)]
+
+        self.coarse_centroids = kmeans(sample, self.nlist, seed=self.seed)
+
+        assignment = nearest_centroid(sample, self.coarse_centroids)
+        residuals = sample - self.coarse_centroids[assignment]
+
+        dsub = dimension // self.m
+        ksub = min(256, len(sample))
+        self.pq_codebooks = np.stack([
+            kmeans(residuals[:, j * dsub:(j + 1) * dsub], ksub, iterations=10, seed=self.seed + j)
+            for j in range(self.m)
+        ])
+        self.pq_sq_norms = np.einsum('mkd,mkd->mk', self.pq_codebooks, self.pq_codebooks)
+        self.pq_codebooks_t = np.ascontiguousarray(self.pq_codebooks.transpose(0, 2, 1))
+
+        self.trained_size = len(encodings)
+        self.size = 0
+        self._lengths[:] = 0
+        self.add(encodings)
+
+    def _encode(self, encodings):
+        list_ids = nearest_centroid(encodings, self.coarse_centroids)
+        residuals = encodings - self.coarse_centroids[list_ids]
+
+        dsub = residuals.shape[1] // self.m
+        codes = np.empty((len(encodings), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = residuals[:, j * dsub:(j + 1) * dsub]
+            codes[:, j] = nearest_centroid(sub, self.pq_codebooks[j])
+
+        return list_ids, codes
+
+    def add(self, encodings):
+        """
+        Encode rows appended to the gallery (no-op until trained)
+        """
+        if not self.trained:
+            return
+
+        list_ids, codes = self._encode(np.asarray(encodings, dtype=np.float32).reshape(-1, self.coarse_centroids.shape[1]))
+
+        needed = self.size + len(list_ids)
+        if needed > len(self._list_ids):
+            capacity = max(needed, 2 * len(self._list_ids), 1024)
+            grown_ids = np.empty(capacity, dtype=np.int32)
+            grown_codes = np.empty((capacity, self.m), dtype=np.uint8)
+            grown_positions = np.empty(capacity, dtype=np.int64)
+            grown_ids[:self.size] = self.list_ids
+            grown_codes[:self.size] = self.codes
+            grown_positions[:self.size] = self._positions[:self.size]
+            self._list_ids, self._codes, self._positions = grown_ids, grown_codes, grown_positions
+
+        self._list_ids[self.size:needed] = list_ids
+        self._codes[self.size:needed] = codes
+        self._add_to_lists(np.arange(self.size, needed), list_ids)
+        self.size = needed
+
+    def _add_to_lists(self, rows, list_ids):
+        """Append rows to the ends of their inverted lists, one slice per list"""
+        order = np.argsort(list_ids, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(list_ids[order])) + 1)
+        for group in groups:
+            if not len(group):
+                continue
+            list_id = list_ids[group[0]]
+            members = self._members[list_id]
+            start = self._lengths[list_id]
+            end = start + len(group)
+            if end > len(members):
+                grown = np.empty(max(end, 2 * len(members), 16), dtype=np.int64)
+                grown[:start] = members[:start]
+                members = self._members[list_id] = grown
+            members[start:end] = rows[group]
+            self._positions[rows[group]] = np.arange(start, end)
+            self._lengths[list_id] = end
+
+    def _remove_from_list(self, row):
+        """Take a row out of its inverted list; the list's last member fills the slot"""
+        list_id = self._list_ids[row]
+        members = self._members[list_id]
+        slot = self._positions[row]
+        last = self._lengths[list_id] - 1
+        moved = members[last]
+        members[slot] = moved
+        self._positions[moved] = slot
+        self._lengths[list_id] = last
+
+    def update(self, row, encoding):
+        """
+        Re-encode a gallery row whose encoding was overwritten in place
+        """
+        if not self.trained:
+            return
+
+        list_ids, codes = self._encode(np.asarray(encoding, dtype=np.float32).reshape(1, -1))
+        self._remove_from_list(row)
+        self._list_ids[row] = list_ids[0]
+        self._codes[row] = codes[0]
+        self._add_to_lists(np.array([row]), list_ids)
+
+    def swap_remove(self, row):
+        """
+        Mirror a gallery swap-remove: the last row moves into `row`
+        """
+        if not self.trained:
+            return
+
+        last = self.size - 1
+        self._remove_from_list(row)
+        if row != last:
+            # The last row takes over the freed row number, in its own list
+            slot = self._positions[last]
+            self._members[self._list_ids[last]][slot] = row
+            self._positions[row] = slot
+            self._list_ids[row] = self._list_ids[last]
+            self._codes[row] = self._codes[last]
+        self.size = last
+
+    def search(self, probe, k=None):
+        """
+        Approximate top-k gallery rows for one probe encoding
+        Returns: array of row indices ordered by approximate distance
+        """
+        k = k or self.rerank_k
+        probe = np.asarray(probe, dtype=np.float32).reshape(1, -1)
+
+        coarse = squared_distances(probe, self.coarse_centroids)[0]
+        nprobe = min(self.nprobe, len(coarse))
+        probed = np.argpartition(coarse, nprobe - 1)[:nprobe]
+
+        sizes = self._lengths[probed]
+        if not sizes.sum():
+            return np.empty(0, dtype=np.int64)
+
+        # Asymmetric distance: one lookup table of residual-to-codeword
+        # distances per probed list, all computed in a single broadcast
+        dsub = probe.shape[1] // self.m
+        residuals = (probe - self.coarse_centroids[probed]).reshape(nprobe, self.m, dsub)
+        tables = (np.einsum('pmd,pmd->pm', residuals, residuals)[:, :, None]
+                  + self.pq_sq_norms[None]
+                  - 2.0 * np.matmul(residuals.transpose(1, 0, 2), self.pq_codebooks_t).transpose(1, 0, 2))
+
+        rows = np.concatenate([self._members[list_id][:size] for list_id, size in zip(probed, sizes)])
+        owner = np.repeat(np.arange(nprobe), sizes)
+        approx = tables[owner[:, None], np.arange(self.m)[None, :], self.codes[rows]].sum(axis=1)
+
+        if len(rows) > k:
+            top = np.argpartition(approx, k - 1)[:k]
+            rows, approx = rows[top], approx[top]
+
+        return rows[np.argsort(approx)]
+
+
+def create_face_index(kind='flat', **options):
+    """
+    Build a face index by name: 'flat' (exact brute force) or 'ivfpq'
+    Returns: index object, or None for brute force
+    """
+    if kind in (None, '', 'flat'):
+        return None
+    if kind == 'ivfpq':
+        return IVFPQIndex(**options)
+    raise ValueError(f'Unknown face index: {kind}')
@@ -0,0 +1,349 @@
+"""
+Face Store Module
+Append-only binary storage for enrolled face encodings.
+
+Layout of the store folder (one "generation" is live at a time):
+    CURRENT               "<generation> <next id>": the live generation and the
+                          id high-water mark at its creation, swapped atomically
+    encodings.<gen>.f32   raw little-endian float32 rows, memory-mapped on load
+    index.<gen>.jsonl     one {"id", "name"} line per row, in row order
+    tombstones.<gen>.log  one deleted entry id per line
+    MIGRATED              record of the one-shot known_faces.json import
+
+Every encoding has a stable entry id. Enrolling appends a row, updating
+appends a newer row with the same id, deleting appends a tombstone.
+Compaction rewrites the live rows into a new generation and only then
+points CURRENT at it, so a crash at any point leaves a complete store.
+It drops tombstones, so CURRENT keeps the next id: ids of deleted entries
+are never issued again, even after a restart.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class FaceStore:
+    def __init__(self, folder, dimension=128, compact_ratio=0.5, compact_min_dead=64):
+        """
+        Initialize the store in `folder` (created if missing)
+
+        compact_ratio:    compact once dead rows exceed this fraction of all rows...
+        compact_min_dead: ...and there are at least this many of them
+        """
+        self.folder = folder
+        self.dimension = dimension
+        self.row_bytes = dimension * 4
+        self.compact_ratio = compact_ratio
+        self.compact_min_dead = compact_min_dead
+        self.lock = threading.Lock()
+
+        os.makedirs(folder, exist_ok=True)
+
+        self.generation = 0
+        self.row_count = 0
+        self.next_id = 0
+        self.live_rows = {}      # entry id -> (row, name) of its latest row
+        self.valid_bytes = {}    # kind -> length of the committed prefix of each file
+
+        self._open()
+
+    def _path(self, kind, generation=None):
+        generation = self.generation if generation is None else generation
+        extension = {'encodings': 'f32', 'index': 'jsonl', 'tombstones': 'log'}[kind]
+        return os.path.join(self.folder, f'{kind}.{generation}.{extension}')
+
+    def _fsync_dir(self):
+        # Make renames durable; not supported on Windows
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self.folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _write_current(self, generation, next_id=0):
+        tmp_path = os.path.join(self.folder, 'CURRENT.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(f'{generation} {next_id}')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.folder, 'CURRENT'))
+        self._fsync_dir()
+
+    def _open(self):
+        """
+        Read CURRENT, recover from torn appends and drop stale generations
+        """
+        current_path = os.path.join(self.folder, 'CURRENT')
+        id_floor = 0
+        if os.path.exists(current_path):
+            with open(current_path) as f:
+                # Stores written before the high-water mark hold the generation only
+                fields = f.read().split()
+            self.generation = int(fields[0]) if fields else 0
+            id_floor = int(fields[1]) if len(fields) > 1 else 0
+        else:
+            self._write_current(self.generation)
+
+        for kind in ('encodings', 'index', 'tombstones'):
+            if not os.path.exists(self._path(kind)):
+                open(self._path(kind), 'ab').close()
+
+        # Index lines are written after their encoding row, so the index is
+        # authoritative; a line without its trailing newline is a torn write
+        records = []
+        line_ends = [0]
+        with open(self._path('index'), 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                record = json.loads(line)
+                records.append((record['id'], record['name']))
+                line_ends.append(line_ends[-1] + len(line))
+
+        encoded_rows = os.path.getsize(self._path('encodings')) // self.row_bytes
+        self.row_count = min(len(records), encoded_rows)
+
+        dead_ids = set()
+        tombstone_bytes = 0
+        with open(self._path('tombstones'), 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                dead_ids.add(int(line))
+                tombstone_bytes += len(line)
+
+        # A later row for the same id supersedes the earlier one (an update)
+        self.live_rows = {}
+        self.next_id = max(id_floor, max(dead_ids) + 1 if dead_ids else 0)
+        for row, (entry_id, name) in enumerate(records[:self.row_count]):
+            self.next_id = max(self.next_id, entry_id + 1)
+            if entry_id not in dead_ids:
+                self.live_rows[entry_id] = (row, name)
+
+        # Anything beyond the last complete record is cut off by the next append
+        self.valid_bytes = {
+            'encodings': self.row_count * self.row_bytes,
+            'index': line_ends[self.row_count],
+            'tombstones': tombstone_bytes,
+        }
+
+        # Leftovers of an interrupted compaction
+        for fname in os.listdir(self.folder):
+            parts = fname.split('.')
+            if len(parts) == 3 and parts[1].isdigit() and int(parts[1]) != self.generation:
+                os.remove(os.path.join(self.folder, fname))
+
+    def _append_file(self, kind, data):
+        """
+        Durably append `data` right after the committed prefix of a file,
+        discarding any torn bytes a failed earlier write left behind
+        """
+        with open(self._path(kind), 'r+b') as f:
+            f.truncate(self.valid_bytes[kind])
+            f.seek(self.valid_bytes[kind])
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.valid_bytes[kind] += len(data)
+
+    @staticmethod
+    def _index_line(entry_id, name):
+        return (json.dumps({'id': entry_id, 'name': name}) + '\n').encode('utf-8')
+
+    def __len__(self):
+        return len(self.live_rows)
+
+    def _read_rows(self, rows):
+        if not rows:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        mapped = np.memmap(self._path('encodings'), dtype='<f4', mode='r',
+                           shape=(self.row_count, self.dimension))
+        encodings = np.array(mapped[np.array(rows)], dtype=np.float32)
+        del mapped
+        return encodings
+
+    def load(self):
+        """
+        Memory-map the encodings file and return the live entries
+        Returns: (ids list, names list, (N, dimension) float32 matrix)
+        """
+        with self.lock:
+            ids = list(self.live_rows)
+            rows = [self.live_rows[entry_id][0] for entry_id in ids]
+            names = [self.live_rows[entry_id][1] for entry_id in ids]
+            return ids, names, self._read_rows(rows)
+
+    def append(self, name, encodings):
+        """
+        Append one or more encodings for a person
+        Returns: list of new entry ids
+        """
+        matrix = np.asarray(encodings, dtype='<f4').reshape(-1, self.dimension)
+
+        with self.lock:
+            new_ids = list(range(self.next_id, self.next_id + len(matrix)))
+            self._append_rows(new_ids, [name] * len(matrix), matrix)
+            return new_ids
+
+    def update(self, entry_id, encoding):
+        """
+        Overwrite the encoding of an existing entry by appending a newer row
+        Returns: False if the entry does not exist
+        """
+        matrix = np.asarray(encoding, dtype='<f4').reshape(1, self.dimension)
+
+        with self.lock:
+            if entry_id not in self.live_rows:
+                return False
+            name = self.live_rows[entry_id][1]
+            self._append_rows([entry_id], [name], matrix)
+            self._maybe_compact()
+            return True
+
+    def _append_rows(self, ids, names, matrix):
+        # Encoding rows first: an index line never points past the end of the data
+        self._append_file('encodings', np.ascontiguousarray(matrix, dtype='<f4').tobytes())
+        self._append_file('index', b''.join(self._index_line(entry_id, name) for entry_id, name in zip(ids, names)))
+
+        for offset, (entry_id, name) in enumerate(zip(ids, names)):
+            self.live_rows[entry_id] = (self.row_count + offset, name)
+            self.next_id = max(self.next_id, entry_id + 1)
+        self.row_count += len(matrix)
+
+    def delete(self, ids):
+        """
+        Tombstone entries by id
+        Returns: number of entries deleted
+        """
+        with self.lock:
+            ids = [entry_id for entry_id in ids if entry_id in self.live_rows]
+            if not ids:
+                return 0
+
+            self._append_file('tombstones', ''.join(f'{entry_id}\n' for entry_id in ids).encode('ascii'))
+
+            for entry_id in ids:
+                del self.live_rows[entry_id]
+
+            self._maybe_compact()
+            return len(ids)
+
+    def _maybe_compact(self):
+        dead = self.row_count - len(self.live_rows)
+        if dead >= self.compact_min_dead and dead > self.row_count * self.compact_ratio:
+            self._compact()
+
+    def compact(self):
+        """
+        Rewrite the live rows into a fresh generation, dropping dead rows
+        """
+        with self.lock:
+            self._compact()
+
+    def _compact(self):
+        new_generation = self.generation + 1
+
+        ids = list(self.live_rows)
+        names = [self.live_rows[entry_id][1] for entry_id in ids]
+        encoding_bytes = self._read_rows([self.live_rows[entry_id][0] for entry_id in ids]).astype('<f4').tobytes()
+        index_bytes = b''.join(self._index_line(entry_id, name) for entry_id, name in zip(ids, names))
+
+        for kind, data in (('encodings', encoding_bytes), ('index', index_bytes), ('tombstones', b'')):
+            with open(self._path(kind, new_generation), 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        # The commit point: before this CURRENT still names the old, intact generation
+        old_generation = self.generation
+        self._write_current(new_generation, self.next_id)
+        self.generation = new_generation
+
+        for kind in ('encodings', 'index', 'tombstones'):
+            try:
+                os.remove(self._path(kind, old_generation))
+            except OSError:
+                pass
+
+        self.row_count = len(ids)
+        self.live_rows = {entry_id: (row, name) for row, (entry_id, name) in enumerate(zip(ids, names))}
+        self.valid_bytes = {'encodings': len(encoding_bytes), 'index': len(index_bytes), 'tombstones': 0}
+
+    def _migration_path(self):
+        return os.path.join(self.folder, 'MIGRATED')
+
+    def migration(self):
+        """The record of the known_faces.json import, or None"""
+        path = self._migration_path()
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def legacy_people(self):
+        """
+        People who still have entries from the known_faces.json import. Those
+        were encoded from BGR frames, while every later enrollment encodes
+        RGB, so they match less reliably until the person is re-enrolled.
+        """
+        record = self.migration()
+        if not record:
+            return []
+        with self.lock:
+            names = [self.live_rows[entry_id][1] for entry_id in record['ids'] if entry_id in self.live_rows]
+        return list(dict.fromkeys(names))
+
+    def _record_migration(self, record):
+        tmp_path = self._migration_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._migration_path())
+        self._fsync_dir()
+
+    def migrate_json(self, json_path):
+        """
+        One-shot import of a legacy known_faces.json into an empty store.
+        The JSON file is left in place; the import is recorded in MIGRATED
+        (source, people, entry ids) so it never runs twice.
+        Returns: number of people imported
+        """
+        if self.migration() is not None:
+            return 0
+
+        # Stores migrated by earlier versions renamed the file instead; their
+        # import went into an empty store, so it holds the first ids
+        renamed = json_path + '.migrated'
+        if self.row_count and os.path.exists(renamed):
+            with open(renamed, 'r') as f:
+                known_faces = json.load(f)
+            rows = sum(len(np.asarray(value, dtype='<f4').reshape(-1, self.dimension)) for value in known_faces.values())
+            self._record_migration({'source': renamed, 'people': len(known_faces), 'ids': list(range(rows))})
+            return 0
+
+        if not os.path.exists(json_path) or self.row_count:
+            return 0
+
+        with open(json_path, 'r') as f:
+            known_faces = json.load(f)
+
+        names, rows = [], []
+        for name, value in known_faces.items():
+            matrix = np.asarray(value, dtype='<f4').reshape(-1, self.dimension)
+            names.extend([name] * len(matrix))
+            rows.append(matrix)
+
+        ids = []
+        if rows:
+            with self.lock:
+                ids = list(range(self.next_id, self.next_id + len(names)))
+                self._append_rows(ids, names, np.vstack(rows))
+
+        self._record_migration({'source': json_path, 'people': len(known_faces), 'ids': ids})
+        return len(known_faces)
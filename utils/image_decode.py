@@ -0,0 +1,190 @@
+"""
+Image Decode Module
+One decode path for every vision route: encoded bytes are decoded once into
+BGR and each engine asks for the colour order and resolution it actually
+uses. Conversions and downscaled copies are computed lazily and cached on
+the DecodedImage, so a request never pays for the same conversion twice.
+
+OpenCV is imported on first decode, so importing this module stays cheap
+when every vision subsystem is disabled.
+"""
+
+import base64
+import struct
+
+import numpy as np
+
+
+# Colour order and longest side each engine works at. Larger frames are
+# shrunk before the heavy work starts.
+ENGINE_PROFILES = {
+    'face': ('rgb', 1024),     # face_recognition / dlib expect RGB
+    'object': ('bgr', 640),    # YOLOv8 letterboxes to 640 anyway
+    'money': ('bgr', 1600),    # INRCurrencyDetector caps the width at 800 itself
+    'ocr': ('gray', 2000),     # Tesseract benefits from resolution
+}
+
+# Reject decompression bombs before allocating the decoded frame
+DEFAULT_MAX_PIXELS = 40_000_000
+
+# cv2.imdecode flags (by name) that let libjpeg decode at 1/2, 1/4 or 1/8 scale
+REDUCED_DECODE_FLAGS = (
+    (8, 'IMREAD_REDUCED_COLOR_8'),
+    (4, 'IMREAD_REDUCED_COLOR_4'),
+    (2, 'IMREAD_REDUCED_COLOR_2'),
+)
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured pixel limit"""
+
+
+def probe_size(image_bytes):
+    """
+    Read (width, height) from a PNG or JPEG header without decoding
+    Returns: (width, height, format) or None if the format is not recognised
+    """
+    if image_bytes[:8] == b'\x89PNG\r\n\x1a\n' and len(image_bytes) >= 24:
+        width, height = struct.unpack('>II', image_bytes[16:24])
+        return width, height, 'png'
+
+    if image_bytes[:2] != b'\xff\xd8':
+        return None
+
+    # Walk the JPEG markers up to the first start-of-frame segment
+    pos = 2
+    length = len(image_bytes)
+    while pos + 9 < length:
+        if image_bytes[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = image_bytes[pos + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+            pos += 1 if marker == 0xFF else 2
+            continue
+
+        segment_length = struct.unpack('>H', image_bytes[pos + 2:pos + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', image_bytes[pos + 5:pos + 9])
+            return width, height, 'jpeg'
+        pos += 2 + segment_length
+
+    return None
+
+
+class DecodedImage:
+    def __init__(self, bgr, source_size=None):
+        """
+        Wrap a decoded BGR frame
+
+        source_size: (width, height) of the uploaded image; differs from the
+                     decoded size when the decoder already downscaled it
+        """
+        self.bgr = bgr
+        height, width = bgr.shape[:2]
+        self.source_size = source_size or (width, height)
+        self._cache = {}
+
+    @property
+    def size(self):
+        """(width, height) of the decoded frame"""
+        return self.bgr.shape[1], self.bgr.shape[0]
+
+    def _converted(self, image, colour):
+        import cv2
+
+        if colour == 'bgr':
+            return image
+        if colour == 'rgb':
+            return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if colour == 'gray':
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        raise ValueError(f'Unknown colour order: {colour}')
+
+    def get(self, colour='bgr', max_side=None):
+        """
+        Return the frame in `colour` order ('bgr', 'rgb' or 'gray'), shrunk so
+        its longest side is at most `max_side`; results are cached
+        Returns: (image, scale) where scale maps returned pixels back to
+                 source pixels (source = returned * scale)
+        """
+        key = (colour, max_side)
+        if key not in self._cache:
+            image = self.bgr
+            longest = max(image.shape[:2])
+            if max_side and longest > max_side:
+                import cv2
+
+                factor = max_side / longest
+                image = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+
+            scale = self.source_size[0] / image.shape[1]
+            self._cache[key] = (self._converted(image, colour), scale)
+
+        return self._cache[key]
+
+    @property
+    def rgb(self):
+        return self.get('rgb')[0]
+
+    @property
+    def gray(self):
+        return self.get('gray')[0]
+
+    def for_engine(self, engine):
+        """
+        Frame in the colour order and resolution an engine works at
+        Returns: (image, scale) - see get()
+        """
+        colour, max_side = ENGINE_PROFILES[engine]
+        return self.get(colour, max_side)
+
+
+def decode_image_bytes(image_bytes, max_pixels=DEFAULT_MAX_PIXELS, engine=None):
+    """
+    Decode encoded image bytes (JPEG/PNG/...) into a DecodedImage
+
+    engine: optional ENGINE_PROFILES key; large JPEGs are then decoded directly
+            at a reduced scale that still covers the engine's resolution
+    """
+    import cv2
+
+    probed = probe_size(image_bytes)
+    source_size = None
+    flags = cv2.IMREAD_COLOR
+
+    if probed:
+        width, height, image_format = probed
+        if width * height > max_pixels:
+            raise ImageTooLargeError(f'Image has {width * height} pixels; the limit is {max_pixels}')
+        source_size = (width, height)
+
+        if engine and image_format == 'jpeg':
+            target = ENGINE_PROFILES[engine][1]
+            for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                if max(width, height) // factor >= target:
+                    flags = getattr(cv2, reduced_flag)
+                    break
+
+    # frombuffer wraps the bytes without copying; imdecode writes BGR directly
+    bgr = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), flags)
+    if bgr is None:
+        raise ValueError('Could not decode image data')
+
+    if probed is None and bgr.shape[0] * bgr.shape[1] > max_pixels:
+        raise ImageTooLargeError(f'Image has {bgr.shape[0] * bgr.shape[1]} pixels; the limit is {max_pixels}')
+
+    # EXIF orientation may have swapped the axes during decode
+    if source_size and (bgr.shape[1] > bgr.shape[0]) != (source_size[0] > source_size[1]):
+        source_size = (source_size[1], source_size[0])
+
+    return DecodedImage(bgr, source_size)
+
+
+def decode_base64_image(image_data, max_pixels=DEFAULT_MAX_PIXELS, engine=None):
+    """
+    Decode a base64 string or data URL into a DecodedImage
+    """
+    if image_data.startswith('data:image'):
+        image_data = image_data.split(',')[1]
+    return decode_image_bytes(base64.b64decode(image_data), max_pixels, engine)
@@ -0,0 +1,162 @@
+"""
+Inference Scheduler Module
+Funnels concurrent requests for one model through a single worker thread
+that groups them into micro-batches. A batch closes when it reaches
+`max_batch_size` items or when its oldest item has waited `max_wait_ms`,
+then runs as one forward pass. Every caller gets a Future for its own item.
+
+One batched call at a time means the model's intra-op threads are never
+oversubscribed by several request threads running inference at once.
+Batches are only held open while there is concurrent load: a lone client
+is dispatched immediately instead of paying `max_wait_ms` on every request.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+def _bucket(value):
+    """Power-of-two histogram bucket: 1, 2, 4, 8, ... (0 stays 0)"""
+    return 1 << (value.bit_length() - 1) if value > 0 else 0
+
+
+class BatchScheduler:
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=15, name='inference'):
+        """
+        Configure the scheduler; its worker thread starts with the first item
+
+        run_batch:      callable(list of items) -> list of results in the same order
+        max_batch_size: largest batch handed to run_batch
+        max_wait_ms:    longest the oldest queued item waits for the batch to fill
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._queue = deque()    # (item, future, enqueued_at)
+        self.closed = False
+        # Whether the last batch saw concurrent requests (worth waiting for more)
+        self._contended = False
+
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = [0] * (self.max_batch_size + 1)
+        self.queue_depths = {}   # power-of-two bucket -> count, sampled on every submit
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+        self._worker_pid = None
+
+    def _ensure_worker(self):
+        # The worker thread does not survive fork(): a forked server worker
+        # starts its own and drops requests queued in the parent
+        if self._worker_pid != os.getpid():
+            self._queue.clear()
+            self._worker_pid = os.getpid()
+            threading.Thread(target=self._run, name=f'{self.name}-scheduler', daemon=True).start()
+
+    def submit(self, item):
+        """
+        Queue one item
+        Returns: concurrent.futures.Future resolved with its result
+        """
+        future = Future()
+        with self._cond:
+            if self.closed:
+                raise RuntimeError(f'{self.name} scheduler is closed')
+            self._ensure_worker()
+            self._queue.append((item, future, time.perf_counter()))
+            bucket = _bucket(len(self._queue))
+            self.queue_depths[bucket] = self.queue_depths.get(bucket, 0) + 1
+            self._cond.notify()
+        return future
+
+    def run(self, item, timeout=None):
+        """Queue one item and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def run_many(self, items, timeout=None):
+        """Queue several items at once and wait for all of their results"""
+        futures = [self.submit(item) for item in items]
+        return [future.result(timeout) for future in futures]
+
+    def close(self):
+        """Stop accepting items; queued items are still processed"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self.closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            # Hold the batch open until it is full or its oldest item has waited long enough
+            deadline = self._queue[0][2] + self.max_wait
+            while self._contended and len(self._queue) < self.max_batch_size and not self.closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            # Callers may have cancelled their futures while queued
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+            try:
+                results = self.run_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f'{self.name} batch returned {len(results)} results for {len(items)} items')
+            except Exception as e:
+                results = None
+                for future in futures:
+                    future.set_exception(e)
+            done = time.perf_counter()
+
+            if results is not None:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+            with self._cond:
+                self._contended = len(batch) > 1 or bool(self._queue)
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] += 1
+                self._wait_total += sum(start - enqueued_at for _, _, enqueued_at in batch)
+                self._run_total += done - start
+
+    def stats(self):
+        """
+        Queue depth and batch size histograms plus average wait / run times
+        """
+        with self._cond:
+            return {
+                'queue_depth': len(self._queue),
+                'queue_depth_histogram': {str(bucket): count for bucket, count in sorted(self.queue_depths.items())},
+                'batch_size_histogram': {str(size): count for size, count in enumerate(self.batch_sizes) if count},
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch_size': round(self.items / self.batches, 2) if self.batches else None,
+                'avg_queue_wait_ms': round(self._wait_total / self.items * 1000, 2) if self.items else None,
+                'avg_batch_ms': round(self._run_total / self.batches * 1000, 2) if self.batches else None,
+            }
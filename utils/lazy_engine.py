@@ -0,0 +1,92 @@
+"""
+Lazy Engine Module
+Wraps an expensive component (a model and the libraries it imports) so
+that it is built on first use instead of when app.py is imported. Loading
+can also be started early on a background thread ("warm-up").
+
+A failed load is remembered: later calls raise EngineUnavailableError at
+once instead of paying for the import or download again on every request.
+"""
+
+import os
+import threading
+import time
+
+
+class EngineUnavailableError(RuntimeError):
+    """Raised when an engine could not be loaded"""
+
+
+class LazyEngine:
+    def __init__(self, name, factory):
+        """
+        name:    label used in status reports and errors
+        factory: callable() -> the loaded component
+        """
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.error = None
+        self.load_ms = None
+        self._loading = False
+        self._lock = threading.Lock()
+        self._lock_pid = os.getpid()
+
+    @property
+    def loaded(self):
+        return self.instance is not None
+
+    def get(self):
+        """
+        Return the component, loading it on first call. Concurrent callers
+        wait for the same load.
+        """
+        if self.instance is not None:
+            return self.instance
+
+        if self._lock_pid != os.getpid():
+            # A lock held by a loading thread at fork() would never be released here
+            self._lock = threading.Lock()
+            self._lock_pid = os.getpid()
+            self._loading = False
+
+        with self._lock:
+            if self.instance is None and self.error is None:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    self.instance = self.factory()
+                except Exception as e:
+                    self.error = f'{type(e).__name__}: {e}'
+                    print(f"⚠️ Could not load {self.name} engine: {self.error}")
+                finally:
+                    self.load_ms = round((time.perf_counter() - start) * 1000, 2)
+                    self._loading = False
+                if self.instance is not None:
+                    print(f"✅ {self.name} engine loaded in {self.load_ms} ms")
+
+        if self.instance is None:
+            raise EngineUnavailableError(f'{self.name} engine unavailable: {self.error}')
+        return self.instance
+
+    def warm(self):
+        """Start loading on a background thread; returns immediately"""
+        if self.instance is None and self.error is None and not self._loading:
+            threading.Thread(target=self._warm, name=f'{self.name}-warm-up', daemon=True).start()
+
+    def _warm(self):
+        try:
+            self.get()
+        except EngineUnavailableError:
+            pass
+
+    def status(self):
+        if self.instance is not None:
+            state = 'ready'
+        elif self.error is not None:
+            state = 'failed'
+        elif self._loading:
+            state = 'loading'
+        else:
+            state = 'idle'
+        return {'state': state, 'load_ms': self.load_ms, 'error': self.error}
@@ -0,0 +1,223 @@
+"""
+Object Tracker Module
+Tracks detections across the frames of a live camera feed so YOLO does not
+have to look at every frame. The full detector runs every `detect_every`
+frames, or straight away when the scene changes; in between, each track's
+box is carried forward by a constant-velocity Kalman filter. Tracks keep a
+stable id while they keep being re-detected, so a client can announce an
+object once instead of on every frame.
+"""
+
+import itertools
+
+import numpy as np
+
+
+# Constant-velocity model over [cx, cy, w, h, vcx, vcy, vw, vh], one step per frame
+TRANSITION = np.eye(8, dtype=np.float32)
+TRANSITION[:4, 4:] = np.eye(4, dtype=np.float32)
+MEASUREMENT = np.eye(4, 8, dtype=np.float32)
+PROCESS_NOISE = np.diag([1, 1, 1, 1, 0.5, 0.5, 0.25, 0.25]).astype(np.float32)
+MEASUREMENT_NOISE = np.diag([10, 10, 20, 20]).astype(np.float32)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Intersection over union of every [x, y, w, h] box in `boxes_a`
+    against every box in `boxes_b`
+    Returns: (len(boxes_a), len(boxes_b)) float32 matrix
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    left = np.maximum(a[:, None, 0], b[None, :, 0])
+    top = np.maximum(a[:, None, 1], b[None, :, 1])
+    right = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    bottom = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+
+    intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class Track:
+    def __init__(self, track_id, label, confidence, box):
+        """
+        Start a track from one detection box [x, y, w, h]
+        """
+        self.id = track_id
+        self.label = label
+        self.confidence = confidence
+        self.missed = 0    # consecutive detection passes without a matching box
+
+        x, y, w, h = box
+        self.state = np.array([x + w / 2, y + h / 2, w, h, 0, 0, 0, 0], dtype=np.float32)
+        # Position is known from the first box, velocity is not
+        self.covariance = np.diag([10, 10, 10, 10, 1000, 1000, 1000, 1000]).astype(np.float32)
+
+    def predict(self):
+        """Advance the box by one frame"""
+        # Never let the predicted box shrink below zero size
+        for i in (2, 3):
+            if self.state[i] + self.state[i + 4] <= 1:
+                self.state[i + 4] = 0
+
+        self.state = TRANSITION @ self.state
+        self.covariance = TRANSITION @ self.covariance @ TRANSITION.T + PROCESS_NOISE
+
+    def correct(self, box, confidence):
+        """Fold a matched detection box into the estimate"""
+        x, y, w, h = box
+        residual = np.array([x + w / 2, y + h / 2, w, h], dtype=np.float32) - MEASUREMENT @ self.state
+        innovation = MEASUREMENT @ self.covariance @ MEASUREMENT.T + MEASUREMENT_NOISE
+        gain = self.covariance @ MEASUREMENT.T @ np.linalg.inv(innovation)
+
+        self.state = self.state + gain @ residual
+        self.covariance = (np.eye(8, dtype=np.float32) - gain @ MEASUREMENT) @ self.covariance
+        self.confidence = confidence
+        self.missed = 0
+
+    @property
+    def box(self):
+        cx, cy, w, h = self.state[:4]
+        return [cx - w / 2, cy - h / 2, w, h]
+
+    def as_detection(self, frame_width, frame_height):
+        """detect()-style dict with the box clipped to the frame"""
+        x, y, w, h = self.box
+        x1, y1 = max(0, int(round(x))), max(0, int(round(y)))
+        x2, y2 = min(frame_width, int(round(x + w))), min(frame_height, int(round(y + h)))
+
+        return {
+            'label': self.label,
+            'confidence': self.confidence,
+            'box': [x1, y1, max(0, x2 - x1), max(0, y2 - y1)],
+            'track_id': self.id,
+        }
+
+
+class ObjectTracker:
+    def __init__(self, detect, detect_every=5, scene_change_threshold=20.0,
+                 iou_threshold=0.3, max_missed=2):
+        """
+        Track the objects found in one camera feed
+
+        detect:                 callable(image) -> ObjectDetector.detect() result
+
+        detect_every:           run the detector on every N-th frame (1 = every frame)
+        scene_change_threshold: mean absolute difference (0-255) of a 32x32 grey
+                                thumbnail that forces an early detection pass
+        iou_threshold:          minimum IoU for a detection to continue a track
+        max_missed:             detection passes a track may go unmatched before it is dropped
+        """
+        self.detect = detect
+        self.detect_every = max(1, detect_every)
+        self.scene_change_threshold = scene_change_threshold
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reset()
+
+    def reset(self):
+        """Forget every track; the next frame runs the detector"""
+        self.tracks = []
+        self._track_ids = itertools.count(1)
+        self._reference = None          # thumbnail of the last detected frame
+        self.frames_since_detection = 0
+        self.frames = 0
+        self.detections_run = 0
+
+    @staticmethod
+    def _thumbnail(image):
+        import cv2
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _should_detect(self, thumbnail):
+        if self._reference is None or self.frames_since_detection + 1 >= self.detect_every:
+            return True
+        return float(np.mean(np.abs(thumbnail - self._reference))) > self.scene_change_threshold
+
+    def _associate(self, detections):
+        """
+        Match detections to tracks greedily by IoU (same label only)
+        Returns: ids of the tracks started for unmatched detections
+        """
+        matched_tracks, matched_detections = set(), set()
+
+        if self.tracks and detections:
+            iou = iou_matrix([track.box for track in self.tracks], [d['box'] for d in detections])
+            same_label = np.array([[track.label == d['label'] for d in detections] for track in self.tracks])
+            iou[~same_label] = 0
+
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                t, d = np.unravel_index(flat, iou.shape)
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_detections:
+                    continue
+                self.tracks[t].correct(detections[d]['box'], detections[d]['confidence'])
+                matched_tracks.add(t)
+                matched_detections.add(d)
+
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+            if track.missed <= self.max_missed:
+                survivors.append(track)
+        self.tracks = survivors
+
+        new_track_ids = []
+        for d, detection in enumerate(detections):
+            if d not in matched_detections:
+                track = Track(next(self._track_ids), detection['label'], detection['confidence'], detection['box'])
+                self.tracks.append(track)
+                new_track_ids.append(track.id)
+
+        return new_track_ids
+
+    def update(self, image):
+        """
+        Track objects in the next frame of the feed
+
+        Args:
+            image: OpenCV BGR image (numpy array), same resolution every frame
+
+        Returns:
+            dict: the detect() schema with a stable 'track_id' on every detection, plus
+                  'new_track_ids' (tracks that appeared on this frame) and
+                  'detected' (whether the detector ran on this frame)
+        """
+        self.frames += 1
+        thumbnail = self._thumbnail(image)
+
+        for track in self.tracks:
+            track.predict()
+
+        new_track_ids = []
+        detected = self._should_detect(thumbnail)
+        if detected:
+            result = self.detect(image)
+            if not result['success']:
+                return dict(result, new_track_ids=[], detected=True)
+
+            self.detections_run += 1
+            new_track_ids = self._associate(result['detections'])
+            self._reference = thumbnail
+            self.frames_since_detection = 0
+        else:
+            self.frames_since_detection += 1
+
+        height, width = image.shape[:2]
+        # Tracks that missed the last detection pass are kept for re-matching but not reported
+        detections = [track.as_detection(width, height) for track in self.tracks if not track.missed]
+        detections = [d for d in detections if d['box'][2] > 0 and d['box'][3] > 0]
+
+        return {
+            'success': True,
+            'detections': detections,
+            'new_track_ids': new_track_ids,
+            'detected': detected,
+            'message': f'Tracking {len(detections)} object(s)'
+        }
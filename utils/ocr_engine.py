@@ -0,0 +1,158 @@
+"""
+OCR Engine Module
+One interface over the two ways this app can run Tesseract:
+
+- 'tesserocr':   in-process bindings to the Tesseract API. A bounded pool of
+                 initialised API handles is shared by all threads: each call
+                 checks one out and returns it, so the language data is
+                 loaded at most `handles` times, however many threads the
+                 server uses. The handles are released on shutdown.
+- 'pytesseract': the tesseract command line tool. Every call writes a temp
+                 image and starts a tesseract process.
+
+create_ocr_engine('auto') uses tesserocr when it is installed and falls
+back to pytesseract otherwise. tesserocr is optional and is not in
+requirements.txt: building it needs the Tesseract development libraries
+(`pip install tesserocr`).
+"""
+
+import atexit
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import cv2
+
+
+class TesserocrEngine:
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', handles=4):
+        """
+        lang:    Tesseract language(s)
+        handles: most API handles kept; more concurrent calls wait for one
+        """
+        import tesserocr
+
+        self.tesserocr = tesserocr
+        self.lang = lang
+        self.handles = max(1, handles)
+        self._reset()
+        # Fail here, not on the first request, when the language data is missing
+        with self._checkout():
+            pass
+        atexit.register(self.close)
+
+    def _reset(self):
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _checkout(self):
+        """
+        Lend an API handle to one call (the API is not thread-safe). A new
+        handle is created while fewer than `handles` exist; after that,
+        callers wait for one to be returned.
+        """
+        if self._pid != os.getpid():
+            # A forked copy must not share its parent's handles
+            self._reset()
+        try:
+            api = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.handles
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    api = self.tesserocr.PyTessBaseAPI(lang=self.lang)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                api = self._idle.get()
+        try:
+            yield api
+        finally:
+            self._idle.put(api)
+
+    def close(self):
+        """End the idle handles; handles still lent out are not reused afterwards"""
+        if self._pid != os.getpid():
+            return
+        idle, self._idle = self._idle, queue.Queue()
+        with self._lock:
+            self._created = 0
+        while True:
+            try:
+                idle.get_nowait().End()
+            except queue.Empty:
+                return
+
+    def image_to_string(self, image, psm=3, whitelist=None):
+        with self._checkout() as api:
+            return self._read(api, image, psm, whitelist)
+
+    @staticmethod
+    def _read(api, image, psm, whitelist):
+        api.SetPageSegMode(psm)
+        api.SetVariable('tessedit_char_whitelist', whitelist or '')
+
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+
+class PytesseractEngine:
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng'):
+        import pytesseract
+
+        self.pytesseract = pytesseract
+        self.lang = lang
+
+    def image_to_string(self, image, psm=3, whitelist=None):
+        config = f'--psm {psm}'
+        if whitelist:
+            config += f' -c tessedit_char_whitelist={whitelist}'
+        return self.pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+
+OCR_ENGINES = {
+    'tesserocr': TesserocrEngine,
+    'pytesseract': PytesseractEngine,
+}
+
+
+def create_ocr_engine(name='auto', lang='eng', handles=4):
+    """
+    Create an OCR engine by name: 'auto', 'tesserocr' or 'pytesseract'
+    'auto' prefers tesserocr and falls back to pytesseract
+    handles: size of tesserocr's API handle pool
+    Returns: engine with image_to_string(image, psm=3, whitelist=None) -> str
+    """
+    if name == 'auto':
+        try:
+            return TesserocrEngine(lang, handles)
+        except Exception as e:
+            # ImportError when the bindings are missing, RuntimeError when tessdata is
+            print(f"⚠️ tesserocr unavailable ({e}); using pytesseract")
+            return PytesseractEngine(lang)
+
+    if name not in OCR_ENGINES:
+        raise ValueError(f'Unknown OCR engine: {name}')
+    if name == 'tesserocr':
+        return TesserocrEngine(lang, handles)
+    return OCR_ENGINES[name](lang)
@@ -0,0 +1,201 @@
+"""
+Result Cache Module
+Remembers the results of recently seen frames so retries, double taps and
+a camera resting on the same page or note do not rerun the engines.
+
+- Keys: a BLAKE2 hash of the decoded frame's pixels (plus its shape), so
+  only byte-identical frames share an entry.
+- Near-duplicates: opt-in (`near_distance` > 0) perceptual hash per frame,
+  a 256-bit luminance dHash plus a 192-bit colour layout per chroma channel.
+  A lookup that misses the exact key reuses the newest entry whose hash
+  differs in at most `near_distance` bits. Off by default: even at this
+  size, pages of similar text can land a few bits apart.
+- Limits: entries expire after `ttl` seconds and the least recently used
+  entry is dropped beyond `max_entries`.
+- Versions: an entry can be stored with a version (e.g. the face gallery's)
+  and only answers lookups made with the same version.
+
+Results are deep-copied in and out, so callers may mutate what they get.
+OpenCV is only imported by the perceptual hash.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_hash(image):
+    """Hash of an image's shape and pixels"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(image.shape).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def dhash(channel, size=8):
+    """
+    Difference hash of one channel: size*size bits, one per horizontally
+    adjacent pixel pair of a (size+1)xsize thumbnail, set where the value
+    increases to the right
+    """
+    import cv2
+
+    thumbnail = cv2.resize(channel, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def colour_layout(channel, size=8, levels=(112, 128, 144)):
+    """
+    Absolute colour of one chroma channel: a size x size thumbnail with every
+    cell thermometer-coded against `levels`, so the Hamming distance between
+    two cells counts the levels that separate them
+    """
+    import cv2
+
+    thumbnail = cv2.resize(channel, (size, size), interpolation=cv2.INTER_AREA)
+    bits = np.stack([thumbnail > level for level in levels], axis=-1).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def perceptual_hash(image, size=16, chroma_size=8):
+    """
+    Colour-aware hash: a size*size-bit luminance dHash followed by the colour
+    layout of both YCrCb chroma channels (3 bits per cell), so frames that
+    look alike in grey but differ in colour (e.g. banknotes) hash apart.
+    Grey frames get the luminance part only.
+    """
+    if image.ndim == 2:
+        return dhash(image, size)
+    import cv2
+
+    luma, cr, cb = cv2.split(cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb))
+    chroma_bits = 3 * chroma_size * chroma_size
+    return ((dhash(luma, size) << (2 * chroma_bits))
+            | (colour_layout(cr, chroma_size) << chroma_bits) | colour_layout(cb, chroma_size))
+
+
+def parse_cache_settings(spec, defaults):
+    """
+    Parse 'ocr=60:128:4,object=0' into {task: (ttl, max_entries, near_distance)}
+    starting from `defaults`; missing fields keep their default, a ttl of 0
+    disables the cache for that task
+    """
+    settings = dict(defaults)
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        task, _, values = part.partition('=')
+        task = task.strip()
+        ttl, max_entries, near_distance = settings.get(task, (0, 128, 0))
+        fields = values.split(':') + ['', '']
+        ttl = float(fields[0]) if fields[0] else ttl
+        max_entries = int(fields[1]) if fields[1] else max_entries
+        near_distance = int(fields[2]) if fields[2] else near_distance
+        settings[task] = (ttl, max_entries, near_distance)
+    return {task: values for task, values in settings.items() if values[0] > 0}
+
+
+class ResultCache:
+    def __init__(self, name, ttl=30.0, max_entries=128, near_distance=0):
+        """
+        name:          label for stats
+        ttl:           seconds an entry stays valid
+        max_entries:   LRU size limit
+        near_distance: largest perceptual-hash Hamming distance (out of 640 bits
+                       for colour frames) reused for near-duplicates;
+                       0, the default, only reuses identical frames
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.near_distance = near_distance
+
+        self._entries = OrderedDict()    # key -> (result, expires_at, phash, version)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def keys_for(self, image):
+        """(content hash, perceptual hash or None) of a frame"""
+        return content_hash(image), perceptual_hash(image) if self.near_distance else None
+
+    def get(self, key, phash=None, version=None):
+        """
+        Look up a frame by content hash, then by perceptual hash
+        Returns: a copy of the cached result, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires_at, _, entry_version = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    self.expired += 1
+                elif entry_version != version:
+                    del self._entries[key]
+                    self.stale += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(result)
+
+            if phash is not None:
+                # Newest first: the most recent look at the scene wins
+                for near_key, (result, expires_at, entry_phash, entry_version) in reversed(self._entries.items()):
+                    if (expires_at > now and entry_version == version and entry_phash is not None
+                            and (phash ^ entry_phash).bit_count() <= self.near_distance):
+                        self._entries.move_to_end(near_key)
+                        self.near_hits += 1
+                        return copy.deepcopy(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result, phash=None, version=None):
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(result), time.monotonic() + self.ttl, phash, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, image, compute, version=None):
+        """
+        Return the cached result for `image`, or compute(image) and cache it
+        version: entries stored under another version never answer
+        """
+        key, phash = self.keys_for(image)
+        result = self.get(key, phash, version)
+        if result is None:
+            result = compute(image)
+            self.put(key, result, phash, version)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl,
+                'near_distance': self.near_distance,
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.near_hits) / lookups, 3) if lookups else None,
+                'expired': self.expired,
+                'stale': self.stale,
+                'evictions': self.evictions,
+            }
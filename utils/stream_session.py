@@ -0,0 +1,127 @@
+"""
+Stream Session Module
+Continuous detection over a persistent connection. Frames arrive faster than
+inference can keep up with, so a session holds at most one pending frame:
+a newer frame replaces an unprocessed one (latest-frame-wins) and the
+worker thread always runs on the freshest view of the scene.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class DetectionStream:
+    def __init__(self, process, send, window=30):
+        """
+        Start a session worker
+
+        process: callable(frame_bytes) -> result dict, run on the worker thread
+        send:    callable(message dict) that pushes a result to the client;
+                 only ever called from the worker thread
+        window:  number of recent frames FPS and latency are averaged over
+        """
+        self.process = process
+        self.send = send
+
+        self._cond = threading.Condition()
+        self._pending = None    # (seq, received_at, frame_bytes) of the newest unprocessed frame
+        self.closed = False
+
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.started_at = time.perf_counter()
+        self._completed_at = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._inference = deque(maxlen=window)
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, frame_bytes):
+        """
+        Queue a frame, replacing the pending one if the worker has not reached it
+        Returns: sequence number of the frame (1-based, in arrival order)
+        """
+        with self._cond:
+            if self.closed:
+                return None
+            self.received += 1
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (self.received, time.perf_counter(), frame_bytes)
+            self._cond.notify()
+            return self.received
+
+    def close(self):
+        """Stop the worker; a frame being processed is finished but not sent"""
+        with self._cond:
+            self.closed = True
+            self._pending = None
+            self._cond.notify()
+
+    def _next_frame(self):
+        with self._cond:
+            while self._pending is None and not self.closed:
+                self._cond.wait()
+            if self.closed:
+                return None
+            frame, self._pending = self._pending, None
+            return frame
+
+    def _run(self):
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return
+
+            seq, received_at, frame_bytes = frame
+            start = time.perf_counter()
+            try:
+                message = dict(self.process(frame_bytes))
+            except Exception as e:
+                message = {'success': False, 'error': str(e)}
+            done = time.perf_counter()
+
+            with self._cond:
+                if self.closed:
+                    return
+                self.processed += 1
+                self._completed_at.append(done)
+                self._latencies.append((done - received_at) * 1000)
+                self._inference.append((done - start) * 1000)
+                metrics = self._metrics()
+
+            message.update({'type': 'detections', 'seq': seq, 'metrics': metrics})
+            try:
+                self.send(message)
+            except Exception:
+                # The client went away; the receive loop notices and cleans up
+                self.close()
+                return
+
+    def _metrics(self):
+        completed = self._completed_at
+        fps = 0.0
+        if len(completed) > 1 and completed[-1] > completed[0]:
+            fps = (len(completed) - 1) / (completed[-1] - completed[0])
+
+        return {
+            'fps': round(fps, 2),
+            # Server side end to end: frame received -> result ready, queueing included
+            'latency_ms': round(sum(self._latencies) / len(self._latencies), 2) if self._latencies else None,
+            'inference_ms': round(sum(self._inference) / len(self._inference), 2) if self._inference else None,
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+        }
+
+    def metrics(self):
+        """
+        Per-session counters and FPS / latency averaged over the recent window
+        """
+        with self._cond:
+            metrics = self._metrics()
+        metrics['uptime_s'] = round(time.perf_counter() - self.started_at, 1)
+        return metrics
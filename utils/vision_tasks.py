@@ -0,0 +1,86 @@
+"""
+Vision Tasks Module
+The CPU-bound engines behind the vision routes as plain functions of a
+decoded frame, so the same code runs inside the Flask process or in a
+worker process (utils/worker_pool.py). Each loader imports its
+dependencies only when it is called.
+"""
+
+import os
+
+# Tesseract binding used by OCR and the currency detector: auto (tesserocr when
+# installed, else pytesseract), tesserocr or pytesseract. Worker processes
+# inherit the setting through the environment.
+OCR_ENGINE = os.environ.get('BLINDGO_OCR_ENGINE', 'auto')
+# tesserocr API handles per engine (each holds its own copy of the language
+# data); concurrent OCR calls beyond this wait for a free handle
+OCR_HANDLES = int(os.environ.get('BLINDGO_OCR_HANDLES', 4))
+
+# Currency preprocessing profile: auto (chosen per frame from its noise and
+# blur), fast, balanced or quality (see utils/currency_detector.py)
+MONEY_PROFILE = os.environ.get('BLINDGO_MONEY_PROFILE', 'auto')
+
+# Face detection tier: fast (Haar), balanced (dlib HOG) or accurate (YuNet).
+# BLINDGO_FACE_DETECTOR and BLINDGO_FACE_DETECT_SIDE override the tier's
+# detector and detection size (see utils/face_detector.py). Only the
+# BLINDGO_MAX_FACES largest faces of a frame are encoded (0 = all).
+FACE_TIER = os.environ.get('BLINDGO_FACE_TIER', 'balanced')
+FACE_DETECTOR = os.environ.get('BLINDGO_FACE_DETECTOR') or None
+FACE_DETECT_SIDE = int(os.environ.get('BLINDGO_FACE_DETECT_SIDE', 0)) or None
+MAX_FACES = int(os.environ.get('BLINDGO_MAX_FACES', 10))
+
+# Face encoding quality/latency: BLINDGO_FACE_LANDMARKS picks the 5 or 68
+# point landmark model, BLINDGO_FACE_JITTERS averages that many perturbed
+# crops per encoding, BLINDGO_FACE_THREADS encodes frames of a batch in
+# parallel (see utils/face_embedder.py)
+FACE_LANDMARKS = os.environ.get('BLINDGO_FACE_LANDMARKS', '5')
+FACE_JITTERS = int(os.environ.get('BLINDGO_FACE_JITTERS', 1))
+FACE_THREADS = int(os.environ.get('BLINDGO_FACE_THREADS', 1))
+
+
+def load_ocr():
+    """Returns: callable(gray image) -> recognised text"""
+    import cv2
+    from utils.ocr_engine import create_ocr_engine
+
+    engine = create_ocr_engine(OCR_ENGINE, handles=OCR_HANDLES)
+
+    def ocr(gray):
+        return engine.image_to_string(cv2.medianBlur(gray, 3)).strip()
+
+    return ocr
+
+
+def load_money():
+    """Returns: callable(BGR image) -> INRCurrencyDetector.detect() result"""
+    from utils.currency_detector import INRCurrencyDetector
+    from utils.ocr_engine import create_ocr_engine
+
+    return INRCurrencyDetector(ocr=create_ocr_engine(OCR_ENGINE, handles=OCR_HANDLES), preprocess_profile=MONEY_PROFILE).detect
+
+
+def load_face():
+    """Returns: callable(list of RGB images) -> (encodings per image, face boxes per image, stage timings in ms,
+             faces found per image before the MAX_FACES cut)"""
+    from utils.face_detector import create_face_detector
+    from utils.face_embedder import FaceEmbedder
+
+    detector = create_face_detector(FACE_TIER, FACE_DETECTOR, FACE_DETECT_SIDE)
+    return FaceEmbedder(detector, FACE_LANDMARKS, FACE_JITTERS, MAX_FACES, FACE_THREADS).encode
+
+
+TASK_LOADERS = {
+    'ocr': load_ocr,
+    'money': load_money,
+    'face': load_face,
+}
+
+
+def load_task(task):
+    """
+    Load the engine for a task by name: 'ocr', 'money' or 'face'
+    Returns: callable(image) -> result
+    """
+    if task not in TASK_LOADERS:
+        raise ValueError(f'Unknown vision task: {task}')
+    return TASK_LOADERS[task]()
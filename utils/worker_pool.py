@@ -0,0 +1,400 @@
+"""
+Worker Pool Module
+Runs CPU-bound vision engines (utils/vision_tasks.py) in separate worker
+processes so Tesseract, dlib and OpenCV denoising no longer compete with
+the Flask process for one interpreter.
+
+- Routing: every task has its own pool of workers, and each worker loads
+  its task's model once at start-up.
+- Shared memory: frames (one, or a list for batched engines) reach a worker
+  through a shared-memory buffer owned by that worker slot. Only offsets,
+  shapes, dtypes and the small result cross the pipe.
+- Backpressure: each task admits a bounded number of requests (running plus
+  waiting). Beyond that, run() raises PoolBusyError instead of queueing
+  without limit. It also does so when an admitted request gets no worker
+  within one job timeout plus one start-up, e.g. while restarts keep failing.
+- Recycling: a worker is replaced after `max_jobs` jobs, when it crashes or
+  when it exceeds the job timeout.
+
+Workers are started as fresh interpreters running this module, so they
+never import app.py or the engines of other tasks.
+"""
+
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when a task already has as many requests in flight as it admits"""
+
+
+class WorkerError(RuntimeError):
+    """Raised when a worker fails, crashes or times out on a job"""
+
+
+def parse_worker_counts(spec):
+    """
+    Parse 'ocr=2,money=1,face=2' into {'ocr': 2, 'money': 1, 'face': 2}
+    """
+    counts = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        task, _, count = part.partition('=')
+        counts[task.strip()] = int(count or 1)
+    return {task: count for task, count in counts.items() if count > 0}
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=name)
+        # Older Pythons track attached segments too and would unlink the
+        # parent's buffer when this worker exits
+        if os.name == 'posix':
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def _worker_main(task, address, authkey):
+    """Worker process: load the task's engine once, then serve jobs until told to stop"""
+    from utils.vision_tasks import load_task
+
+    conn = Client(address, authkey=authkey)
+    try:
+        handler = load_task(task)
+    except Exception as e:
+        conn.send(('error', f'Could not load {task}: {e}'))
+        return
+    conn.send(('ready', os.getpid()))
+
+    segment = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        name, layout, batched = message
+        if segment is None or segment.name != name:
+            if segment is not None:
+                segment.close()
+            segment = _attach_shared_memory(name)
+
+        images = [np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+                  for offset, shape, dtype in layout]
+        try:
+            reply = ('ok', handler(images if batched else images[0]))
+        except Exception as e:
+            reply = ('error', f'{type(e).__name__}: {e}')
+        del images
+        conn.send(reply)
+
+    if segment is not None:
+        segment.close()
+
+
+class _Worker:
+    def __init__(self, task, start_timeout):
+        """
+        Launch one worker process and wait until it has loaded its engine
+        """
+        self.task = task
+        self.jobs = 0
+        self.segment = None
+
+        authkey = os.urandom(16)
+        listener = Listener(authkey=authkey)
+        env = dict(os.environ, BLINDGO_WORKER_AUTHKEY=authkey.hex(),
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        self.process = subprocess.Popen([sys.executable, '-m', 'utils.worker_pool', task, listener.address], env=env)
+
+        # accept() has no timeout, so wait for it on a helper thread while watching the child
+        accepted = []
+
+        def accept():
+            try:
+                accepted.append(listener.accept())
+            except OSError:
+                pass
+
+        acceptor = threading.Thread(target=accept, daemon=True)
+        acceptor.start()
+        deadline = time.monotonic() + start_timeout
+        while acceptor.is_alive() and self.process.poll() is None and time.monotonic() < deadline:
+            acceptor.join(0.1)
+        listener.close()
+
+        if not accepted:
+            self.process.kill()
+            raise WorkerError(f'{task} worker did not start')
+        self.conn = accepted[0]
+
+        remaining = max(0.0, deadline - time.monotonic())
+        if not self.conn.poll(remaining):
+            self.stop()
+            raise WorkerError(f'{task} worker did not load its engine in time')
+        status, payload = self.conn.recv()
+        if status != 'ready':
+            self.stop()
+            raise WorkerError(payload)
+        self.pid = payload
+
+    def _buffer_for(self, nbytes):
+        if self.segment is None or self.segment.size < nbytes:
+            self._release_segment()
+            # Room to spare so slightly larger frames do not reallocate every time
+            self.segment = shared_memory.SharedMemory(create=True, size=max(nbytes * 5 // 4, 1 << 20))
+        return self.segment
+
+    def _release_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+    def run(self, image, timeout):
+        batched = isinstance(image, (list, tuple))
+        frames = [np.ascontiguousarray(frame) for frame in (image if batched else [image])]
+        segment = self._buffer_for(sum(frame.nbytes for frame in frames))
+
+        # Frames are packed back to back: (offset, shape, dtype) each
+        layout = []
+        offset = 0
+        for frame in frames:
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=segment.buf, offset=offset)[...] = frame
+            layout.append((offset, frame.shape, frame.dtype.str))
+            offset += frame.nbytes
+
+        self.conn.send((segment.name, layout, batched))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f'{self.task} worker took longer than {timeout}s')
+        status, payload = self.conn.recv()
+        self.jobs += 1
+
+        if status != 'ok':
+            raise WorkerError(payload)
+        return payload
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        self._release_segment()
+
+
+class TaskPool:
+    def __init__(self, task, workers, max_pending, max_jobs, timeout, queue_timeout, start_timeout):
+        self.task = task
+        self.size = workers
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.start_timeout = start_timeout
+        # An admitted request waits this long for a worker: one job plus a restart
+        self.idle_timeout = timeout + start_timeout
+
+        self._idle = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.recycled = 0
+        self.restarted = 0
+
+    def start(self):
+        started = []
+        try:
+            for _ in range(self.size):
+                started.append(_Worker(self.task, self.start_timeout))
+        except Exception:
+            # All or nothing, so a retried start() does not add to half a pool
+            for worker in started:
+                worker.stop()
+            raise
+        for worker in started:
+            self._idle.put(worker)
+
+    def _checkout(self, deadline):
+        """Next idle worker; PoolBusyError when none turns up before the deadline"""
+        try:
+            return self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError(f'No {self.task} worker became available within {self.idle_timeout:.0f}s') from None
+
+    def _replace(self, worker, reason):
+        """Stop a worker and start its replacement in the background"""
+        with self._lock:
+            if reason == 'recycled':
+                self.recycled += 1
+            else:
+                self.restarted += 1
+
+        def replace():
+            worker.stop()
+            # Keep trying: a missing worker would shrink the pool for good
+            while True:
+                try:
+                    self._idle.put(_Worker(self.task, self.start_timeout))
+                    return
+                except WorkerError as e:
+                    print(f"⚠️ Could not restart {self.task} worker: {e}")
+                    time.sleep(1)
+
+        threading.Thread(target=replace, daemon=True).start()
+
+    def run(self, image):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError(f'{self.task} workers are busy; try again shortly')
+
+        try:
+            with self._lock:
+                self.in_flight += 1
+            deadline = time.monotonic() + self.idle_timeout
+            worker = self._checkout(deadline)
+            while not worker.alive():
+                # Died while idle; wait for its replacement rather than fail the request
+                self._replace(worker, 'crashed')
+                worker = self._checkout(deadline)
+            try:
+                result = worker.run(image, self.timeout)
+            except WorkerError:
+                # The engine raised; the worker itself is fine
+                with self._lock:
+                    self.failed += 1
+                self._idle.put(worker)
+                raise
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                self._replace(worker, 'crashed')
+                raise WorkerError(f'{self.task} worker failed: {e}') from e
+
+            with self._lock:
+                self.completed += 1
+            if worker.jobs >= self.max_jobs or not worker.alive():
+                self._replace(worker, 'recycled')
+            else:
+                self._idle.put(worker)
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.size,
+                'idle': self._idle.qsize(),
+                'in_flight': self.in_flight,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'recycled': self.recycled,
+                'restarted': self.restarted,
+            }
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+class VisionWorkerPool:
+    def __init__(self, workers, pending_per_worker=4, max_jobs=500, timeout=60,
+                 queue_timeout=5, start_timeout=120):
+        """
+        Configure one pool per task; processes start on first use
+
+        workers:            {task: number of worker processes}
+        pending_per_worker: requests admitted per worker (running + waiting) before PoolBusyError
+        max_jobs:           jobs after which a worker is replaced by a fresh process
+        timeout:            seconds a single job may take before its worker is killed
+        queue_timeout:      seconds a request waits for admission before PoolBusyError
+        """
+        self.pools = {
+            task: TaskPool(task, count, count * pending_per_worker, max_jobs, timeout, queue_timeout, start_timeout)
+            for task, count in workers.items()
+        }
+        self._started_pid = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, task):
+        return task in self.pools
+
+    def start(self):
+        """
+        Launch every worker and wait until they have loaded their engines.
+        A forked copy of the pool (e.g. a pre-forking server) starts its own workers.
+        """
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            started = []
+            try:
+                for pool in self.pools.values():
+                    if self._started_pid is not None:
+                        # Inherited through fork: those workers belong to the parent
+                        pool._idle = queue.Queue()
+                    pool.start()
+                    started.append(pool)
+            except Exception:
+                # Stop what did start, so the next call begins from a clean slate
+                for pool in started:
+                    pool.close()
+                raise
+            self._started_pid = os.getpid()
+
+    def run(self, task, image):
+        """
+        Run one frame through a task's worker
+        Returns: the engine's result
+        """
+        self.start()
+        return self.pools[task].run(image)
+
+    def stats(self):
+        return {task: pool.stats() for task, pool in self.pools.items()}
+
+    def close(self):
+        if self._started_pid != os.getpid():
+            return
+        for pool in self.pools.values():
+            pool.close()
+        self._started_pid = None
+
+
+if __name__ == '__main__':
+    _worker_main(sys.argv[1], sys.argv[2], bytes.fromhex(os.environ['BLINDGO_WORKER_AUTHKEY']))